@@ -1,13 +1,30 @@
+import asyncio
+import copy
 import logging
 import os
 import pathlib
+import threading
+import time
 import ujson
 from datetime import datetime
-from chatter import GPT4o, GroqModel, OllamaModel
+from conclusion_memo import open_memo
+from chatter import GPT4o, GroqModel, OllamaModel, is_error_response, iterate_sync, run_sync
 from logic import LogicTables
-from memory.memory import create_memory_folders, store_in_stm, DialogEntry
+from journal import apply_list_record, open_journal
+from log_pipeline import configure_logger
+from memory import create_memory_folders, store_in_stm, DialogEntry
+from inference import InferenceEngine
+from premise_store import PremiseStore, normalize
+from table_file import convert_truth_tables_json
+from truth_table import table_rows
+from prompt_state import PromptState
 from api import APIManager
 
+# Largest logic table written to truth_table.ttbl (2 MB per column); bigger ones are not written
+TRUTH_TABLE_ROW_LIMIT = 1 << 24
+
+LOG_LEVELS = {'debug': logging.DEBUG, 'info': logging.INFO, 'warning': logging.WARNING, 'error': logging.ERROR}
+
 class SocraticReasoning:
     def __init__(self, chatter):
         """
@@ -16,41 +33,56 @@ class SocraticReasoning:
         Args:
             chatter: An instance of the model used for generating responses.
         """
-        self.premises = []  # List to hold premises
-        self.logger = logging.getLogger('SocraticReasoning')
-        self.logger.setLevel(logging.DEBUG)  # Set to DEBUG to capture all SocraticReasoning logs
-
-        # Ensure the logs directory exists
-        logs_dir = './memory/logs'
-        os.makedirs(logs_dir, exist_ok=True)
-
-        # File handler for saving Socratic Reasoning logs
-        file_handler = logging.FileHandler(os.path.join(logs_dir, 'socraticlogs.txt'))
-        file_handler.setLevel(logging.DEBUG)
-        file_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-        file_handler.setFormatter(file_formatter)
-
-        # Stream handler to suppress lower-level logs in the terminal
-        stream_handler = logging.StreamHandler()
-        stream_handler.setLevel(logging.CRITICAL)  # Show only critical logs in the terminal
-        stream_formatter = logging.Formatter('%(message)s')
-        stream_handler.setFormatter(stream_formatter)
-
-        # Adding handlers to the logger
-        self.logger.addHandler(file_handler)
-        self.logger.addHandler(stream_handler)
+        self.premises = PremiseStore()  # Indexed list to hold premises
+        # Socratic reasoning goes to socraticlogs.txt and, one line per message, to errorlogs.txt;
+        # the files are written by the shared log pipeline thread
+        self.logger = configure_logger('SocraticReasoning', [
+            ('./memory/logs/socraticlogs.txt', None),
+            ('./memory/logs/errorlogs.txt', '%(levelname)s: %(message)s'),
+        ])
+
+        # Stream handler to suppress lower-level logs in the terminal, added once per process
+        if not any(type(handler) is logging.StreamHandler for handler in self.logger.handlers):
+            stream_handler = logging.StreamHandler()
+            stream_handler.setLevel(logging.CRITICAL)  # Show only critical logs in the terminal
+            stream_handler.setFormatter(logging.Formatter('%(message)s'))
+            self.logger.addHandler(stream_handler)
 
         # File paths for saving premises, non-premises, conclusions, and truth tables
-        self.premises_file = './memory/logs/premises.json'
-        self.not_premises_file = './memory/logs/notpremise.json'
+        self.premises_file = './memory/logs/premises.jsonl'
+        self.not_premises_file = './memory/logs/notpremise.jsonl'
         self.conclusions_file = './memory/logs/conclusions.txt'  # Path to save conclusions
-        self.truth_tables_file = './memory/logs/truth_tables.json'  # Path to save truth tables
+        self.conclusions_journal_file = './memory/logs/conclusions.jsonl'  # Premises with their conclusion
+        self.truth_tables_file = './memory/logs/truth_tables.jsonl'  # Saved truths and logic table updates
+        self.truth_table_file = './memory/logs/truth_table.ttbl'  # The current logic table as packed bits
+        self.truth_table_row_limit = TRUTH_TABLE_ROW_LIMIT
+        self.exported_table = None  # (variables, expressions) last written to truth_table_file
+
+        # Append-only journals shared by every instance; the .json files are read once as their starting point
+        self.premises_journal = open_journal(self.premises_file, apply=apply_list_record,
+                                             legacy_path='./memory/logs/premises.json')
+        self.not_premises_journal = open_journal(self.not_premises_file, legacy_path='./memory/logs/notpremise.json')
+        self.conclusions_journal = open_journal(self.conclusions_journal_file)
+        # truth_tables.json held appended indented dumps, which no JSON reader accepts; it is converted once
+        if os.path.exists('./memory/logs/truth_tables.json') and not os.path.exists(self.truth_tables_file):
+            convert_truth_tables_json('./memory/logs/truth_tables.json', self.truth_tables_file, self.truth_table_file,
+                                      self.truth_table_row_limit)
+        self.truth_tables_journal = open_journal(self.truth_tables_file)
 
         self.max_tokens = 100  # Default max tokens for Socratic premise from add_premise(statement)
+        self.speculative_width = 1  # Number of candidate premises explored in parallel by draw_conclusion
         self.chatter = chatter  # Chatter model for generating responses
         self.logic_tables = LogicTables()  # Logic tables for reasoning
         self.dialogue_history = []  # List to hold the history of dialogues
         self.logical_conclusion = ""  # Variable to store the conclusion
+        self.conclusion_valid = False  # Whether the last conclusion drawn validated
+        self.prompt_state = PromptState()  # Conversation sent to the chatter, grown one turn at a time
+        self.prompt_stats = None  # Prompt token counts of the last conclusion
+        self.memo = open_memo()  # Conclusions already drawn per premise set; None disables memoization
+        self.inference = None  # Forward-chaining engine over the premises, extended as premises are added
+        self.inference_premises = []  # The premises the engine holds
+        self.generated_premises = set()  # Normalized premises the chatter generated; never used to validate
+        self.inference_lock = threading.Lock()  # validation may run in worker threads
 
         create_memory_folders()  # Ensure memory folders are created
 
@@ -62,24 +94,17 @@ class SocraticReasoning:
             message: The message to be logged.
             level: The level of logging ('info' or 'error').
         """
-        if level == 'info':
-            self.logger.info(message)
-        elif level == 'error':
-            self.logger.error(message)
-        self.log_errors(message, level)  # Save Socratic reasoning to ./memory/logs/socraticlogs.txt
+        self.log_errors(message, level)  # Save Socratic reasoning to ./memory/logs/socraticlogs.txt and errorlogs.txt
 
     def log_errors(self, message, level):
         """
-        Stores error logs in ./memory/logs/errorlogs.txt.
+        Stores logs in ./memory/logs/errorlogs.txt through the log pipeline.
 
         Args:
             message: The error message to be logged.
             level: The level of the error.
         """
-        error_logs_path = './memory/logs/errorlogs.txt'
-        pathlib.Path(error_logs_path).parent.mkdir(parents=True, exist_ok=True)
-        with open(error_logs_path, 'a') as file:
-            file.write(f"{level.upper()}: {message}\n")
+        self.logger.log(LOG_LEVELS.get(level, logging.INFO), message)
 
     def log_not_premise(self, message, level='info'):
         """
@@ -89,26 +114,35 @@ class SocraticReasoning:
             message: The message to be logged.
             level: The level of logging.
         """
-        not_premises_path = self.not_premises_file
-        pathlib.Path(not_premises_path).parent.mkdir(parents=True, exist_ok=True)
-        entry = {"level": level.upper(), "message": message}
-        try:
-            with open(not_premises_path, 'r') as file:
-                logs = ujson.load(file)
-        except (FileNotFoundError, ValueError):
-            logs = []
-
-        logs.append(entry)
-        with open(not_premises_path, 'w') as file:
-            ujson.dump(logs, file, indent=2)
+        self.not_premises_journal.append({"level": level.upper(), "message": message})
 
     def save_premises(self):
         """
-        Saves the current list of premises to a JSON file.
+        Saves the whole current list of premises to the premises journal.
+        """
+        if self.premises_journal is not None:
+            self.premises_journal.append({"op": "set", "items": list(self.premises)})
+
+    def save_premise(self, premise, op='add'):
+        """
+        Saves a single added or removed premise to the premises journal.
+
+        Args:
+            premise: The premise.
+            op: 'add' or 'remove'.
+        """
+        if self.premises_journal is not None:
+            self.premises_journal.append({"op": op, "item": premise})
+
+    def load_premises(self):
+        """
+        Loads the saved premises, rebuilt from the journal snapshot and the entries after it.
+
+        Returns:
+            PremiseStore: The saved premises.
         """
-        pathlib.Path(self.premises_file).parent.mkdir(parents=True, exist_ok=True)
-        with open(self.premises_file, 'w') as file:
-            ujson.dump(self.premises, file, indent=2)
+        self.premises = PremiseStore(self.premises_journal.load())
+        return self.premises
 
     def add_premise(self, premise):
         """
@@ -119,7 +153,7 @@ class SocraticReasoning:
         """
         if self.parse_statement(premise):  # Check if the premise is valid
             self.premises.append(premise)  # Add the premise to the list
-            self.save_premises()  # Save the updated list of premises
+            self.save_premise(premise)  # Save the added premise
         else:
             self.log_not_premise(f'Invalid premise: {premise}', level='error')  # Log invalid premise
 
@@ -145,8 +179,14 @@ class SocraticReasoning:
         Returns:
             str: A new premise generated from the current premises.
         """
-        premise_text = " ".join(f"{premise}" for premise in current_premises)
-        new_premise = self.chatter.generate_response(premise_text)
+        return run_sync(self.agenerate_new_premise(current_premises))
+
+    async def agenerate_new_premise(self, current_premises):
+        """
+        Coroutine version of generate_new_premise.
+        """
+        self.prompt_state.sync(current_premises)
+        new_premise = await self.agenerate(self.prompt_state.messages())
         return new_premise.strip()
 
     def challenge_premise(self, premise):
@@ -156,31 +196,49 @@ class SocraticReasoning:
         Args:
             premise: The premise to be challenged.
         """
-        if premise in self.premises:  # Check if the premise exists in the list
-            self.premises.remove(premise)  # Remove the premise from the list
+        if premise in self.premises:  # Check if the premise exists in the store
+            self.premises.remove(premise)  # Remove the premise from the store
+            self.save_premise(premise, op='remove')
+            self.invalidate_memo(premise)  # Conclusions drawn from the premise no longer hold
             self.log(f'Challenged and removed premise: {premise}')  # Log the removal
             self.remove_equivalent_premises(premise)  # Remove equivalent premises
-            self.save_premises()  # Save the updated list of premises
         else:
             self.log_not_premise(f'Premise not found: {premise}', level='error')  # Log if premise not found
 
     def remove_equivalent_premises(self, premise):
         """
-        Removes premises that are logically equivalent to the challenged premise.
+        Removes premises that are equivalent to the challenged premise: the same text up to case,
+        spacing and punctuation, or the same fact in another phrasing.
 
         Args:
             premise: The premise to be checked for equivalence.
         """
-        equivalent_premises = [p for p in self.premises if self.logic_tables.unify_variables(premise, p)]
-        for p in equivalent_premises:
-            self.premises.remove(p)  # Remove equivalent premise
+        for premise_id in self.premises.equivalents(premise):  # Index lookup instead of a scan
+            p = self.premises.remove_id(premise_id)  # Remove equivalent premise
+            self.save_premise(p, op='remove')
+            self.invalidate_memo(p)
             self.log_not_premise(f'Removed equivalent premise: {p}')  # Log removal of equivalent premise
-        self.save_premises()  # Save the updated list of premises
 
-    def draw_conclusion(self):
+    def invalidate_memo(self, premise):
+        """
+        Forgets the memoized conclusions of every premise set that uses a premise.
+
+        Args:
+            premise: The challenged premise.
+        """
+        if self.memo is not None:
+            dropped = self.memo.invalidate(premise)
+            if dropped:
+                self.log(f'Dropped {dropped} memoized conclusions using premise: {premise}')
+
+    def draw_conclusion(self, speculative=None):
         """
         Draws a conclusion based on the current list of premises.
 
+        Args:
+            speculative: Number of candidate premises to explore in parallel; defaults to
+                self.speculative_width. With 1 the premises are generated one at a time.
+
         Returns:
             str: The conclusion derived from the premises.
         """
@@ -188,64 +246,343 @@ class SocraticReasoning:
             self.log('No premises available for logic as conclusion.', level='error')  # Log the absence of premises
             return "No premises available for logic as conclusion."
 
+        run_sync(self.areason(speculative or self.speculative_width))
+
+        # Save the conclusion along with premises
+        self.conclusions_journal.append({
+            "premises": list(self.premises),
+            "conclusion": self.logical_conclusion,
+            "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        })
+
+        # Log the conclusion to conclusions.txt
+        pathlib.Path(self.conclusions_file).parent.mkdir(parents=True, exist_ok=True)
+        with open(self.conclusions_file, 'a') as file:
+            file.write(f"Premises: {self.premises}\nConclusion: {self.logical_conclusion}\n")
+
+        # Log the final premises to conclusion
+        self.log(f"Final Premises to Conclusion:\nPremises: {self.premises}\nConclusion: {self.logical_conclusion}")
+
+        # Log the prompt tokens spent on this conclusion; new tokens are those outside the cacheable prefix
+        self.prompt_stats = self.prompt_state.end_conclusion()
+        self.log(f"Prompt tokens for conclusion: {self.prompt_stats['prompt_tokens']} sent, "
+                 f"{self.prompt_stats['new_tokens']} new, in {self.prompt_stats['requests']} requests")
+
+        # Save the valid conclusion as a truth
+        self.save_truth(self.logical_conclusion)
+
+        # Clear the premises list for the next round
+        self.premises = PremiseStore()
+        self.save_premises()
+
+        return self.logical_conclusion  # Return the conclusion
+
+    def fork(self, premises=()):
+        """
+        Returns a reasoner with its own premises and conversation that shares this one's chatter,
+        logic tables and logs, and does not journal its premises.
+
+        Args:
+            premises: The premises of the new reasoner.
+        """
+        reasoner = copy.copy(self)
+        reasoner.premises = PremiseStore(premises)
+        reasoner.premises_journal = None
+        reasoner.prompt_state = PromptState(self.prompt_state.system_prompt)
+        reasoner.dialogue_history = []
+        reasoner.logical_conclusion = ""
+        reasoner.inference = None
+        reasoner.inference_premises = []
+        reasoner.generated_premises = set()
+        reasoner.inference_lock = threading.Lock()
+        return reasoner
+
+    def draw_conclusions_batch(self, premise_sets, concurrency=8, timeout=None, results_file=None, speculative=None):
+        """
+        Draws conclusions for many independent premise sets, several at a time, and yields each
+        result as soon as it is ready. Every set is reasoned on its own fork, so this instance's
+        premises are left alone. All results go to one JSONL file instead of conclusions.txt.
+
+        Args:
+            premise_sets: Iterable of premise lists.
+            concurrency: Maximum number of premise sets reasoned at once.
+            timeout: Seconds allowed per premise set, or None for no limit.
+            results_file: The JSONL result file; defaults to a timestamped file in ./memory/logs/batches.
+            speculative: Candidate premises explored in parallel per set; defaults to self.speculative_width.
+
+        Yields:
+            dict: index, premises, conclusion, valid and seconds of a premise set, in completion
+            order; a failed or timed out set has an error instead of a conclusion.
+        """
+        if results_file is None:
+            results_file = f"./memory/logs/batches/conclusions_{datetime.now().strftime('%Y%m%d%H%M%S%f')}.jsonl"
+        pathlib.Path(results_file).parent.mkdir(parents=True, exist_ok=True)
+        counts = {'valid': 0, 'invalid': 0, 'failed': 0}
+        with open(results_file, 'w', encoding='utf-8') as file:
+            batch = self.adraw_conclusions_batch(premise_sets, concurrency, timeout, speculative)
+            for result in iterate_sync(batch):
+                file.write(ujson.dumps(result, ensure_ascii=False) + "\n")
+                counts['failed' if 'error' in result else 'valid' if result['valid'] else 'invalid'] += 1
+                yield result
+        self.log(f"Batch of {sum(counts.values())} premise sets: {counts['valid']} valid, {counts['invalid']} invalid, "
+                 f"{counts['failed']} failed. Results in {results_file}")
+
+    async def adraw_conclusions_batch(self, premise_sets, concurrency=8, timeout=None, speculative=None):
+        """
+        Coroutine version of draw_conclusions_batch, without the result file.
+        """
+        width = speculative or self.speculative_width
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run(index, premises):
+            async with semaphore:
+                reasoner = self.fork(premise for premise in premises if self.parse_statement(premise))
+                result = {"index": index, "premises": list(premises)}
+                started = time.monotonic()
+                try:
+                    if not reasoner.premises:
+                        raise ValueError("No premises available for logic as conclusion.")
+                    conclusion = await asyncio.wait_for(reasoner.areason(width), timeout)
+                    result.update(premises=list(reasoner.premises), conclusion=conclusion, valid=reasoner.conclusion_valid)
+                except asyncio.TimeoutError:
+                    result["error"] = f"timed out after {timeout} seconds"
+                except Exception as e:
+                    result["error"] = f"{type(e).__name__}: {e}"
+                result["seconds"] = round(time.monotonic() - started, 6)
+                return result
+
+        tasks = [asyncio.ensure_future(run(index, premises)) for index, premises in enumerate(premise_sets)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def areason(self, width=1):
+        """
+        Generates premises until a conclusion validates or five premises have been added, and
+        stores the conclusion in self.logical_conclusion. Nothing is written to the conclusion
+        logs; draw_conclusion does that. A premise set that was reasoned before gets its
+        memoized premises and conclusion back without any model call; only conclusions that
+        validated are memoized, per provider and model.
+
+        Args:
+            width: Number of candidate premises explored in parallel; 1 generates them one at a time.
+
+        Returns:
+            str: The conclusion.
+        """
+        scope = self.memo_scope()
+        entry = self.memo.get(self.premises, scope) if self.memo is not None else None
+        if entry is not None:
+            for premise in entry['generated']:
+                self.add_generated_premise(premise)
+            self.logical_conclusion = entry['conclusion']
+            self.conclusion_valid = True
+            self.log(f'Memoized conclusion for premises {entry["premises"]}: {self.logical_conclusion}')
+            return self.logical_conclusion
+
+        given = list(self.premises)
+        conclusion = await self.agenerate_conclusion(width)
+        if self.memo is not None and self.conclusion_valid:
+            self.memo.put(given, self.premises[len(given):], conclusion, scope)
+        return conclusion
+
+    def memo_scope(self):
+        """
+        Returns the scope of memoized conclusions, "provider/model" of the chatter. Chatters that
+        only implement generate_response may have neither, and are scoped by their class name.
+        """
+        provider = getattr(self.chatter, 'provider', None) or type(self.chatter).__name__
+        return f"{provider}/{getattr(self.chatter, 'default_model', None)}"
+
+    async def agenerate_conclusion(self, width=1):
+        """
+        Generates premises and a conclusion with the chatter and sets self.conclusion_valid; see
+        areason.
+        """
+        self.conclusion_valid = False
+        if width > 1:
+            await self.adraw_speculative_conclusion(width)
+            return self.logical_conclusion
+
         additional_premises_count = 0  # Counter for additional premises
 
         # Generate new premises until a valid conclusion is drawn or the maximum limit is reached
         while additional_premises_count < 5:
-            new_premise = self.generate_new_premise(self.premises)
+            new_premise = await self.agenerate_new_premise(self.premises)
+            if is_error_response(new_premise):
+                # A failed call is not a premise; stop instead of reasoning from the error text
+                self.log(f'Failed to generate a premise: {new_premise}', level='error')
+                self.logical_conclusion = new_premise
+                break
             if not self.parse_statement(new_premise):
                 self.log_not_premise(f'Invalid generated premise: {new_premise}', level='error')
                 continue
-            self.premises.append(new_premise)
-            self.save_premises()
+            self.prompt_state.add_assistant(new_premise)  # Only this turn is new to the chatter
+            self.add_generated_premise(new_premise)
             additional_premises_count += 1
 
-            # Create a single string from the premises
-            premise_text = " ".join(f"{premise}" for premise in self.premises)
-
-            # Use the premise_text as the input (knowledge) for generating a response
-            raw_response = self.chatter.generate_response(premise_text)
+            # Use the conversation so far as the input (knowledge) for generating a response
+            raw_response = await self.agenerate(self.prompt_state.messages())
 
             # Process the response to get the conclusion
             conclusion = raw_response.strip()
 
             self.logical_conclusion = conclusion  # Store the conclusion
 
-            if self.validate_conclusion():  # Validate the conclusion
+            if is_error_response(conclusion):
+                self.log(f'Failed to generate a conclusion: {conclusion}', level='error')
+                break
+
+            if await asyncio.to_thread(self.validate_conclusion):  # Validate the conclusion off the event loop
+                self.conclusion_valid = True
                 break
             else:
                 self.log_not_premise('Invalid conclusion. Generating more premises.', level='error')
+        return self.logical_conclusion
 
-        # Save the conclusion along with premises
-        conclusion_entry = {"premises": self.premises, "conclusion": self.logical_conclusion}
-        pathlib.Path(self.premises_file).parent.mkdir(parents=True, exist_ok=True)
-        with open(self.premises_file, 'w') as file:
-            ujson.dump(conclusion_entry, file, indent=2)
+    async def adraw_speculative_conclusion(self, width):
+        """
+        Generates premises and conclusions with several candidates in flight at once,
+        keeping the first candidate whose conclusion validates.
 
-        # Log the conclusion to conclusions.txt
-        pathlib.Path(self.conclusions_file).parent.mkdir(parents=True, exist_ok=True)
-        with open(self.conclusions_file, 'a') as file:
-            file.write(f"Premises: {self.premises}\nConclusion: {self.logical_conclusion}\n")
+        Args:
+            width: The number of candidate premises explored in parallel.
+        """
+        for _ in range(5):  # Same limit on additional premises as the sequential loop
+            premise, conclusion, valid = await self.speculate(self.premises, width)
+            if premise is None:
+                self.log(f'Failed to generate a premise: {conclusion}', level='error')
+                self.logical_conclusion = conclusion
+                break
+            self.prompt_state.add_assistant(premise)
+            self.add_generated_premise(premise)
+            self.logical_conclusion = conclusion
+            if valid:
+                self.conclusion_valid = True
+                break
+            self.log_not_premise('Invalid conclusion. Generating more premises.', level='error')
 
-        # Log the final premises to conclusion
-        self.log(f"Final Premises to Conclusion:\nPremises: {self.premises}\nConclusion: {self.logical_conclusion}")
+    async def speculate(self, premises, width):
+        """
+        Fans out width candidate premises and draws a conclusion from each as soon as its
+        premise arrives. Returns at the first conclusion that passes validate_conclusion and
+        cancels the remaining candidates.
 
-        # Save the valid conclusion as a truth
-        self.save_truth(self.logical_conclusion)
+        Args:
+            premises: The current list of premises.
+            width: The number of candidates.
 
-        # Clear the premises list for the next round
-        self.premises = []
+        Returns:
+            tuple: (premise, conclusion, valid). Without a valid conclusion the first usable
+            candidate is returned with valid=False; without any usable candidate premise is None
+            and conclusion holds the error.
+        """
+        self.prompt_state.sync(premises)
+
+        async def candidate(index):
+            # Distinct prompts keep the candidates from being coalesced into a single request
+            extra = [] if index == 0 else [("user", f"Alternative premise {index + 1}:")]
+            premise = (await self.agenerate(self.prompt_state.messages(*extra))).strip()
+            if is_error_response(premise) or not self.parse_statement(premise):
+                return premise, None
+            conclusion = (await self.agenerate(self.prompt_state.messages(("assistant", premise)))).strip()
+            return premise, conclusion
+
+        tasks = [asyncio.ensure_future(candidate(index)) for index in range(width)]
+        first = None
+        failure = "No candidate premise could be generated."
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                premise, conclusion = await next_done
+                if conclusion is None:
+                    self.log_not_premise(f'Invalid generated premise: {premise}', level='error')
+                    failure = premise or failure
+                    continue
+                if is_error_response(conclusion):
+                    failure = conclusion
+                    continue
+                if await asyncio.to_thread(self.validate_conclusion, conclusion, [premise]):
+                    return premise, conclusion, True
+                first = first or (premise, conclusion)
+        finally:
+            for task in tasks:
+                task.cancel()
+        if first is None:
+            return None, failure, False
+        return first[0], first[1], False
+
+    async def agenerate(self, knowledge):
+        """
+        Generates a response without blocking the event loop, for chatters with or without
+        an agenerate_response coroutine.
+        """
+        self.prompt_state.record(knowledge)
+        if hasattr(self.chatter, 'agenerate_response'):
+            return await self.chatter.agenerate_response(knowledge)
+        return await asyncio.to_thread(self.chatter.generate_response, knowledge)
+
+    def add_generated_premise(self, premise):
+        """
+        Adds and saves a premise the chatter generated. Generated premises take part in the
+        conversation but not in validation: a conclusion cannot follow from them.
+        """
+        if premise not in self.premises:
+            self.generated_premises.add(normalize(premise))
+        self.premises.append(premise)
+        self.save_premise(premise)
+
+    def validate_conclusion(self, conclusion=None, extra_premises=()):
+        """
+        Validates the logical conclusion. A conclusion that restates a premise, given or
+        generated, is not valid; otherwise it must follow from the given premises or be a
+        tautology.
 
-        return self.logical_conclusion  # Return the conclusion
+        Args:
+            conclusion: The conclusion to validate; defaults to self.logical_conclusion.
+            extra_premises: Generated premises not yet in self.premises, such as a speculative
+                candidate, which the conclusion must not restate either.
 
-    def validate_conclusion(self):
+        Returns:
+            bool: True if the conclusion is valid, False otherwise, or None when the logic tables
+            cannot decide it.
         """
-        Validates the logical conclusion.
+        if conclusion is None:
+            conclusion = self.logical_conclusion
+        stated = normalize(conclusion)
+        if any(normalize(premise) == stated for premise in list(self.premises) + list(extra_premises)):
+            self.log(f'Conclusion restates a premise: {conclusion}')
+            return False
+        if self.entails(conclusion):
+            self.log(f'Conclusion follows from the premises: {conclusion}')
+            return True
+        return self.logic_tables.tautology(conclusion)  # Validate using logic tables
 
-        Returns:
-            bool: True if the conclusion is valid, False otherwise.
+    def entails(self, conclusion):
         """
-        return self.logic_tables.tautology(self.logical_conclusion)  # Validate using logic tables
+        Checks locally, by forward chaining over the premises the user gave, whether a conclusion
+        is derived from them; a fact among the premises is not derived from them.
+
+        The engine is kept between calls and only the premises added since are fed to it; when a
+        premise has been removed it is rebuilt.
+
+        Args:
+            conclusion: The conclusion to check.
+
+        Returns:
+            bool: True if the conclusion is derived from the given premises.
+        """
+        with self.inference_lock:
+            premises = [premise for premise in self.premises if normalize(premise) not in self.generated_premises]
+            if self.inference is None or premises[:len(self.inference_premises)] != self.inference_premises:
+                self.inference = InferenceEngine()
+                self.inference_premises = []
+            for premise in premises[len(self.inference_premises):]:
+                self.inference.add_premise(premise)
+            self.inference_premises = premises
+            return self.inference.entails(conclusion, derived=True)
 
     def save_truth(self, truth):
         """
@@ -258,10 +595,7 @@ class SocraticReasoning:
             "truth": truth,
             "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         }
-        pathlib.Path(self.truth_tables_file).parent.mkdir(parents=True, exist_ok=True)
-        with open(self.truth_tables_file, 'a') as file:
-            ujson.dump(truth_tables_entry, file, indent=2)
-            file.write("\n")
+        self.truth_tables_journal.append(truth_tables_entry)
 
     def update_logic_tables(self, variables, expressions, valid_truths):
         """
@@ -276,26 +610,38 @@ class SocraticReasoning:
         self.logic_tables.expressions = expressions
         self.logic_tables.valid_truths = valid_truths
 
-        # Log the truth tables to truth_tables.json
+        # Log the update to truth_tables.jsonl and the table itself, as packed bit columns, to truth_table.ttbl
         truth_tables_entry = {
             "variables": variables,
             "expressions": expressions,
             "valid_truths": valid_truths
         }
-        pathlib.Path(self.truth_tables_file).parent.mkdir(parents=True, exist_ok=True)
-        with open(self.truth_tables_file, 'w') as file:
-            ujson.dump(truth_tables_entry, file, indent=2)
+        self.truth_tables_journal.append(truth_tables_entry)
+        self.export_truth_table()
 
-        # Save a timestamped file in ./memory/truth
-        timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-        belief_timestamp_file = f'./memory/truth/belief_{timestamp}.json'
-        pathlib.Path(belief_timestamp_file).parent.mkdir(parents=True, exist_ok=True)
-        with open(belief_timestamp_file, 'w') as file:
-            ujson.dump(truth_tables_entry, file, indent=2)
+        # Record the update in the belief store, in place of a belief_<timestamp>.json file
+        self.logic_tables.beliefs.add(truth_tables_entry, source='socratic')
 
         # Add a log entry to confirm the update
         self.logger.info("Updated logic tables: %s", truth_tables_entry)
 
+    def export_truth_table(self):
+        """
+        Writes the logic table to truth_table_file when its variables or expressions differ from
+        the ones last written. A table over truth_table_row_limit rows is not written, and the
+        file, which would be out of date, is removed.
+        """
+        table = (list(self.logic_tables.variables), list(self.logic_tables.expressions))
+        if table == self.exported_table:
+            return
+        rows = table_rows(table[0])
+        if rows <= self.truth_table_row_limit:
+            self.logic_tables.export_truth_table(self.truth_table_file, format='binary')
+        else:
+            pathlib.Path(self.truth_table_file).unlink(missing_ok=True)
+            self.log(f'Not writing the logic table: {rows} rows exceed {self.truth_table_row_limit}', level='warning')
+        self.exported_table = table
+
     def set_max_tokens(self, max_tokens):
         """
         Sets the maximum number of tokens for generating a response.
@@ -306,6 +652,16 @@ class SocraticReasoning:
         self.max_tokens = max_tokens
         self.log(f"Max tokens set to: {max_tokens}")
 
+    def set_speculative_width(self, width):
+        """
+        Sets the number of candidate premises draw_conclusion explores in parallel.
+
+        Args:
+            width: The number of candidates; 1 disables speculation.
+        """
+        self.speculative_width = max(1, int(width))
+        self.log(f"Speculative width set to: {self.speculative_width}")
+
     def interact(self):
         """
         Interacts with the user to add, challenge premises, and draw conclusions.
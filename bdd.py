@@ -0,0 +1,235 @@
+# bdd.py
+from expression import compile_expression
+from truth_table import assignment_of, find_row
+
+FALSE, TRUE = 0, 1
+
+# Up to this many variables a vectorized truth table is cheaper than building diagrams
+ENUMERATION_LIMIT = 12
+
+class BDDTooLarge(Exception):
+    """
+    Raised when a diagram grows past the node limit.
+    """
+
+class BDD:
+    """
+    Reduced ordered binary decision diagrams over a fixed variable order.
+
+    Nodes are integers: FALSE and TRUE are the terminals, every other node is (variable index,
+    low, high), where low is followed when the variable is False. A unique table keeps the
+    diagrams reduced, so two expressions are equivalent exactly when they build the same node,
+    and an expression is a tautology exactly when it builds TRUE.
+    """
+
+    def __init__(self, variables=(), node_limit=1000000):
+        """
+        Args:
+            variables: The variable order; variables met later are appended to it.
+            node_limit: Number of nodes after which BDDTooLarge is raised.
+        """
+        self.variables = []
+        self.index = {}
+        for name in variables:
+            self.add_variable(name)
+        self.node_limit = node_limit
+        self.nodes = [(float('inf'), None, None), (float('inf'), None, None)]  # the terminals
+        self.unique = {}
+        self.ite_cache = {}
+
+    def add_variable(self, name):
+        if name not in self.index:
+            self.index[name] = len(self.variables)
+            self.variables.append(name)
+        return self.index[name]
+
+    def mk(self, level, low, high):
+        if low == high:
+            return low
+        key = (level, low, high)
+        node = self.unique.get(key)
+        if node is None:
+            if len(self.nodes) >= self.node_limit:
+                raise BDDTooLarge(f"more than {self.node_limit} nodes")
+            node = len(self.nodes)
+            self.nodes.append(key)
+            self.unique[key] = node
+        return node
+
+    def var(self, name):
+        return self.mk(self.add_variable(name), FALSE, TRUE)
+
+    def _cofactors(self, node, level):
+        node_level, low, high = self.nodes[node]
+        if node_level == level:
+            return low, high
+        return node, node
+
+    def ite(self, f, g, h):
+        """
+        Returns the node for: if f then g else h.
+        """
+        if f == TRUE:
+            return g
+        if f == FALSE:
+            return h
+        if g == h:
+            return g
+        if g == TRUE and h == FALSE:
+            return f
+        key = (f, g, h)
+        node = self.ite_cache.get(key)
+        if node is not None:
+            return node
+        level = min(self.nodes[f][0], self.nodes[g][0], self.nodes[h][0])
+        f0, f1 = self._cofactors(f, level)
+        g0, g1 = self._cofactors(g, level)
+        h0, h1 = self._cofactors(h, level)
+        node = self.mk(level, self.ite(f0, g0, h0), self.ite(f1, g1, h1))
+        self.ite_cache[key] = node
+        return node
+
+    def negate(self, f):
+        return self.ite(f, FALSE, TRUE)
+
+    def apply(self, operator, f, g):
+        if operator == 'and':
+            return self.ite(f, g, FALSE)
+        if operator == 'or':
+            return self.ite(f, TRUE, g)
+        if operator == 'xor':
+            return self.ite(f, self.negate(g), g)
+        if operator == 'nand':
+            return self.ite(f, self.negate(g), TRUE)
+        if operator == 'nor':
+            return self.ite(f, FALSE, self.negate(g))
+        if operator == 'implication':
+            return self.ite(f, g, TRUE)
+        raise ValueError(f"unknown operator {operator}")
+
+    def build(self, tree):
+        """
+        Returns the node of an expression tree from expression.parse.
+        """
+        kind = tree[0]
+        if kind == 'var':
+            return self.var(tree[1])
+        if kind == 'const':
+            return TRUE if tree[1] else FALSE
+        if kind == 'not':
+            return self.negate(self.build(tree[1]))
+        return self.apply(kind, self.build(tree[1]), self.build(tree[2]))
+
+    def find_path(self, node, target):
+        """
+        Returns an assignment of every variable under which node evaluates to target, or None.
+        Variables the path does not test are set to True.
+        """
+        if node in (TRUE, FALSE) and node != target:
+            return None
+        assignment = {name: True for name in self.variables}
+        while node not in (TRUE, FALSE):
+            level, low, high = self.nodes[node]
+            # Every internal node of a reduced diagram reaches both terminals; prefer True,
+            # matching the order of truth table rows
+            if high == target or high not in (TRUE, FALSE):
+                assignment[self.variables[level]] = True
+                node = high
+            else:
+                assignment[self.variables[level]] = False
+                node = low
+        return assignment
+
+    def count(self, node):
+        """
+        Returns the number of assignments of all variables under which node is True.
+        """
+        memo = {}
+        total = len(self.variables)
+
+        def level_of(n):
+            return total if n in (TRUE, FALSE) else self.nodes[n][0]
+
+        def paths(n):
+            # Satisfying assignments of the variables from n's level down
+            if n == FALSE:
+                return 0
+            if n == TRUE:
+                return 1
+            if n not in memo:
+                level, low, high = self.nodes[n]
+                memo[n] = (paths(low) * 2 ** (level_of(low) - level - 1) +
+                           paths(high) * 2 ** (level_of(high) - level - 1))
+            return memo[n]
+
+        return paths(node) * 2 ** level_of(node)
+
+def _enumerate(expression, variables, want):
+    # Small inputs: the first row of the vectorized table where the expression equals want
+    index = find_row(variables, expression, want)
+    return None if index is None else assignment_of(variables, index)
+
+def _variables(expressions, variables):
+    ordered = list(variables or [])
+    for text in expressions:
+        for name in compile_expression(text).variables:
+            if name not in ordered:
+                ordered.append(name)
+    return ordered
+
+def find_assignment(expression, want=True, variables=None, node_limit=1000000, fallback=None):
+    """
+    Returns an assignment under which expression evaluates to want, or None if there is none.
+
+    Args:
+        expression: The expression text.
+        want: The value to reach.
+        variables: The variable order; the expression's own variables are added to it.
+        node_limit: Node limit of the diagram.
+        fallback: Called as fallback(expression, want, variables) to search the truth table
+            instead when the diagram grows past node_limit.
+
+    Raises:
+        ExpressionError: If the expression does not parse.
+        BDDTooLarge: If the diagram grows past node_limit and there is no fallback.
+    """
+    variables = _variables([expression], variables)
+    if len(variables) <= ENUMERATION_LIMIT:
+        return _enumerate(expression, variables, want)
+    bdd = BDD(variables, node_limit)
+    try:
+        return bdd.find_path(bdd.build(compile_expression(expression).tree), TRUE if want else FALSE)
+    except BDDTooLarge:
+        if fallback is None:
+            raise
+        return fallback(expression, want, variables)
+
+def check_tautology(expression, variables=None, node_limit=1000000, fallback=None):
+    """
+    Decides whether expression is True under every assignment.
+
+    Returns:
+        tuple: (True, None), or (False, counterexample assignment).
+    """
+    counterexample = find_assignment(expression, False, variables, node_limit, fallback)
+    return counterexample is None, counterexample
+
+def check_satisfiable(expression, variables=None, node_limit=1000000, fallback=None):
+    """
+    Decides whether expression is True under some assignment.
+
+    Returns:
+        tuple: (True, satisfying assignment), or (False, None).
+    """
+    assignment = find_assignment(expression, True, variables, node_limit, fallback)
+    return assignment is not None, assignment
+
+def check_equivalent(first, second, variables=None, node_limit=1000000, fallback=None):
+    """
+    Decides whether two expressions agree under every assignment.
+
+    Returns:
+        tuple: (True, None), or (False, an assignment under which they differ).
+    """
+    difference = find_assignment(f"({first}) xor ({second})", True, _variables([first, second], variables), node_limit, fallback)
+    return difference is None, difference
@@ -0,0 +1,221 @@
+# belief_store.py
+import argparse
+import datetime
+import os
+import pathlib
+import re
+import sqlite3
+import threading
+import ujson
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+# Names of the files the store replaces: <isoformat>_belief.txt from LogicTables.output_belief
+# and belief_<YYYYmmddHHMMSS>.json from SocraticReasoning.update_logic_tables
+BELIEF_TEXT_FILE = re.compile(r'^(?P<timestamp>.+)_belief\.txt$')
+BELIEF_JSON_FILE = re.compile(r'^belief_(?P<timestamp>\d{14})\.json$')
+
+def to_epoch(moment):
+    """
+    Returns seconds since the epoch for a datetime, an ISO 8601 string or a number.
+    """
+    if moment is None or isinstance(moment, (int, float)):
+        return moment
+    if isinstance(moment, str):
+        moment = datetime.datetime.fromisoformat(moment)
+    return moment.timestamp()
+
+class BeliefStore:
+    """
+    All beliefs in one SQLite file, indexed by time and, where SQLite has FTS5, by keyword.
+
+    Replaces one file per belief under ./memory/truth. Text beliefs are stored as they are;
+    other beliefs are stored as JSON and returned decoded.
+    """
+
+    def __init__(self, path='./memory/truth/beliefs.db'):
+        """
+        Opens or creates the store.
+
+        Args:
+            path: Location of the SQLite file.
+        """
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        # WAL with synchronous=NORMAL keeps a commit per belief cheap
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS beliefs ("
+            "id INTEGER PRIMARY KEY, timestamp REAL NOT NULL, source TEXT NOT NULL, "
+            "is_json INTEGER NOT NULL, content TEXT NOT NULL, origin TEXT UNIQUE)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS beliefs_timestamp ON beliefs (timestamp)")
+        try:
+            self.db.execute("CREATE VIRTUAL TABLE IF NOT EXISTS beliefs_text USING fts5(content, content='beliefs', content_rowid='id')")
+            self.fts = True
+        except sqlite3.OperationalError:  # SQLite built without FTS5: keywords fall back to LIKE
+            self.fts = False
+        self.db.commit()
+        self.stats = {'added': 0, 'queries': 0}
+
+    def _insert(self, content, source, timestamp, origin=None):
+        is_json = not isinstance(content, str)
+        text = ujson.dumps(content, ensure_ascii=False) if is_json else content
+        cursor = self.db.execute(
+            "INSERT OR IGNORE INTO beliefs (timestamp, source, is_json, content, origin) VALUES (?, ?, ?, ?, ?)",
+            (timestamp, source, int(is_json), text, origin)
+        )
+        if cursor.rowcount and self.fts:
+            self.db.execute("INSERT INTO beliefs_text (rowid, content) VALUES (?, ?)", (cursor.lastrowid, text))
+        return cursor.lastrowid if cursor.rowcount else None
+
+    def add(self, content, source='logic', timestamp=None):
+        """
+        Stores a belief.
+
+        Args:
+            content: The belief: text, or anything ujson can encode.
+            source: What produced the belief.
+            timestamp: When it was formed; defaults to now.
+
+        Returns:
+            int: The belief ID.
+        """
+        timestamp = to_epoch(timestamp) if timestamp is not None else datetime.datetime.now().timestamp()
+        with self.lock:
+            belief_id = self._insert(content, source, timestamp)
+            self.db.commit()
+            self.stats['added'] += 1
+        return belief_id
+
+    def query(self, since=None, until=None, keywords=(), source=None, limit=None):
+        """
+        Returns beliefs, oldest first.
+
+        Args:
+            since: Earliest timestamp, inclusive: datetime, ISO 8601 string or epoch seconds.
+            until: Latest timestamp, exclusive.
+            keywords: Words that must all occur in the belief.
+            source: Only beliefs from this source.
+            limit: Maximum number of beliefs.
+
+        Returns:
+            list: Dicts with id, timestamp (ISO 8601), source and content.
+        """
+        clauses, parameters = [], []
+        if since is not None:
+            clauses.append("timestamp >= ?")
+            parameters.append(to_epoch(since))
+        if until is not None:
+            clauses.append("timestamp < ?")
+            parameters.append(to_epoch(until))
+        if source is not None:
+            clauses.append("source = ?")
+            parameters.append(source)
+        keywords = [keywords] if isinstance(keywords, str) else list(keywords)
+        if keywords and self.fts:
+            clauses.append("id IN (SELECT rowid FROM beliefs_text WHERE beliefs_text MATCH ?)")
+            parameters.append(" ".join('"' + keyword.replace('"', '""') + '"' for keyword in keywords))
+        else:
+            for keyword in keywords:
+                clauses.append("content LIKE ? ESCAPE '\\'")
+                parameters.append('%' + re.sub(r'([%_\\])', r'\\\1', keyword) + '%')
+        sql = "SELECT id, timestamp, source, is_json, content FROM beliefs"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY timestamp, id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            parameters.append(limit)
+        with self.lock:
+            rows = self.db.execute(sql, parameters).fetchall()
+            self.stats['queries'] += 1
+        return [{
+            'id': belief_id,
+            'timestamp': datetime.datetime.fromtimestamp(timestamp).isoformat(),
+            'source': source,
+            'content': ujson.loads(content) if is_json else content,
+        } for belief_id, timestamp, source, is_json, content in rows]
+
+    def migrate(self, directory='./memory/truth', remove=True):
+        """
+        Moves the one-file-per-belief files of a directory into the store, in one transaction.
+        Each file is recorded by name, so running the migration again adds nothing twice.
+
+        Args:
+            directory: The directory holding *_belief.txt and belief_*.json files.
+            remove: Delete the files once they are committed to the store.
+
+        Returns:
+            int: The number of files migrated.
+        """
+        migrated = []
+        with self.lock:
+            for path in sorted(pathlib.Path(directory).iterdir()) if pathlib.Path(directory).is_dir() else []:
+                text_match = BELIEF_TEXT_FILE.match(path.name)
+                json_match = BELIEF_JSON_FILE.match(path.name)
+                if not path.is_file() or not (text_match or json_match):
+                    continue
+                try:
+                    if text_match:
+                        timestamp = datetime.datetime.fromisoformat(text_match['timestamp']).timestamp()
+                    else:
+                        timestamp = datetime.datetime.strptime(json_match['timestamp'], '%Y%m%d%H%M%S').timestamp()
+                except ValueError:
+                    timestamp = path.stat().st_mtime
+                content = path.read_text(encoding='utf-8')
+                if json_match:
+                    try:
+                        content = ujson.loads(content)
+                    except ValueError:
+                        pass  # kept as text
+                self._insert(content, 'logic' if text_match else 'socratic', timestamp, origin=str(path.resolve()))
+                migrated.append(path)
+            self.db.commit()
+        if remove:
+            for path in migrated:
+                path.unlink()
+        return len(migrated)
+
+    def count(self):
+        with self.lock:
+            return self.db.execute("SELECT COUNT(*) FROM beliefs").fetchone()[0]
+
+    def get_stats(self):
+        with self.lock:
+            stats = dict(self.stats)
+        stats['beliefs'] = self.count()
+        return stats
+
+    def close(self):
+        with self.lock:
+            if self.db is not None:
+                self.db.close()
+                self.db = None
+
+def open_belief_store(path='./memory/truth/beliefs.db'):
+    """
+    Returns the belief store for a path, shared by everything in the process.
+    """
+    key = os.path.abspath(path)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None or store.db is None:
+            store = _stores[key] = BeliefStore(path)
+        return store
+
+def main():
+    parser = argparse.ArgumentParser(description="Move *_belief.txt and belief_*.json files into the belief store.")
+    parser.add_argument('directory', nargs='?', default='./memory/truth')
+    parser.add_argument('--store', default='./memory/truth/beliefs.db')
+    parser.add_argument('--keep-files', action='store_true', help="leave the migrated files in place")
+    args = parser.parse_args()
+    migrated = BeliefStore(args.store).migrate(args.directory, remove=not args.keep_files)
+    print(f"Migrated {migrated} belief files into {args.store}")
+
+if __name__ == "__main__":
+    main()
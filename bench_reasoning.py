@@ -0,0 +1,121 @@
+# bench_reasoning.py
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from cassette import CassetteChatter
+from chatter import GPT4o
+from fakechatter import FakeChatter, FakeLLM
+from mock_llm_server import MockLLMServer
+
+PREMISES = ["All humans are mortal.", "Socrates is a human."]
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+def run(name, task, requests, workers, cassette=None):
+    """
+    Runs task() requests times on a pool of workers and prints throughput and latency percentiles.
+    Output printed by the task itself is discarded. With a cassette, the time spent outside the
+    provider (framework overhead) is printed as well.
+    """
+    latencies = []
+    provider_before = cassette.get_stats()['provider_seconds'] if cassette else 0.0
+
+    def timed(_):
+        started = time.perf_counter()
+        task()
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()), ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(timed, range(requests)))
+    elapsed = time.perf_counter() - started
+    print(f"{name:<28} {requests / elapsed:8.1f} req/s  "
+          f"p50 {percentile(latencies, 50) * 1000:7.1f} ms  p99 {percentile(latencies, 99) * 1000:7.1f} ms")
+    if cassette:
+        provider = cassette.get_stats()['provider_seconds'] - provider_before
+        overhead = max(0.0, sum(latencies) - provider)
+        print(f"{'':<28} provider {provider:8.3f} s  framework overhead {overhead:8.3f} s "
+              f"({overhead / requests * 1000:.2f} ms/request)")
+
+def socratic_task(chatter):
+    from SocraticReasoning import SocraticReasoning
+
+    def task():
+        reasoner = SocraticReasoning(chatter)
+        reasoner.memo = None  # every task asks the same question; measure the reasoning, not the memo
+        for premise in PREMISES:
+            reasoner.add_premise(premise)
+        reasoner.draw_conclusion()
+    return task
+
+def reasoning_task(chatter):
+    from reasoning import Reasoning
+
+    def task():
+        reasoner = Reasoning(chatter)
+        for premise in PREMISES:
+            reasoner.add_premise(premise)
+        reasoner.draw_conclusion()
+    return task
+
+def agi_task(chatter):
+    from easyAGI import AGI
+    with contextlib.redirect_stdout(io.StringIO()):
+        agi = AGI(chatter, use_cache=False)  # APIManager prints debug output; cached answers would skip the model
+
+    def task():
+        agi.make_decisions(" ".join(PREMISES))
+    return task
+
+def dreamer_task(server):
+    from machinedream import MachineDreamer
+    dreamer = MachineDreamer(['Data Point A', 'Experience B', 'Idea C', 'Observation D'],
+                             api_key='mock', api_url=server.language_model_url)
+    return dreamer.dream
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the reasoning paths against a fake LLM.")
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--latency', type=float, default=0.2, help="median model latency in seconds")
+    parser.add_argument('--sigma', type=float, default=0.5, help="lognormal latency spread")
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--http', action='store_true', help="go through the mock HTTP server instead of FakeChatter")
+    parser.add_argument('--record', metavar='CASSETTE', help="record every chatter interaction to a cassette file")
+    parser.add_argument('--replay', metavar='CASSETTE', help="serve chatter responses from a recorded cassette")
+    parser.add_argument('--realtime', action='store_true', help="replay with the recorded latencies")
+    args = parser.parse_args()
+    cassette_path = os.path.abspath(args.replay or args.record) if args.replay or args.record else None
+
+    # Everything the reasoners persist under ./memory goes to a scratch directory, not the working tree
+    with tempfile.TemporaryDirectory() as workdir:
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            bench(args, cassette_path)
+        finally:
+            os.chdir(cwd)
+
+def bench(args, cassette_path):
+    llm = FakeLLM(latency='lognormal', latency_params=(args.latency, args.sigma), error_rate=args.error_rate)
+    with MockLLMServer(llm=llm) as server:
+        chatter = GPT4o('mock', base_url=server.base_url, max_retries=0) if args.http else FakeChatter(llm)
+        cassette = None
+        if args.replay:
+            chatter = cassette = CassetteChatter(None, cassette_path, mode='replay', realtime=args.realtime)
+        elif args.record:
+            chatter = cassette = CassetteChatter(chatter, cassette_path, mode='record')
+        run("SocraticReasoning", socratic_task(chatter), args.requests, args.workers, cassette)
+        run("Reasoning", reasoning_task(chatter), args.requests, args.workers, cassette)
+        run("AGI.make_decisions", agi_task(chatter), args.requests, args.workers, cassette)
+        run("MachineDreamer.dream", dreamer_task(server), args.requests, args.workers)
+    print(f"model requests: {llm.stats['requests']}, injected errors: {llm.stats['errors']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# bench_truth_table.py
+import argparse
+import itertools
+import time
+from expression import compile_expression
+from truth_table import build_table
+
+EXPRESSIONS = [
+    'A and B',
+    'A or B',
+    'not A',
+    'A xor B',
+    'A nand B',
+    'A nor B',
+    'A implication B',
+    '(A and B) or (C xor D) implication not E',
+]
+
+def row_table(variables, expressions):
+    """
+    The row-at-a-time path: one dict per row, each expression evaluated per row.
+    """
+    compiled = [compile_expression(expression) for expression in expressions]
+    table = []
+    for combo in itertools.product([True, False], repeat=len(variables)):
+        values = dict(zip(variables, combo))
+        row = values.copy()
+        for expression, function in zip(expressions, compiled):
+            row[expression] = function(values)
+        table.append(row)
+    return table
+
+def timed(task, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        task()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark row-wise against vectorized truth tables.")
+    parser.add_argument('--variables', type=int, nargs='+', default=[8, 12, 16, 20])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--row-limit', type=int, default=18, help="largest variable count for the row-wise path")
+    args = parser.parse_args()
+
+    print(f"{'variables':>9} {'rows':>10} {'row-wise':>12} {'vectorized':>12} {'speedup':>8}")
+    for n in args.variables:
+        variables = [chr(ord('A') + index) if index < 26 else f"V{index}" for index in range(n)]
+        vectorized = timed(lambda: build_table(variables, EXPRESSIONS), args.repeat)
+        if n <= args.row_limit:
+            row_wise = timed(lambda: row_table(variables, EXPRESSIONS), 1)
+            print(f"{n:>9} {2 ** n:>10} {row_wise * 1000:>10.1f}ms {vectorized * 1000:>10.1f}ms {row_wise / vectorized:>7.0f}x")
+        else:
+            print(f"{n:>9} {2 ** n:>10} {'-':>12} {vectorized * 1000:>10.1f}ms {'':>8}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+# cassette.py
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+import ujson
+from chatter import ChatterWrapper, run_on_loop
+
+class CassetteMiss(Exception):
+    """
+    Raised in replay mode when the cassette holds no response for a request.
+    """
+
+class ReplayedError(Exception):
+    """
+    Raised in replay mode for a request whose recording ended in an error.
+    """
+
+class CassetteChatter(ChatterWrapper):
+    """
+    Records chatter interactions to an append-only JSONL cassette, or replays them.
+
+    In 'record' mode every request is passed to the wrapped chatter and one line is appended with
+    the response and its latency (and chunk timings for streams). In 'replay' mode responses are
+    served from the cassette, either at full speed or, with realtime=True, with the recorded
+    latencies, so reasoning runs become reproducible and framework overhead can be measured
+    apart from provider latency. Identical requests are replayed in the order they were recorded.
+    """
+
+    def __init__(self, chatter=None, path='./memory/cassettes/session.jsonl', mode='record', realtime=False, store_prompts=False):
+        """
+        Initializes the cassette.
+
+        Args:
+            chatter: The chatter to record; may be None in replay mode.
+            path: The cassette file.
+            mode: 'record' or 'replay'.
+            realtime: In replay mode, wait for the recorded latency before answering.
+            store_prompts: Also store the prompt text, for inspecting a cassette by hand.
+        """
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        if mode == 'record' and chatter is None:
+            raise ValueError("Recording needs a chatter to record.")
+        super().__init__(chatter)
+        self.path = path
+        self.mode = mode
+        self.realtime = realtime
+        self.store_prompts = store_prompts
+        self.lock = threading.Lock()
+        self.tapes = defaultdict(deque)  # key -> recorded entries not yet replayed
+        self.last = {}  # key -> last entry, replayed again once the tape runs out
+        self.recorded = {}
+        self.stats = {'recorded': 0, 'replayed': 0, 'misses': 0, 'provider_seconds': 0.0}
+        self.file = None
+
+        if mode == 'replay':
+            self.load()
+        else:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            self.file = open(path, 'a', encoding='utf-8')
+
+    @property
+    def provider(self):
+        if self.chatter is not None:
+            return self.chatter.provider
+        return self.recorded.get('provider', 'cassette')
+
+    @property
+    def default_model(self):
+        if self.chatter is not None:
+            return self.chatter.default_model
+        return self.recorded.get('model')
+
+    @property
+    def api_errors(self):
+        return (CassetteMiss, ReplayedError) + (tuple(self.chatter.api_errors) if self.chatter is not None else ())
+
+    def build_messages(self, knowledge):
+        if self.chatter is not None:
+            return self.chatter.build_messages(knowledge)
+        return super(ChatterWrapper, self).build_messages(knowledge)
+
+    def request_key(self, knowledge, model=None):
+        # Independent of the wrapped chatter so a cassette can be replayed without one
+        payload = ujson.dumps([model, knowledge], sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def load(self):
+        """
+        Reads the cassette into per-request tapes.
+        """
+        with open(self.path, 'r', encoding='utf-8') as file:
+            for line in file:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = ujson.loads(line)
+                except ValueError:
+                    logging.warning(f"cassette {self.path}: skipping unreadable line")
+                    continue
+                self.tapes[entry['key']].append(entry)
+                self.recorded.setdefault('provider', entry.get('provider'))
+                self.recorded.setdefault('model', entry.get('model'))
+
+    def _write(self, entry):
+        with self.lock:
+            self.file.write(ujson.dumps(entry, ensure_ascii=False) + "\n")
+            self.file.flush()
+            self.stats['recorded'] += 1
+
+    def _entry(self, key, knowledge, model, started):
+        entry = {
+            'key': key,
+            'provider': self.provider,
+            'model': model or self.default_model,
+            'time': started,
+        }
+        if self.store_prompts:
+            entry['prompt'] = knowledge
+        return entry
+
+    def _next(self, key):
+        with self.lock:
+            tape = self.tapes.get(key)
+            if tape:
+                self.last[key] = tape.popleft()
+            entry = self.last.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                raise CassetteMiss(f"no recorded response for request {key[:12]}")
+            self.stats['replayed'] += 1
+            if self.realtime:
+                self.stats['provider_seconds'] += entry['latency']
+            return entry
+
+    async def acomplete(self, knowledge, model=None, **options):
+        return await run_on_loop(self._acomplete(knowledge, model, **options))
+
+    async def _acomplete(self, knowledge, model=None, **options):
+        key = self.request_key(knowledge, model)
+        if self.mode == 'replay':
+            entry = self._next(key)
+            if self.realtime:
+                await asyncio.sleep(entry['latency'])
+            if 'error' in entry:
+                raise ReplayedError(entry['error'])
+            return entry['response'] if 'response' in entry else "".join(text for _, text in entry['chunks'])
+
+        entry = self._entry(key, knowledge, model, time.time())
+        started = time.monotonic()
+        try:
+            response = await self.chatter.acomplete(knowledge, model, **options)
+        except Exception as e:
+            entry.update(latency=round(time.monotonic() - started, 6), error=f"{type(e).__name__}: {e}")
+            self._write(entry)
+            raise
+        entry.update(latency=round(time.monotonic() - started, 6), response=response)
+        self.stats['provider_seconds'] += entry['latency']
+        self._write(entry)
+        return response
+
+    async def astream(self, knowledge, model=None, **options):
+        key = self.request_key(knowledge, model)
+        if self.mode == 'replay':
+            entry = self._next(key)
+            if 'error' in entry:
+                if self.realtime:
+                    await asyncio.sleep(entry['latency'])
+                raise ReplayedError(entry['error'])
+            chunks = entry.get('chunks') or [[entry['latency'], entry['response']]]
+            elapsed = 0.0
+            for offset, text in chunks:
+                if self.realtime and offset > elapsed:
+                    await asyncio.sleep(offset - elapsed)
+                    elapsed = offset
+                yield text
+            return
+
+        entry = self._entry(key, knowledge, model, time.time())
+        started = time.monotonic()
+        chunks = []
+        try:
+            async for text in self.chatter.astream(knowledge, model, **options):
+                chunks.append([round(time.monotonic() - started, 6), text])
+                yield text
+        except Exception as e:
+            entry.update(latency=round(time.monotonic() - started, 6), error=f"{type(e).__name__}: {e}")
+            self._write(entry)
+            raise
+        entry.update(latency=round(time.monotonic() - started, 6), chunks=chunks)
+        self.stats['provider_seconds'] += entry['latency']
+        self._write(entry)
+
+    def get_stats(self):
+        """
+        Returns record/replay counters and the time spent waiting on the provider, which is
+        zero when replaying at full speed.
+        """
+        stats = dict(self.stats)
+        stats['provider_seconds'] = round(stats['provider_seconds'], 6)
+        return stats
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
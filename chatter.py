@@ -1,70 +1,430 @@
 # chatter.py
-import openai
-from groq import Groq
+import abc
+import asyncio
+import hashlib
 import logging
+import threading
+import httpx
+import openai
+import ujson
+from openai import AsyncOpenAI
+from groq import AsyncGroq
 
-class GPT4o:
-    def __init__(self, openai_api_key):
-        self.openai_api_key = openai_api_key
-        openai.api_key = self.openai_api_key
+# Connection pool shared by every chatter talking to the same provider
+POOL_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=30.0)
+POOL_TIMEOUT = httpx.Timeout(60.0, connect=10.0)
+
+# Maximum number of requests in flight per provider
+CONCURRENCY_LIMITS = {'openai': 8, 'groq': 8, 'ollama': 2}
+DEFAULT_CONCURRENCY = 4
+
+# Every failed generate_response returns a message starting with this prefix
+ERROR_PREFIX = "error: unable to generate a response"
+
+_loop = None
+_loop_lock = threading.Lock()
+_pools = {}
+_semaphores = {}
+
+def get_event_loop():
+    """
+    Returns the background event loop that runs every chatter request, starting it on first use.
+    Keeping a single loop lets the pooled connections stay alive between calls.
+    """
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=_loop.run_forever, name='chatter-loop', daemon=True)
+            thread.start()
+    return _loop
+
+def _current_loop():
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+def run_sync(coro, timeout=None):
+    """
+    Runs a coroutine on the chatter loop and blocks until it completes.
+
+    Args:
+        coro: The coroutine to run.
+        timeout: Optional number of seconds to wait for the result.
+
+    Returns:
+        The result of the coroutine.
+    """
+    loop = get_event_loop()
+    if _current_loop() is loop:
+        coro.close()
+        raise RuntimeError("run_sync() cannot be called from the chatter event loop; await the coroutine instead.")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result(timeout)
+
+async def run_on_loop(coro):
+    """
+    Awaits a coroutine on the chatter loop from any event loop.
+
+    Args:
+        coro: The coroutine to run.
+
+    Returns:
+        The result of the coroutine.
+    """
+    loop = get_event_loop()
+    if _current_loop() is loop:
+        return await coro
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+async def _anext(agen):
+    try:
+        return False, await agen.__anext__()
+    except StopAsyncIteration:
+        return True, None
+
+async def iterate_on_loop(agen):
+    """
+    Iterates an async generator on the chatter loop from any event loop.
+
+    Args:
+        agen: The async generator to drive.
+
+    Yields:
+        The items produced by the generator.
+    """
+    try:
+        while True:
+            done, item = await run_on_loop(_anext(agen))
+            if done:
+                return
+            yield item
+    finally:
+        await run_on_loop(agen.aclose())
+
+def iterate_sync(agen):
+    """
+    Iterates an async generator on the chatter loop from synchronous code.
+
+    Args:
+        agen: The async generator to drive.
+
+    Yields:
+        The items produced by the generator.
+    """
+    try:
+        while True:
+            done, item = run_sync(_anext(agen))
+            if done:
+                return
+            yield item
+    finally:
+        run_sync(agen.aclose())
 
-    def generate_response(self, knowledge, model="gpt-4o"):
-        prompt = f"{knowledge}"
+def is_error_response(response):
+    """
+    Returns True if a response is the error message of a failed generate_response call.
+    """
+    return isinstance(response, str) and response.startswith(ERROR_PREFIX)
+
+def get_http_pool(provider):
+    """
+    Returns the keep-alive HTTP client for a provider. Must be called on the chatter loop.
+    """
+    if provider not in _pools:
+        _pools[provider] = httpx.AsyncClient(limits=POOL_LIMITS, timeout=POOL_TIMEOUT)
+    return _pools[provider]
+
+def get_semaphore(provider):
+    """
+    Returns the semaphore bounding concurrent requests to a provider. Must be called on the chatter loop.
+    """
+    if provider not in _semaphores:
+        _semaphores[provider] = asyncio.Semaphore(CONCURRENCY_LIMITS.get(provider, DEFAULT_CONCURRENCY))
+    return _semaphores[provider]
+
+class IncrementalLower:
+    """
+    Lowercases streamed text chunk by chunk with the same result as lowercasing the joined text.
+
+    str.lower() is context sensitive only for the Greek capital sigma, which becomes a final
+    sigma at the end of a word, so a trailing sigma is held back until the next chunk shows
+    whether the word continues.
+    """
+    CONTEXT_SIZE = 8
+
+    def __init__(self):
+        self.context = ''  # tail of the text already emitted
+        self.pending = ''  # text held back from the previous chunk
+
+    def feed(self, chunk):
+        text = self.pending + chunk
+        cut = len(text)
+        sigma = text.rfind('\u03a3')
+        if sigma != -1 and not any(self._is_cased(c) for c in text[sigma + 1:]):
+            cut = sigma
+        emit, self.pending = text[:cut], text[cut:]
+        return self._lower(emit, self.pending)
+
+    def flush(self):
+        emit, self.pending = self.pending, ''
+        return self._lower(emit, '')
+
+    def _lower(self, text, lookahead):
+        if not text:
+            return ''
+        # Per-character lowercase lengths do not depend on context, so the slice is exact
+        lowered = (self.context + text + lookahead).lower()
+        start = len(self.context.lower())
+        result = lowered[start:len(lowered) - len(lookahead.lower())]
+        self.context = (self.context + text)[-self.CONTEXT_SIZE:]
+        return result
+
+    @staticmethod
+    def _is_cased(c):
+        return c.islower() or c.isupper() or c.istitle()
+
+class Chatter(abc.ABC):
+    """
+    Base class for chat model backends.
+
+    Subclasses implement acomplete(), which returns the raw completion text and raises on failure,
+    and optionally astream(), which yields the raw text as it arrives. agenerate_response(),
+    generate_response() and the stream_response() variants add the lowercasing and error handling.
+    """
+    provider = None
+    default_model = None
+    api_errors = (Exception,)
+
+    def build_messages(self, knowledge):
+        if isinstance(knowledge, list):
+            return knowledge  # already a conversation, e.g. from PromptState.messages()
+        return [
+            {"role": "system", "content": ""},
+            {"role": "user", "content": f"{knowledge}"}
+        ]
+
+    def request_key(self, knowledge, model=None):
+        """
+        Returns a stable key for a request, built from the provider, the model and the
+        whitespace-normalized messages.
+
+        Args:
+            knowledge: The prompt or list of messages passed to generate_response.
+            model: The model name, or None for the default model.
+
+        Returns:
+            str: A hex digest identifying the request.
+        """
+        messages = [
+            {"role": message["role"], "content": " ".join(str(message["content"]).split())}
+            for message in self.build_messages(knowledge)
+        ]
+        payload = ujson.dumps([self.provider, model or self.default_model, messages], sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    @abc.abstractmethod
+    async def acomplete(self, knowledge, model=None, **options):
+        """
+        Returns the raw completion text for knowledge; raises one of api_errors on failure.
+        """
+
+    async def agenerate_response(self, knowledge, model=None, **options):
         try:
-            response = openai.chat.completions.create(
-                model=model,
-                messages=[
-                    {"role": "system", "content": ""},
-                    {"role": "user", "content": prompt}
-                ]
-            )
-            decision = response.choices[0].message.content
+            decision = await run_on_loop(self.acomplete(knowledge, model, **options))
             return decision.lower()
-        except openai.APIError as e:
-            logging.error(f"openai api error: {e}")
-            return "error: unable to generate a response due to an issue with the openai api."
+        except self.api_errors as e:
+            logging.error(f"{self.provider} api error: {e}")
+            return f"{ERROR_PREFIX} due to an issue with the {self.provider} api."
 
-class GroqModel:
-    def __init__(self, groq_api_key):
-        self.client = Groq(api_key=groq_api_key)
+    def generate_response(self, knowledge, model=None, **options):
+        return run_sync(self.agenerate_response(knowledge, model, **options))
 
-    def generate_response(self, knowledge, model="mixtral-8x7b-32768"):
-        prompt = f"{knowledge}"
+    async def astream(self, knowledge, model=None, **options):
+        # Backends without native streaming deliver the whole completion as one chunk
+        yield await self.acomplete(knowledge, model, **options)
+
+    async def astream_response(self, knowledge, model=None, **options):
+        lower = IncrementalLower()
         try:
-            chat_completion = self.client.chat.completions.create(
-                messages=[
-                    {"role": "system", "content": ""},
-                    {"role": "user", "content": prompt}
-                ],
-                model=model,
+            async for chunk in iterate_on_loop(self.astream(knowledge, model, **options)):
+                text = lower.feed(chunk)
+                if text:
+                    yield text
+            tail = lower.flush()
+            if tail:
+                yield tail
+        except self.api_errors as e:
+            logging.error(f"{self.provider} api error: {e}")
+            yield f"{ERROR_PREFIX} due to an issue with the {self.provider} api."
+
+    def stream_response(self, knowledge, model=None, **options):
+        """
+        Yields the lowercased response in chunks as the provider produces them.
+
+        Args:
+            knowledge: The prompt to send.
+            model: The model name, or None for the default model.
+        """
+        yield from iterate_sync(self.astream_response(knowledge, model, **options))
+
+class ChatterWrapper(Chatter):
+    """
+    Base class for layers that wrap another chatter (caching, routing, rate limiting).
+    Provider details and request keys are taken from the wrapped chatter.
+    """
+    def __init__(self, chatter):
+        self.chatter = chatter
+
+    @property
+    def provider(self):
+        return self.chatter.provider
+
+    @property
+    def default_model(self):
+        return self.chatter.default_model
+
+    @property
+    def api_errors(self):
+        return self.chatter.api_errors
+
+    def build_messages(self, knowledge):
+        return self.chatter.build_messages(knowledge)
+
+    def request_key(self, knowledge, model=None):
+        return self.chatter.request_key(knowledge, model)
+
+    async def acomplete(self, knowledge, model=None, **options):
+        return await self.chatter.acomplete(knowledge, model, **options)
+
+    async def astream(self, knowledge, model=None, **options):
+        async for chunk in self.chatter.astream(knowledge, model, **options):
+            yield chunk
+
+class GPT4o(Chatter):
+    provider = 'openai'
+    default_model = 'gpt-4o'
+    api_errors = (openai.APIError,)
+
+    def __init__(self, openai_api_key, base_url=None, max_retries=2):
+        self.openai_api_key = openai_api_key
+        self.base_url = base_url
+        self.max_retries = max_retries  # retries done by the SDK itself
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = AsyncOpenAI(
+                api_key=self.openai_api_key,
+                base_url=self.base_url,
+                max_retries=self.max_retries,
+                http_client=get_http_pool(self.provider),
             )
-            decision = chat_completion.choices[0].message.content
-            return decision.lower()
-        except Exception as e:
-            logging.error(f"groq api error: {e}")
-            return "error: unable to generate a response due to an issue with the groq api."
+        return self._client
 
-class OllamaModel:
-    def __init__(self):
-        self.client = OpenAI(
-            base_url='http://localhost:11434/v1',
-            api_key='ollama',  # required, but unused
-        )
+    async def acomplete(self, knowledge, model=None, **options):
+        async with get_semaphore(self.provider):
+            response = await self.client.chat.completions.create(
+                model=model or self.default_model,
+                messages=self.build_messages(knowledge)
+            )
+        return response.choices[0].message.content
+
+    async def astream(self, knowledge, model=None, **options):
+        async with get_semaphore(self.provider):
+            stream = await self.client.chat.completions.create(
+                model=model or self.default_model,
+                messages=self.build_messages(knowledge),
+                stream=True
+            )
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+
+class GroqModel(Chatter):
+    provider = 'groq'
+    default_model = 'mixtral-8x7b-32768'
+
+    def __init__(self, groq_api_key, max_retries=2):
+        self.groq_api_key = groq_api_key
+        self.max_retries = max_retries  # retries done by the SDK itself
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = AsyncGroq(
+                api_key=self.groq_api_key,
+                max_retries=self.max_retries,
+                http_client=get_http_pool(self.provider),
+            )
+        return self._client
+
+    async def acomplete(self, knowledge, model=None, **options):
+        async with get_semaphore(self.provider):
+            chat_completion = await self.client.chat.completions.create(
+                messages=self.build_messages(knowledge),
+                model=model or self.default_model,
+            )
+        return chat_completion.choices[0].message.content
+
+    async def astream(self, knowledge, model=None, **options):
+        async with get_semaphore(self.provider):
+            stream = await self.client.chat.completions.create(
+                messages=self.build_messages(knowledge),
+                model=model or self.default_model,
+                stream=True,
+            )
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+
+class OllamaModel(Chatter):
+    provider = 'ollama'
+    default_model = 'llama2'
+
+    def __init__(self, base_url='http://localhost:11434/v1', max_retries=2):
+        self.base_url = base_url
+        self.max_retries = max_retries  # retries done by the SDK itself
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = AsyncOpenAI(
+                base_url=self.base_url,
+                api_key='ollama',  # required, but unused
+                max_retries=self.max_retries,
+                http_client=get_http_pool(self.provider),
+            )
+        return self._client
 
-    def generate_response(self, knowledge, model="llama2"):
-        prompt = [
+    def build_messages(self, knowledge):
+        if isinstance(knowledge, list):
+            return knowledge
+        return [
             {"role": "system", "content": ""},
             {"role": "assistant", "content": ""},
             {"role": "tool", "content": ""},
             {"role": "user", "content": f"{knowledge}"}
         ]
-        try:
-            response = self.client.chat.completions.create(
-                model=model,
-                messages=prompt
+
+    async def acomplete(self, knowledge, model=None, **options):
+        async with get_semaphore(self.provider):
+            response = await self.client.chat.completions.create(
+                model=model or self.default_model,
+                messages=self.build_messages(knowledge)
             )
-            decision = response.choices[0].message.content
-            return decision.lower()
-        except Exception as e:
-            logging.error(f"ollama api error: {e}")
-            return "error: unable to generate a response due to an issue with the ollama api."
+        return response.choices[0].message.content
+
+    async def astream(self, knowledge, model=None, **options):
+        async with get_semaphore(self.provider):
+            stream = await self.client.chat.completions.create(
+                model=model or self.default_model,
+                messages=self.build_messages(knowledge),
+                stream=True
+            )
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
@@ -0,0 +1,142 @@
+# conclusion_memo.py
+import hashlib
+import os
+import threading
+import ujson
+from journal import open_journal
+from premise_store import normalize
+
+_memos = {}
+_memos_lock = threading.Lock()
+
+def apply_memo_record(state, record):
+    """
+    Applies a memo record to the memo state: 'put' stores an entry under its key and 'drop'
+    removes keys.
+    """
+    if record['op'] == 'put':
+        state[record['key']] = record['entry']
+    elif record['op'] == 'drop':
+        for key in record['keys']:
+            state.pop(key, None)
+    return state
+
+def premise_set_key(premises, scope=None):
+    """
+    Returns the canonical hash of a premise set: the same for any order, case or spacing of the
+    same premises. A scope, such as the provider and model that drew the conclusion, keeps the
+    keys of different scopes apart.
+    """
+    canonical = sorted({normalize(premise) for premise in premises})
+    if scope is not None:
+        canonical = [scope, canonical]
+    return hashlib.sha256(ujson.dumps(canonical, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+class ConclusionMemo:
+    """
+    Remembers the conclusion drawn for each premise set, so asking again costs no model calls.
+
+    Entries are keyed by premise_set_key, scoped to the model that drew them, and hold the
+    generated premises and the conclusion.
+    They are persisted in a journal and survive restarts. Challenging a premise drops every
+    entry whose premises, given or generated, include it.
+    """
+
+    def __init__(self, path='./memory/logs/conclusion_memo.jsonl'):
+        """
+        Opens the memo, loading its entries from the journal.
+
+        Args:
+            path: The memo journal file.
+        """
+        self.journal = open_journal(path, apply=apply_memo_record, initial=dict)
+        self.lock = threading.Lock()
+        self.entries = self.journal.load()
+        self.by_premise = {}  # normalized premise -> keys of the entries that use it
+        for key, entry in self.entries.items():
+            self._index(key, entry)
+        self.stats = {'hits': 0, 'misses': 0, 'stores': 0, 'invalidations': 0}
+
+    def _index(self, key, entry):
+        for premise in entry['premises'] + entry['generated']:
+            self.by_premise.setdefault(normalize(premise), set()).add(key)
+
+    def get(self, premises, scope=None):
+        """
+        Returns the memoized entry for a premise set, or None.
+
+        Args:
+            premises: The premises as given, before any were generated.
+            scope: The scope the entry was stored under, e.g. "provider/model".
+
+        Returns:
+            dict: premises, generated and conclusion, or None.
+        """
+        key = premise_set_key(premises, scope)
+        with self.lock:
+            entry = self.entries.get(key)
+            self.stats['hits' if entry is not None else 'misses'] += 1
+            return entry
+
+    def put(self, premises, generated, conclusion, scope=None):
+        """
+        Memoizes the conclusion drawn for a premise set.
+
+        Args:
+            premises: The premises as given.
+            generated: The premises generated on the way to the conclusion.
+            conclusion: The conclusion.
+            scope: The scope to store the entry under, e.g. "provider/model".
+        """
+        key = premise_set_key(premises, scope)
+        entry = {'premises': list(premises), 'generated': list(generated), 'conclusion': conclusion}
+        with self.lock:
+            self.entries[key] = entry
+            self._index(key, entry)
+            self.stats['stores'] += 1
+        self.journal.append({'op': 'put', 'key': key, 'entry': entry})
+
+    def invalidate(self, premise):
+        """
+        Drops every entry that uses a premise.
+
+        Args:
+            premise: The challenged premise.
+
+        Returns:
+            int: The number of entries dropped.
+        """
+        with self.lock:
+            keys = self.by_premise.pop(normalize(premise), set())
+            for key in keys:
+                entry = self.entries.pop(key, None)
+                if entry is None:
+                    continue
+                for other in entry['premises'] + entry['generated']:
+                    keys_of_other = self.by_premise.get(normalize(other))
+                    if keys_of_other is not None:
+                        keys_of_other.discard(key)
+                        if not keys_of_other:
+                            del self.by_premise[normalize(other)]
+            self.stats['invalidations'] += len(keys)
+        if keys:
+            self.journal.append({'op': 'drop', 'keys': sorted(keys)})
+        return len(keys)
+
+    def get_stats(self):
+        with self.lock:
+            stats = dict(self.stats, entries=len(self.entries))
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        return stats
+
+def open_memo(path='./memory/logs/conclusion_memo.jsonl'):
+    """
+    Returns the conclusion memo for a path, shared by every reasoner in the process.
+    """
+    key = os.path.abspath(path)
+    with _memos_lock:
+        memo = _memos.get(key)
+        if memo is None or memo.journal.closed:
+            memo = _memos[key] = ConclusionMemo(path)
+        return memo
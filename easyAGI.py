@@ -8,29 +8,43 @@ from reasoning import Reasoning
 from self_healing import SelfHealingSystem
 from memory import save_conversation_memory, load_conversation_memory, delete_conversation_memory
 from chatter import GPT4o, GroqModel, OllamaModel
+from response_cache import CachedChatter
+from singleflight import SingleFlightChatter
+from router import RouterChatter
+from ratelimit import RateLimitedChatter
 
 class AGI:
-    def __init__(self):
+    def __init__(self, chatter=None, use_cache=True):
         # Initialize API Manager
         self.api_manager = APIManager()
-        self.manage_api_keys()
+        if chatter is None:
+            self.manage_api_keys()
         
         self.openai_api_key = self.api_manager.get_api_key('openai')
         self.groq_api_key = self.api_manager.get_api_key('groq')
         self.ollama_api_key = 'ollama'  # Ollama doesn't require an actual API key, just the identifier
 
-        if self.openai_api_key and self.groq_api_key and self.ollama_api_key:
+        if chatter is not None:
+            # A chatter passed in (e.g. fakechatter.FakeChatter for offline runs) skips provider selection
+            self.chatter = chatter
+        elif self.openai_api_key and self.groq_api_key and self.ollama_api_key:
             self.chatter = self.select_provider()
         elif self.openai_api_key:
             print(f"DEBUG: Using OpenAI API key: {self.openai_api_key}")  # Debug statement
-            self.chatter = GPT4o(self.openai_api_key)
+            self.chatter = self.connect(GPT4o(self.openai_api_key, max_retries=0))
         elif self.groq_api_key:
-            self.chatter = GroqModel(self.groq_api_key)
+            self.chatter = self.connect(GroqModel(self.groq_api_key, max_retries=0))
         elif self.ollama_api_key:
-            self.chatter = OllamaModel()
+            self.chatter = self.connect(OllamaModel(max_retries=0))
         else:
             print("No API key found for OpenAI, Groq, or Ollama.")
             self.manage_api_keys()
+
+        # Share one upstream call between identical prompts that are in flight together and, unless
+        # use_cache is False, serve repeated prompts from the response cache in ./memory/cache
+        self.chatter = SingleFlightChatter(self.chatter)
+        if use_cache:
+            self.chatter = CachedChatter(self.chatter)
         
         # Initialize other components
         self.bdi_model = BDIModel()
@@ -62,15 +76,33 @@ class AGI:
 
     def select_provider(self):
         while True:
-            choice = input("Multiple API keys found. Select the provider (1 for OpenAI, 2 for Groq, 3 for Ollama): ").strip()
+            choice = input("Multiple API keys found. Select the provider (1 for OpenAI, 2 for Groq, 3 for Ollama, 4 for automatic routing): ").strip()
             if choice == '1':
-                return GPT4o(self.openai_api_key)
+                return self.connect(GPT4o(self.openai_api_key, max_retries=0))
             elif choice == '2':
-                return GroqModel(self.groq_api_key)
+                return self.connect(GroqModel(self.groq_api_key, max_retries=0))
             elif choice == '3':
-                return OllamaModel()
+                return self.connect(OllamaModel(max_retries=0))
+            elif choice == '4':
+                return self.build_router()
             else:
-                print("Invalid choice. Please select 1 for OpenAI, 2 for Groq, or 3 for Ollama.")
+                print("Invalid choice. Please select 1 for OpenAI, 2 for Groq, 3 for Ollama, or 4 for automatic routing.")
+
+    def connect(self, chatter):
+        # Rate limit each provider and retry throttled or failed calls with backoff;
+        # the SDK's own retries are turned off so the two do not stack
+        return RateLimitedChatter(chatter)
+
+    def build_router(self):
+        # Route between every configured provider, preferring the fastest healthy one
+        backends = []
+        if self.openai_api_key:
+            backends.append(self.connect(GPT4o(self.openai_api_key, max_retries=0)))
+        if self.groq_api_key:
+            backends.append(self.connect(GroqModel(self.groq_api_key, max_retries=0)))
+        if self.ollama_api_key:
+            backends.append(self.connect(OllamaModel(max_retries=0)))
+        return RouterChatter(backends)
 
     def perceive_environment(self):
         # This method should gather data from the environment
@@ -89,7 +121,7 @@ class AGI:
         
         self.logic_tables.add_variable('Belief')
         self.logic_tables.add_expression('True')  # Simplified example
-        truth_table = self.logic_tables.generate_truth_table()
+        truth_table = self.logic_tables.iter_truth_table()
         
         # Display truth table
         for row in truth_table:
@@ -103,14 +135,27 @@ class AGI:
         
         return data
     
-    def make_decisions(self, knowledge):
+    def make_decisions(self, knowledge, stream=False):
         # This method should make decisions based on the learned knowledge
+        # With stream=True the decision is returned as an iterator of text chunks
+        if stream:
+            return self.chatter.stream_response(knowledge)
         decision = self.chatter.generate_response(knowledge)
         return decision
     
     def communicate_response(self, decisions):
         # This method should communicate the decision made
-        print(f"\nSolution:\n{decisions}\n")
+        # Streamed decisions are printed chunk by chunk as they arrive
+        if isinstance(decisions, str):
+            print(f"\nSolution:\n{decisions}\n")
+            return decisions
+        print("\nSolution:")
+        chunks = []
+        for chunk in decisions:
+            print(chunk, end="", flush=True)
+            chunks.append(chunk)
+        print("\n")
+        return "".join(chunks)
     
     def main_loop(self):
         # Main loop to continuously perceive, learn, decide, and communicate
@@ -122,8 +167,8 @@ class AGI:
                 break
 
             learned_knowledge = self.learn_from_data(environment_data)
-            decisions = self.make_decisions(learned_knowledge)
-            self.communicate_response(decisions)
+            decisions = self.make_decisions(learned_knowledge, stream=True)
+            decisions = self.communicate_response(decisions)
 
             # Save the dialogue to memory
             conversation_memory.append((environment_data, decisions))
@@ -89,7 +89,7 @@ class AGI:
         
         self.logic_tables.add_variable('Belief')
         self.logic_tables.add_expression('True')  # Simplified example
-        truth_table = self.logic_tables.generate_truth_table()
+        truth_table = self.logic_tables.iter_truth_table()
         
         # Display truth table
         for row in truth_table:
@@ -0,0 +1,218 @@
+# expression.py
+import re
+from functools import lru_cache
+
+class ExpressionError(ValueError):
+    """
+    Raised for text that is not a well-formed logical expression.
+    """
+
+# Operator words and symbols, mapped to the operator they stand for
+OPERATORS = {
+    'and': 'and', '&': 'and', '&&': 'and',
+    'or': 'or', '|': 'or', '||': 'or',
+    'xor': 'xor', '^': 'xor',
+    'nand': 'nand',
+    'nor': 'nor',
+    'implication': 'implication', 'implies': 'implication', '->': 'implication', '=>': 'implication',
+    'not': 'not', '~': 'not', '!': 'not',
+}
+
+LITERALS = {'true': True, 'false': False, '1': True, '0': False}
+
+# Binding power of the binary operators, loosest first; implication groups to the right
+BINDING_POWER = {'implication': 10, 'or': 20, 'nor': 20, 'xor': 30, 'and': 40, 'nand': 40}
+NOT_BINDING_POWER = 50
+
+TOKEN = re.compile(r'\s*(?:(&&|\|\||->|=>|[&|^~!(),])|([A-Za-z_][A-Za-z0-9_]*|\d+))')
+
+def tokenize(text):
+    """
+    Splits an expression into ('op', name), ('literal', bool), ('name', identifier) and
+    ('punct', '(' ',' ')') tokens.
+
+    Raises:
+        ExpressionError: On characters that cannot start a token.
+    """
+    tokens = []
+    position = 0
+    text = str(text).rstrip()
+    while position < len(text):
+        match = TOKEN.match(text, position)
+        if not match:
+            raise ExpressionError(f"unexpected {text[position:].strip()[:10]!r} at position {position}")
+        position = match.end()
+        symbol, word = match.groups()
+        if symbol in ('(', ')', ','):
+            tokens.append(('punct', symbol))
+        elif symbol:
+            tokens.append(('op', OPERATORS[symbol]))
+        elif word.lower() in OPERATORS:
+            tokens.append(('op', OPERATORS[word.lower()]))
+        elif word.lower() in LITERALS:
+            tokens.append(('literal', LITERALS[word.lower()]))
+        elif word[0].isdigit():
+            raise ExpressionError(f"unexpected number {word!r}; only 1 and 0 are truth values")
+        else:
+            tokens.append(('name', word))
+    return tokens
+
+class Parser:
+    """
+    Pratt parser from tokens to a tree of tuples:
+    ('var', name), ('const', bool), ('not', operand) and (operator, left, right).
+
+    Operators are accepted infix ("A xor B") and in call form ("xor(A, B)"); and, or, xor, nand
+    and nor also take more than two arguments in call form, folded from the left.
+    """
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.position = 0
+
+    def peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else (None, None)
+
+    def next(self):
+        token = self.peek()
+        if token[0] is None:
+            raise ExpressionError("unexpected end of expression")
+        self.position += 1
+        return token
+
+    def expect(self, punct):
+        kind, value = self.next()
+        if (kind, value) != ('punct', punct):
+            raise ExpressionError(f"expected {punct!r}, found {value!r}")
+
+    def parse(self):
+        tree = self.expression(0)
+        if self.peek()[0] is not None:
+            raise ExpressionError(f"unexpected {self.peek()[1]!r} after the expression")
+        return tree
+
+    def expression(self, min_power):
+        left = self.prefix()
+        while True:
+            kind, value = self.peek()
+            if kind != 'op' or value == 'not':
+                return left
+            power = BINDING_POWER[value]
+            if power <= min_power:
+                return left
+            self.next()
+            # Right associativity for implication: parse the right side at one power lower
+            right = self.expression(power - 1 if value == 'implication' else power)
+            left = (value, left, right)
+
+    def prefix(self):
+        kind, value = self.next()
+        if kind == 'literal':
+            return ('const', value)
+        if kind == 'name':
+            return ('var', value)
+        if kind == 'punct' and value == '(':
+            tree = self.expression(0)
+            self.expect(')')
+            return tree
+        if kind == 'op' and value == 'not':
+            return ('not', self.expression(NOT_BINDING_POWER))
+        if kind == 'op' and self.peek() == ('punct', '('):
+            return self.call(value)
+        raise ExpressionError(f"unexpected {value!r}")
+
+    def call(self, operator):
+        self.expect('(')
+        arguments = [self.expression(0)]
+        while self.peek() == ('punct', ','):
+            self.next()
+            arguments.append(self.expression(0))
+        self.expect(')')
+        if len(arguments) < 2 or (operator == 'implication' and len(arguments) != 2):
+            raise ExpressionError(f"{operator}() takes {'two' if operator == 'implication' else 'two or more'} arguments")
+        tree = arguments[0]
+        for argument in arguments[1:]:
+            tree = (operator, tree, argument)
+        return tree
+
+def parse(text):
+    """
+    Parses an expression into its tree; see Parser.
+
+    Raises:
+        ExpressionError: If the text is not a well-formed expression.
+    """
+    tokens = tokenize(text)
+    if not tokens:
+        raise ExpressionError("empty expression")
+    return Parser(tokens).parse()
+
+def variables_of(tree, found=None):
+    """
+    Returns the variable names in a tree, in order of first appearance.
+    """
+    found = [] if found is None else found
+    if tree[0] == 'var':
+        if tree[1] not in found:
+            found.append(tree[1])
+    elif tree[0] != 'const':
+        for child in tree[1:]:
+            variables_of(child, found)
+    return found
+
+def _closure(tree):
+    kind = tree[0]
+    if kind == 'var':
+        name = tree[1]
+        return lambda values: values[name]
+    if kind == 'const':
+        value = tree[1]
+        return lambda values: value
+    if kind == 'not':
+        operand = _closure(tree[1])
+        return lambda values: not operand(values)
+    left, right = _closure(tree[1]), _closure(tree[2])
+    if kind == 'and':
+        return lambda values: bool(left(values) and right(values))
+    if kind == 'or':
+        return lambda values: bool(left(values) or right(values))
+    if kind == 'xor':
+        return lambda values: bool(left(values)) != bool(right(values))
+    if kind == 'nand':
+        return lambda values: not (left(values) and right(values))
+    if kind == 'nor':
+        return lambda values: not (left(values) or right(values))
+    return lambda values: bool(not left(values) or right(values))  # implication
+
+class CompiledExpression:
+    """
+    A parsed expression with its evaluation closure. Call it with a dict of variable values.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.tree = parse(text)
+        self.variables = variables_of(self.tree)
+        self.function = _closure(self.tree)
+
+    def __call__(self, values):
+        """
+        Evaluates the expression.
+
+        Raises:
+            KeyError: If values has no value for one of the variables.
+        """
+        return bool(self.function(values))
+
+    def __repr__(self):
+        return f"CompiledExpression({self.text!r})"
+
+@lru_cache(maxsize=4096)
+def compile_expression(text):
+    """
+    Returns the compiled expression for a text, parsing it only the first time.
+
+    Raises:
+        ExpressionError: If the text is not a well-formed expression.
+    """
+    return CompiledExpression(text)
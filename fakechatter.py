@@ -0,0 +1,144 @@
+# fakechatter.py
+import asyncio
+import hashlib
+import math
+import random
+import re
+import threading
+from chatter import Chatter
+
+# Words used to build deterministic replies for prompts without a canned response
+VOCABULARY = [
+    'therefore', 'all', 'humans', 'are', 'mortal', 'socrates', 'is', 'a', 'human', 'premise',
+    'conclusion', 'follows', 'because', 'logic', 'truth', 'valid', 'and', 'or', 'not', 'true',
+]
+
+class FakeLLMError(Exception):
+    """
+    Error injected by FakeLLM. Carries an HTTP status code like the provider SDK errors.
+    """
+
+    def __init__(self, status_code=500, retry_after=None):
+        super().__init__(f"injected error with status {status_code}")
+        self.status_code = status_code
+        headers = {'retry-after': str(retry_after)} if retry_after is not None else {}
+        self.response = type('FakeResponse', (), {'headers': headers})()
+
+class FakeLLM:
+    """
+    Deterministic stand-in for a language model, shared by FakeChatter and the mock server.
+
+    Replies depend only on the prompt. Latency, token rate and injected errors are drawn from a
+    seeded random generator so a run can be reproduced.
+    """
+
+    def __init__(self, latency='constant', latency_params=(0.0,), tokens_per_second=None,
+                 error_rate=0.0, error_status=500, retry_after=None, responses=None, responder=None, seed=0):
+        """
+        Initializes the fake model.
+
+        Args:
+            latency: Latency distribution: 'constant', 'uniform' or 'lognormal'.
+            latency_params: (seconds,) for constant, (low, high) for uniform, (median, sigma) for lognormal.
+            tokens_per_second: Streaming token rate, or None to stream without delay.
+            error_rate: Fraction of requests that fail with an injected error.
+            error_status: HTTP status of injected errors, e.g. 429 or 500.
+            retry_after: Retry-After seconds attached to injected errors.
+            responses: Dict of canned replies; a reply is used when its key occurs in the prompt.
+            responder: Callable taking the prompt and returning the reply; overrides responses.
+            seed: Seed for latencies and error injection.
+        """
+        self.latency = latency
+        self.latency_params = latency_params
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.responses = responses or {}
+        self.responder = responder
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {'requests': 0, 'errors': 0, 'tokens': 0}
+
+    def sample_latency(self):
+        with self.lock:
+            if self.latency == 'uniform':
+                low, high = self.latency_params
+                return self.random.uniform(low, high)
+            if self.latency == 'lognormal':
+                median, sigma = self.latency_params
+                return self.random.lognormvariate(math.log(median), sigma)
+            return self.latency_params[0]
+
+    def check_error(self):
+        """
+        Counts a request and raises FakeLLMError if this request was picked to fail.
+        """
+        with self.lock:
+            self.stats['requests'] += 1
+            failed = self.error_rate > 0 and self.random.random() < self.error_rate
+            if failed:
+                self.stats['errors'] += 1
+        if failed:
+            raise FakeLLMError(self.error_status, self.retry_after)
+
+    def reply(self, prompt):
+        if self.responder is not None:
+            return self.responder(prompt)
+        for key, response in self.responses.items():
+            if key in prompt:
+                return response
+        digest = hashlib.sha256(prompt.encode('utf-8')).digest()
+        words = [VOCABULARY[byte % len(VOCABULARY)] for byte in digest[:12]]
+        return " ".join(words).capitalize() + "."
+
+    def tokens(self, text):
+        # Word tokens keep their trailing whitespace so joining them restores the text
+        tokens = re.findall(r'\s*\S+\s*', text) or [text]
+        with self.lock:
+            self.stats['tokens'] += len(tokens)
+        return tokens
+
+    def token_delay(self):
+        return 1.0 / self.tokens_per_second if self.tokens_per_second else 0.0
+
+def prompt_text(messages):
+    """
+    Returns the conversation text the fake model replies to: every non-empty message, in order.
+    """
+    return "\n".join(str(message["content"]) for message in messages if message.get("content"))
+
+class FakeChatter(Chatter):
+    """
+    In-process chatter backed by FakeLLM, for tests and benchmarks without network access.
+    """
+    default_model = 'fake-model'
+    api_errors = (FakeLLMError,)
+
+    def __init__(self, llm=None, provider='fake', **llm_options):
+        """
+        Args:
+            llm: A FakeLLM, or None to build one from llm_options.
+            provider: Provider name reported to the caching, routing and rate limiting layers.
+        """
+        self.llm = llm if llm is not None else FakeLLM(**llm_options)
+        self.provider = provider
+
+    async def acomplete(self, knowledge, model=None, **options):
+        await asyncio.sleep(self.llm.sample_latency())
+        self.llm.check_error()
+        reply = self.llm.reply(prompt_text(self.build_messages(knowledge)))
+        self.llm.tokens(reply)
+        return reply
+
+    async def astream(self, knowledge, model=None, **options):
+        await asyncio.sleep(self.llm.sample_latency())
+        self.llm.check_error()
+        delay = self.llm.token_delay()
+        for token in self.llm.tokens(self.llm.reply(prompt_text(self.build_messages(knowledge)))):
+            if delay:
+                await asyncio.sleep(delay)
+            yield token
+
+    def get_stats(self):
+        return dict(self.llm.stats)
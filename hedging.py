@@ -0,0 +1,114 @@
+# hedging.py
+import asyncio
+import logging
+import time
+from chatter import ChatterWrapper, run_on_loop
+from router import RollingLatency
+
+class HedgedChatter(ChatterWrapper):
+    """
+    Cuts tail latency by sending a duplicate request when the first one is slower than usual.
+
+    If a request has not finished after the configured percentile of recent latencies, a hedge
+    is sent to the alternate chatter (or the same one) and whichever answers first wins; the
+    other request is cancelled. Hedges are capped at a fraction of all requests.
+
+    The percentile is taken over single attempts to the primary chatter, each timed from its own
+    start, rather than over whole requests; a primary cancelled because its hedge won counts
+    with the time it ran.
+    """
+
+    def __init__(self, chatter, alternate=None, percentile=95, budget=0.05, min_samples=20, min_delay=0.05, window=200):
+        """
+        Initializes the hedging layer.
+
+        Args:
+            chatter: The primary chatter.
+            alternate: The chatter used for hedges, or None to hedge against the primary.
+            percentile: Percentile of recent latency after which a hedge is sent.
+            budget: Maximum number of hedges as a fraction of requests.
+            min_samples: Number of latencies to observe before hedging starts.
+            min_delay: Lower bound in seconds on the hedge delay.
+            window: Number of recent latencies used to compute the percentile.
+        """
+        super().__init__(chatter)
+        self.alternate = alternate or chatter
+        self.percentile = percentile
+        self.budget = budget
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.latency = RollingLatency(window)
+        self.stats = {'requests': 0, 'hedged': 0, 'hedge_wins': 0, 'over_budget': 0}
+
+    def hedge_delay(self):
+        """
+        Returns the number of seconds to wait before hedging, or None while there is too little data.
+        """
+        if len(self.latency.latencies) < self.min_samples:
+            return None
+        return max(self.min_delay, self.latency.percentile(self.percentile))
+
+    def _within_budget(self):
+        return self.stats['hedged'] + 1 <= self.budget * self.stats['requests']
+
+    async def acomplete(self, knowledge, model=None, **options):
+        return await run_on_loop(self._acomplete(knowledge, model, **options))
+
+    def _attempt(self, request, record):
+        # Starts an attempt that records its own latency, from its start, once it succeeds; one
+        # cancelled after losing to the other attempt records the time it ran as a lower bound
+        started = time.monotonic()
+        task = asyncio.ensure_future(request)
+        if record:
+            task.add_done_callback(lambda task: self.latency.record(time.monotonic() - started)
+                                   if task.cancelled() or task.exception() is None else None)
+        return task
+
+    async def _acomplete(self, knowledge, model=None, **options):
+        self.stats['requests'] += 1
+        primary = self._attempt(self.chatter.acomplete(knowledge, model, **options), record=True)
+        delay = self.hedge_delay()
+        tasks = {primary}
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done:
+                    if self._within_budget():
+                        self.stats['hedged'] += 1
+                        logging.info(f"hedging request after {delay:.3f}s")
+                        hedge_model = model if self.alternate is self.chatter else None
+                        # The alternate's latencies would not tell when the primary is slow
+                        tasks.add(self._attempt(self.alternate.acomplete(knowledge, hedge_model, **options),
+                                                record=self.alternate is self.chatter))
+                    else:
+                        self.stats['over_budget'] += 1
+            winner = await self._first_success(tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+        response = winner.result()
+        if winner is not primary:
+            self.stats['hedge_wins'] += 1
+        return response
+
+    @staticmethod
+    async def _first_success(tasks):
+        # Return the first task to succeed, or the first one to fail if none succeeds
+        pending = set(tasks)
+        failed = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task
+                failed = failed or task
+        return failed
+
+    def get_stats(self):
+        """
+        Returns request and hedge counters along with the current hedge delay.
+        """
+        stats = dict(self.stats)
+        stats['hedge_rate'] = stats['hedged'] / stats['requests'] if stats['requests'] else 0.0
+        stats['hedge_delay'] = self.hedge_delay()
+        return stats
@@ -0,0 +1,361 @@
+# inference.py
+from collections import deque
+from premise_store import parse_fact
+
+def is_variable(term):
+    """
+    Returns True for rule variables, written with a leading '?' as in '?x'.
+    """
+    return isinstance(term, str) and term.startswith('?')
+
+def _resolve(term, bindings):
+    return bindings.get(term, term) if is_variable(term) else term
+
+def unify(pattern, arguments, bindings):
+    """
+    Matches the argument pattern of an atom against the arguments of a fact.
+
+    Args:
+        pattern: Tuple of constants and variables.
+        arguments: Tuple of constants.
+        bindings: Variable bindings made so far; not modified.
+
+    Returns:
+        dict: The bindings extended to make pattern equal arguments, or None if they cannot be.
+    """
+    if len(pattern) != len(arguments):
+        return None
+    extended = bindings
+    for term, value in zip(pattern, arguments):
+        if is_variable(term):
+            bound = extended.get(term)
+            if bound is None:
+                if extended is bindings:
+                    extended = dict(bindings)
+                extended[term] = value
+            elif bound != value:
+                return None
+        elif term != value:
+            return None
+    return extended
+
+class Rule:
+    """
+    Horn rule: the head atom holds for every binding under which all body atoms hold.
+
+    Atoms are (relation, arguments) tuples; arguments are constants or '?' variables. Every
+    variable of the head must occur in the body, so derived facts are always ground.
+    """
+
+    def __init__(self, head, body, name=None):
+        """
+        Args:
+            head: The atom derived.
+            body: The atoms that must hold.
+            name: Label used in explanations; defaults to the rule written out.
+
+        Raises:
+            ValueError: If the body is empty or a head variable is not in the body.
+        """
+        self.head = (head[0], tuple(head[1]))
+        self.body = [(relation, tuple(arguments)) for relation, arguments in body]
+        if not self.body:
+            raise ValueError("a rule needs at least one body atom")
+        body_variables = {term for _, arguments in self.body for term in arguments if is_variable(term)}
+        unbound = [term for term in self.head[1] if is_variable(term) and term not in body_variables]
+        if unbound:
+            raise ValueError(f"head variables {unbound} do not occur in the body")
+        self.name = name or f"{_format(self.head)} :- {', '.join(_format(atom) for atom in self.body)}"
+
+    def __repr__(self):
+        return f"Rule({self.name!r})"
+
+def _format(atom):
+    return f"{atom[0]}({', '.join(atom[1])})"
+
+def rules_from_fact(fact):
+    """
+    Returns the rules stated by a parsed premise: ('all', (x, y)) gives y(?x) :- x(?x) and
+    ('no', (x, y)) gives 'not y'(?x) :- x(?x), matching how parse_fact reads "S is not Y".
+    Other facts state no rule and give an empty list.
+    """
+    relation, arguments = fact
+    if relation in ('all', 'no') and len(arguments) == 2:
+        subject, predicate = arguments
+        head = predicate if relation == 'all' else f"not {predicate}"
+        return [Rule((head, ('?x',)), [(subject, ('?x',))])]
+    return []
+
+class InferenceEngine:
+    """
+    Forward-chaining engine that derives every fact following from its facts and rules.
+
+    Evaluation is semi-naive: each new fact waits on an agenda and, when it is taken off, is
+    joined only through the rule atoms of its relation against the facts known so far, instead
+    of every rule being re-evaluated over all facts each round. Facts are indexed by relation and by
+    (relation, position, argument), and a join always continues with the body atom that has the
+    fewest candidate facts. Facts and rules may be added at any time; only the consequences of
+    the additions are computed by the next run.
+    """
+
+    def __init__(self, rules=(), facts=()):
+        self.rules = []
+        self.by_relation = {}  # relation -> set of argument tuples
+        self.by_argument = {}  # (relation, position, argument) -> set of argument tuples
+        self.triggers = {}  # relation -> [(rule, body position)]
+        self.agenda = deque()
+        self.reasons = {}  # derived fact -> (rule, facts it was derived from)
+        self.stats = {'facts': 0, 'derived': 0, 'rules': 0, 'joins': 0}
+        for rule in rules:
+            self.add_rule(rule)
+        for relation, arguments in facts:
+            self.add_fact(relation, arguments)
+
+    # knowledge
+
+    def add_fact(self, relation, arguments, reason=None):
+        """
+        Adds a ground fact and puts it on the agenda.
+
+        Args:
+            relation: The relation name.
+            arguments: The arguments; none may be a variable.
+            reason: (rule, premises) for derived facts.
+
+        Returns:
+            bool: True if the fact was new.
+        """
+        arguments = tuple(arguments)
+        known = self.by_relation.setdefault(relation, set())
+        if arguments in known:
+            return False
+        if reason is None and any(is_variable(argument) for argument in arguments):  # derived facts are ground
+            raise ValueError(f"facts must be ground: {_format((relation, arguments))}")
+        known.add(arguments)
+        for position, argument in enumerate(arguments):
+            self.by_argument.setdefault((relation, position, argument), set()).add(arguments)
+        self.agenda.append((relation, arguments))
+        self.stats['facts'] += 1
+        if reason is not None:
+            self.reasons[(relation, arguments)] = reason
+            self.stats['derived'] += 1
+        return True
+
+    def add_rule(self, rule):
+        """
+        Adds a rule and matches the facts already known against it; what they derive is put on
+        the agenda.
+        """
+        self.rules.append(rule)
+        self.stats['rules'] += 1
+        for position, (relation, _) in enumerate(rule.body):
+            self.triggers.setdefault(relation, []).append((rule, position))
+        # Treat the known facts of the first body atom as new for this rule alone
+        relation, pattern = rule.body[0]
+        for arguments in list(self.by_relation.get(relation, ())):
+            bindings = unify(pattern, arguments, {})
+            if bindings is not None:
+                self._fire(rule, rule.body[1:], bindings, [(relation, arguments)])
+
+    def add_premise(self, premise):
+        """
+        Adds what a premise states: a rule for "All X are Y" and "No X are Y", otherwise a fact.
+
+        Args:
+            premise: A premise text or fact dict, read with premise_store.parse_fact.
+
+        Returns:
+            bool: False if the premise is free text that states neither.
+        """
+        fact = parse_fact(premise)
+        if fact is None:
+            return False
+        rules = rules_from_fact(fact)
+        for rule in rules:
+            self.add_rule(rule)
+        if not rules:
+            self.add_fact(*fact)
+        return True
+
+    # evaluation
+
+    def run(self, limit=None):
+        """
+        Processes the agenda until no new facts can be derived.
+
+        Args:
+            limit: Stop after this many facts have been processed, or None.
+
+        Returns:
+            int: The number of facts processed.
+        """
+        processed = 0
+        while self.agenda and (limit is None or processed < limit):
+            relation, arguments = self.agenda.popleft()
+            processed += 1
+            for rule, position in self.triggers.get(relation, ()):
+                bindings = unify(rule.body[position][1], arguments, {})
+                if bindings is not None:
+                    rest = rule.body[:position] + rule.body[position + 1:]
+                    self._fire(rule, rest, bindings, [(relation, arguments)])
+        return processed
+
+    def _fire(self, rule, atoms, bindings, support):
+        head_relation, head_pattern = rule.head
+        # Solutions are collected first: adding facts while joining would change the indexes
+        solutions = [(bindings, support)] if not atoms else list(self._join(atoms, bindings, support))
+        for solution, facts in solutions:
+            self.add_fact(head_relation, tuple(_resolve(term, solution) for term in head_pattern), (rule, facts))
+
+    def _candidates(self, atom, bindings):
+        relation, pattern = atom
+        candidates = self.by_relation.get(relation, set())
+        for position, term in enumerate(pattern):
+            value = _resolve(term, bindings)
+            if not is_variable(value):
+                indexed = self.by_argument.get((relation, position, value), set())
+                if len(indexed) < len(candidates):
+                    candidates = indexed
+        return candidates
+
+    def _join(self, atoms, bindings, support):
+        # Yields (bindings, supporting facts) for every way the atoms hold together
+        if not atoms:
+            yield bindings, support
+            return
+        best = None
+        for index, atom in enumerate(atoms):
+            candidates = self._candidates(atom, bindings)
+            if not candidates:
+                return
+            if best is None or len(candidates) < len(best[1]):
+                best = (index, candidates)
+        index, candidates = best
+        relation, pattern = atoms[index]
+        rest = atoms[:index] + atoms[index + 1:]
+        for arguments in candidates:
+            self.stats['joins'] += 1
+            extended = unify(pattern, arguments, bindings)
+            if extended is not None:
+                yield from self._join(rest, extended, support + [(relation, arguments)])
+
+    # queries
+
+    def query(self, relation, *pattern):
+        """
+        Returns the bindings of the variables in pattern for every matching fact, after running
+        the agenda. A ground pattern returns [{}] when the fact holds and [] when it does not.
+
+        Example:
+            engine.query('mortal', '?who')  ->  [{'?who': 'socrates'}, ...]
+        """
+        self.run()
+        return [bindings for bindings, _ in self._join([(relation, tuple(pattern))], {}, [])]
+
+    def holds(self, relation, *arguments):
+        """
+        Returns True if a ground fact is known or follows from the knowledge.
+        """
+        self.run()
+        return tuple(arguments) in self.by_relation.get(relation, ())
+
+    def steps(self, subject, predicate):
+        """
+        Returns the fewest one-atom class rules that lead from subject to predicate, as all(x, z)
+        follows from all(x, y) and all(y, z): 0 when they are the same, None when no chain does.
+        Known individuals play no part.
+        """
+        reached, frontier, depth = {subject}, [subject], 0
+        while frontier:
+            if predicate in frontier:
+                return depth
+            following = []
+            for relation in frontier:
+                for rule, _ in self.triggers.get(relation, ()):
+                    head_relation, head_arguments = rule.head
+                    if (len(rule.body) == 1 and len(head_arguments) == 1 and is_variable(head_arguments[0])
+                            and rule.body[0][1] == head_arguments and head_relation not in reached):
+                        reached.add(head_relation)
+                        following.append(head_relation)
+            frontier, depth = following, depth + 1
+        return None
+
+    def subsumes(self, subject, predicate, min_steps=0):
+        """
+        Returns True if the rules make every subject a predicate through a chain of at least
+        min_steps rules; see steps.
+        """
+        found = self.steps(subject, predicate)
+        return found is not None and found >= min_steps
+
+    def entails(self, statement, derived=False):
+        """
+        Returns True if a premise-like statement, such as "Socrates is mortal.", follows from the
+        knowledge. "All X are Y" and "No X are Y" follow only from the rules (see subsumes), never
+        from the individuals that happen to be known.
+
+        With derived=True the statement must be a consequence rather than part of the knowledge:
+        a fact must have been derived by a rule and a universal needs a chain of two rules or more.
+        """
+        fact = parse_fact(statement)
+        if fact is None:
+            return False
+        relation, arguments = fact
+        min_steps = 2 if derived else 0
+        if relation == 'all' and len(arguments) == 2:
+            return self.subsumes(*arguments, min_steps)
+        if relation == 'no' and len(arguments) == 2:
+            subject, predicate = arguments
+            return (self.subsumes(subject, f"not {predicate}", min_steps) or
+                    self.subsumes(predicate, f"not {subject}", min_steps))
+        if not self.holds(relation, *arguments):
+            return False
+        return not derived or (relation, tuple(arguments)) in self.reasons
+
+    def fork(self):
+        """
+        Returns an engine with a copy of this one's facts and rules, so knowledge can be added to
+        it without changing this one.
+        """
+        self.run()
+        engine = InferenceEngine()
+        engine.rules = list(self.rules)
+        engine.by_relation = {relation: set(known) for relation, known in self.by_relation.items()}
+        engine.by_argument = {key: set(known) for key, known in self.by_argument.items()}
+        engine.triggers = {relation: list(triggers) for relation, triggers in self.triggers.items()}
+        engine.reasons = dict(self.reasons)
+        engine.stats = dict(self.stats)
+        return engine
+
+    def explain(self, relation, *arguments):
+        """
+        Returns the derivation of a fact as nested (fact, rule name, [derivations]) tuples; given
+        facts have rule None. Returns None if the fact does not hold.
+        """
+        fact = (relation, tuple(arguments))
+        if not self.holds(relation, *arguments):
+            return None
+        reason = self.reasons.get(fact)
+        if reason is None:
+            return (fact, None, [])
+        rule, support = reason
+        return (fact, rule.name, [self.explain(r, *a) for r, a in support])
+
+    def facts(self, relation=None):
+        """
+        Returns the known facts, of one relation or of all, as (relation, arguments) tuples.
+        """
+        self.run()
+        relations = [relation] if relation is not None else list(self.by_relation)
+        return [(name, arguments) for name in relations for arguments in self.by_relation.get(name, ())]
+
+    def contradictions(self):
+        """
+        Returns the facts that hold together with their negation "not <relation>".
+        """
+        self.run()
+        return [(relation, arguments) for relation, known in self.by_relation.items() if not relation.startswith('not ')
+                for arguments in known if arguments in self.by_relation.get(f"not {relation}", ())]
+
+    def get_stats(self):
+        return dict(self.stats, agenda=len(self.agenda))
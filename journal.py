@@ -0,0 +1,315 @@
+# journal.py
+import atexit
+import copy
+import logging
+import os
+import threading
+import ujson
+
+_journals = {}
+_journals_lock = threading.Lock()
+
+class Journal:
+    """
+    Append-only JSONL journal with batched fsync and background compaction.
+
+    Appending adds one line to an in-memory buffer; a background thread writes and fsyncs the
+    pending lines every sync_interval seconds, or as soon as batch_size lines are waiting, so a
+    write costs no disk round trip of its own. The fsync runs without the journal lock, so
+    appends never wait for the disk.
+
+    With an apply function the journal holds state: every record is applied to it in memory, lines
+    are written as {"seq": n, "data": record}, and after compact_every records the background
+    thread writes the state to a snapshot file and truncates the journal to the records that came
+    after it. load() rebuilds the state from the snapshot plus the journal tail. Without an apply
+    function the journal is a plain log of one record per line and load() returns the records.
+
+    A legacy JSON file, as written before journals existed, supplies the initial state or records
+    when the journal has no snapshot yet.
+    """
+
+    def __init__(self, path, apply=None, initial=list, legacy_path=None,
+                 sync_interval=0.2, batch_size=64, compact_every=1000):
+        """
+        Opens the journal, loading its state when it has an apply function.
+
+        Args:
+            path: The JSONL journal file.
+            apply: Callable (state, record) -> state, or None for a plain log.
+            initial: Callable returning the empty state.
+            legacy_path: JSON file whose contents are the state, or the list of records, to start from.
+            sync_interval: Seconds between background fsyncs.
+            batch_size: Number of pending lines that triggers an fsync before the interval ends.
+            compact_every: Number of records after which a snapshot is written.
+        """
+        self.path = path
+        self.snapshot_path = f"{os.path.splitext(path)[0]}.snapshot.json"
+        self.apply = apply
+        self.initial = initial
+        self.legacy_path = legacy_path
+        self.sync_interval = sync_interval
+        self.batch_size = batch_size
+        self.compact_every = compact_every
+        self.lock = threading.Lock()
+        self.wakeup = threading.Condition(self.lock)
+        self.compacting = threading.Lock()  # one compaction at a time; they share the temporary files
+        self.syncing = threading.Lock()  # one fsync at a time, so flush() returns after its lines are synced
+        self.buffer = []  # lines appended but not yet written to the file
+        self.pending = 0  # lines appended but not yet fsynced
+        self.seq = 0
+        self.since_snapshot = []  # (seq, record) appended after the last snapshot
+        self.state = None
+        self.stats = {'appended': 0, 'syncs': 0, 'compactions': 0}
+        self.closed = False
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        if apply is not None:
+            self.state, self.seq, tail = self._load_state()
+            self.since_snapshot = tail
+        self.file = open(path, 'a', encoding='utf-8')
+        self.thread = threading.Thread(target=self._run, name=f'journal-{os.path.basename(path)}', daemon=True)
+        self.thread.start()
+
+    def _read_legacy(self):
+        if not self.legacy_path or not os.path.exists(self.legacy_path):
+            return None
+        try:
+            with open(self.legacy_path, 'r', encoding='utf-8') as file:
+                return ujson.load(file)
+        except ValueError as e:
+            logging.error(f"journal {self.path}: unreadable legacy file {self.legacy_path}: {e}")
+            return None
+
+    def _read_lines(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as file:
+            for line in file:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield ujson.loads(line)
+                except ValueError:
+                    # Only the last line can be torn by a crash; anything after it was never synced
+                    logging.warning(f"journal {self.path}: skipping unreadable line")
+
+    def _load_state(self):
+        seq = 0
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, 'r', encoding='utf-8') as file:
+                snapshot = ujson.load(file)
+            state, seq = snapshot['state'], snapshot['seq']
+        else:
+            state = self.initial()
+            legacy = self._read_legacy()
+            if legacy is not None:
+                state = self.apply(state, {'op': 'legacy', 'data': legacy})
+        tail = []
+        for line in self._read_lines():
+            if line['seq'] <= seq:
+                continue  # already in the snapshot; left over from a compaction cut short
+            state = self.apply(state, line['data'])
+            tail.append((line['seq'], line['data']))
+            seq = line['seq']
+        return state, seq, tail
+
+    def load(self):
+        """
+        Returns the current state, or for a plain log every record including the legacy ones.
+        """
+        if self.apply is not None:
+            with self.lock:
+                return copy.deepcopy(self.state)
+        self.flush(sync=False)
+        legacy = self._read_legacy()
+        records = list(legacy) if isinstance(legacy, list) else []
+        records.extend(self._read_lines())
+        return records
+
+    def append(self, record):
+        """
+        Appends a record. It is on disk after the next background sync, or after flush().
+
+        Args:
+            record: A JSON-serializable record.
+        """
+        with self.lock:
+            if self.closed:
+                raise ValueError(f"journal {self.path} is closed")
+            if self.apply is not None:
+                self.seq += 1
+                self.state = self.apply(self.state, record)
+                self.since_snapshot.append((self.seq, record))
+                line = {'seq': self.seq, 'data': record}
+            else:
+                line = record
+            self.buffer.append(ujson.dumps(line, ensure_ascii=False) + "\n")
+            self.pending += 1
+            self.stats['appended'] += 1
+            if self.pending >= self.batch_size or self._compaction_due():
+                self.wakeup.notify()
+
+    def _compaction_due(self):
+        return self.apply is not None and len(self.since_snapshot) >= self.compact_every
+
+    def _write(self):
+        # Called with the lock held: hands the buffered lines to the operating system
+        if self.buffer:
+            self.file.write("".join(self.buffer))
+            self.buffer = []
+            self.file.flush()
+
+    def _sync(self):
+        # The lines are written under the lock and fsynced after it is released, on a duplicate
+        # descriptor that stays valid if a compaction replaces the file meanwhile
+        with self.syncing:
+            with self.lock:
+                if self.closed or not self.pending:
+                    return
+                self._write()
+                descriptor = os.dup(self.file.fileno())
+                self.pending = 0
+            try:
+                os.fsync(descriptor)
+            finally:
+                os.close(descriptor)
+            with self.lock:
+                self.stats['syncs'] += 1
+
+    def flush(self, sync=True):
+        """
+        Writes pending lines to the file, and to disk with sync=True.
+        """
+        if sync:
+            self._sync()
+            return
+        with self.lock:
+            if not self.closed:
+                self._write()
+
+    def compact(self):
+        """
+        Writes the current state to the snapshot file and truncates the journal to the records
+        appended since. Safe to call at any time; the background thread calls it periodically.
+        """
+        if self.apply is None:
+            return
+        with self.compacting:
+            self._compact()
+
+    def _compact(self):
+        with self.lock:
+            if self.closed:
+                return
+            state = copy.deepcopy(self.state)
+            seq = self.seq
+        # The snapshot is written outside the lock so appends carry on meanwhile
+        temporary = f"{self.snapshot_path}.tmp"
+        with open(temporary, 'w', encoding='utf-8') as file:
+            ujson.dump({'seq': seq, 'state': state}, file, ensure_ascii=False)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, self.snapshot_path)
+
+        with self.lock:
+            if self.closed:
+                return
+            self.since_snapshot = [(n, record) for n, record in self.since_snapshot if n > seq]
+            temporary = f"{self.path}.tmp"
+            with open(temporary, 'w', encoding='utf-8') as file:
+                for n, record in self.since_snapshot:
+                    file.write(ujson.dumps({'seq': n, 'data': record}, ensure_ascii=False) + "\n")
+                file.flush()
+                os.fsync(file.fileno())
+            self.file.close()
+            os.replace(temporary, self.path)
+            self.file = open(self.path, 'a', encoding='utf-8')
+            self.buffer = []  # its records are in since_snapshot, already written
+            self.pending = 0
+            self.stats['compactions'] += 1
+
+    def _run(self):
+        while True:
+            with self.lock:
+                self.wakeup.wait(self.sync_interval)
+                if self.closed:
+                    return
+            try:
+                self._sync()
+            except OSError as e:
+                logging.error(f"journal {self.path}: sync failed: {e}")
+            with self.lock:
+                compact = self._compaction_due()
+            if compact:
+                try:
+                    self.compact()
+                except OSError as e:
+                    logging.error(f"journal {self.path}: compaction failed: {e}")
+
+    def close(self):
+        """
+        Syncs pending lines and stops the background thread.
+        """
+        with self.lock:
+            if self.closed:
+                return
+            self._write()
+            if self.pending:
+                os.fsync(self.file.fileno())
+                self.pending = 0
+                self.stats['syncs'] += 1
+            self.file.close()
+            self.closed = True
+            self.wakeup.notify()
+        self.thread.join()
+
+    def get_stats(self):
+        with self.lock:
+            return dict(self.stats, pending=self.pending, seq=self.seq)
+
+def open_journal(path, **options):
+    """
+    Returns the journal for a path, shared by everything in the process that writes to it.
+
+    Args:
+        path: The journal file.
+        options: Passed to Journal when the journal is opened.
+    """
+    key = os.path.abspath(path)
+    with _journals_lock:
+        journal = _journals.get(key)
+        if journal is None or journal.closed:
+            journal = _journals[key] = Journal(path, **options)
+        return journal
+
+@atexit.register
+def close_journals():
+    """
+    Closes every open journal, syncing what is still pending.
+    """
+    with _journals_lock:
+        journals = list(_journals.values())
+        _journals.clear()
+    for journal in journals:
+        journal.close()
+
+def apply_list_record(state, record):
+    """
+    Applies a record to list state: 'add' and 'remove' an item, 'set' the whole list, or
+    'legacy' to start from a legacy JSON file.
+    """
+    op = record['op']
+    if op == 'add':
+        state.append(record['item'])
+    elif op == 'remove':
+        if record['item'] in state:
+            state.remove(record['item'])
+    elif op == 'set':
+        state = list(record['items'])
+    elif op == 'legacy':
+        data = record['data']
+        if isinstance(data, dict):  # draw_conclusion used to write {"premises": [...], "conclusion": ...}
+            data = data.get('premises', [])
+        state = list(data) if isinstance(data, list) else state
+    return state
@@ -0,0 +1,231 @@
+# log_pipeline.py
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+
+DEFAULT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+class BufferedRotatingFileHandler(logging.Handler):
+    """
+    File handler that collects formatted records in memory and writes them in one batch.
+    The file is opened once, and rotated to path.1 ... path.N once it grows past max_bytes.
+    Only the pipeline's writer thread calls it.
+    """
+
+    def __init__(self, path, max_bytes=5 * 1024 * 1024, backup_count=3, buffer_records=256):
+        super().__init__()
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.buffer_records = buffer_records
+        self.buffer = []
+        self.buffered_bytes = 0
+        self.stream = None
+        self.size = 0
+
+    def emit(self, record):
+        try:
+            text = self.format(record) + "\n"
+        except Exception:
+            self.handleError(record)
+            return
+        self.buffer.append(text)
+        self.buffered_bytes += len(text.encode('utf-8'))
+        if len(self.buffer) >= self.buffer_records:
+            self.flush()
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self.stream = open(self.path, 'a', encoding='utf-8')
+        self.size = self.stream.tell()
+
+    def _rotate(self):
+        self.stream.close()
+        self.stream = None
+        if self.backup_count > 0:
+            for index in range(self.backup_count - 1, 0, -1):
+                source = f"{self.path}.{index}"
+                if os.path.exists(source):
+                    os.replace(source, f"{self.path}.{index + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._open()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        try:
+            if self.stream is None:
+                self._open()
+            if self.max_bytes and self.size and self.size + self.buffered_bytes > self.max_bytes:
+                self._rotate()
+            self.stream.write("".join(self.buffer))
+            self.stream.flush()
+            self.size += self.buffered_bytes
+        except OSError as e:
+            logging.getLogger(__name__).debug(f"log pipeline: cannot write {self.path}: {e}")
+        self.buffer = []
+        self.buffered_bytes = 0
+
+    def close(self):
+        self.flush()
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+        super().close()
+
+class PipelineHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler that tags each record with the route of the logger it is attached to.
+    """
+
+    def __init__(self, pipeline, route):
+        super().__init__(pipeline.queue)
+        self.route = route
+
+    def enqueue(self, record):
+        self.queue.put_nowait((self.route, record))
+
+class LogPipeline:
+    """
+    Moves file logging off the calling thread.
+
+    Loggers get a single PipelineHandler that puts records on a queue; one background writer
+    thread formats them and hands them to buffered, size-rotated file handlers, flushing the
+    buffers whenever the queue runs empty. File handlers are shared by path, and configuring a
+    logger again replaces its outputs instead of adding duplicate handlers.
+    """
+
+    def __init__(self):
+        self.queue = queue.SimpleQueue()
+        self.lock = threading.Lock()
+        self.routes = {}  # logger name -> tuple of file handlers
+        self.outputs = {}  # logger name -> resolved output spec, to detect reconfiguration
+        self.files = {}  # (path, format) -> BufferedRotatingFileHandler
+        self.thread = None
+
+    def configure(self, name, outputs, level=logging.DEBUG, propagate=True,
+                  max_bytes=5 * 1024 * 1024, backup_count=3):
+        """
+        Routes a logger to files through the writer thread. Safe to call from every constructor:
+        the logger keeps exactly one pipeline handler whatever the number of calls.
+
+        Args:
+            name: The logger name.
+            outputs: (path, format) pairs; format None uses DEFAULT_FORMAT.
+            level: The logger level.
+            propagate: Whether records also go to the parent loggers.
+            max_bytes: Size at which a file is rotated.
+            backup_count: Number of rotated files kept.
+
+        Returns:
+            logging.Logger: The configured logger.
+        """
+        logger = logging.getLogger(name)
+        resolved = tuple((os.path.abspath(path), fmt or DEFAULT_FORMAT) for path, fmt in outputs)
+        with self.lock:
+            if self.outputs.get(name) != resolved:
+                handlers = []
+                for path, fmt in resolved:
+                    handler = self.files.get((path, fmt))
+                    if handler is None:
+                        handler = BufferedRotatingFileHandler(path, max_bytes, backup_count)
+                        handler.setFormatter(logging.Formatter(fmt))
+                        self.files[(path, fmt)] = handler
+                    handlers.append(handler)
+                self.routes[name] = tuple(handlers)
+                self.outputs[name] = resolved
+            if not any(isinstance(handler, PipelineHandler) for handler in logger.handlers):
+                logger.addHandler(PipelineHandler(self, name))
+            self._start()
+        logger.setLevel(level)
+        logger.propagate = propagate
+        return logger
+
+    def _start(self):
+        # Called with the lock held
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self._run, name='log-pipeline', daemon=True)
+            self.thread.start()
+
+    def _handle(self, item):
+        route, record = item
+        if route is None:
+            return record  # a flush marker
+        for handler in self.routes.get(route, ()):
+            if record.levelno >= handler.level:
+                handler.handle(record)
+        return None
+
+    def _flush_files(self):
+        for handler in list(self.files.values()):
+            handler.flush()
+
+    def _run(self):
+        while True:
+            markers = []
+            marker = self._handle(self.queue.get())
+            if marker is not None:
+                markers.append(marker)
+            # Take whatever else is queued, then write the whole batch at once
+            while True:
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                marker = self._handle(item)
+                if marker is not None:
+                    markers.append(marker)
+            self._flush_files()
+            stop = False
+            for marker in markers:
+                stop = stop or marker.is_set()  # a set marker asks the writer to stop
+                marker.set()
+            if stop:
+                return
+
+    def flush(self, timeout=5.0):
+        """
+        Waits until every record queued so far has been written.
+        """
+        if self.thread is None or not self.thread.is_alive():
+            return
+        marker = threading.Event()
+        self.queue.put((None, marker))
+        marker.wait(timeout)
+
+    def stop(self, timeout=5.0):
+        """
+        Writes what is queued, closes the files and stops the writer thread.
+        """
+        if self.thread is not None and self.thread.is_alive():
+            marker = threading.Event()
+            marker.set()
+            self.queue.put((None, marker))
+            self.thread.join(timeout)
+        with self.lock:
+            for handler in self.files.values():
+                handler.close()
+            self.files.clear()
+            self.routes.clear()
+            self.outputs.clear()
+
+_pipeline = LogPipeline()
+
+def configure_logger(name, outputs, **options):
+    """
+    Routes a logger to files through the shared pipeline; see LogPipeline.configure.
+    """
+    return _pipeline.configure(name, outputs, **options)
+
+def flush_logs(timeout=5.0):
+    """
+    Waits until every record logged so far is in its file.
+    """
+    _pipeline.flush(timeout)
+
+atexit.register(_pipeline.stop)
@@ -1,40 +1,43 @@
-import itertools
-import logging
 import datetime
-import pathlib
-from memory.memory import create_memory_folders, save_valid_truth, store_in_stm, DialogEntry
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from expression import ExpressionError, compile_expression
+from truth_table import DEFAULT_CHUNK_ROWS, build_table, extend_expression, extend_variable, iter_chunks, table_rows
+from table_file import export_table
+from sharded_table import find_sharded, summarize_sharded
+from bdd import BDDTooLarge, check_equivalent, check_satisfiable, check_tautology
+from belief_store import open_belief_store
+from log_pipeline import configure_logger
+from memory import create_memory_folders, save_valid_truth, store_in_stm, DialogEntry
+
+# Largest truth table kept in memory between calls; bigger tables are streamed each time
+TABLE_CACHE_ROWS = 1 << 20
+
+# Largest truth table searched when a decision diagram grows too large; past it checks are undecided
+SHARD_ROW_LIMIT = 1 << 28
 
 class LogicTables:
     def __init__(self):
         self.variables = []
         self.expressions = []
         self.valid_truths = []
-        self.logger = logging.getLogger('LogicTables')
-        self.logger.setLevel(logging.DEBUG)  # Set to DEBUG to capture all logs
-
-        # Ensure directories exist
-        general_log_dir = './mindx/errors'
-        memory_log_dir = './memory/truth'
-        pathlib.Path(general_log_dir).mkdir(parents=True, exist_ok=True)
-        pathlib.Path(memory_log_dir).mkdir(parents=True, exist_ok=True)
-
-        # General log file for mindx
-        file_handler_mindx = logging.FileHandler(f'{general_log_dir}/log.txt')
-        file_handler_mindx.setLevel(logging.DEBUG)
-        file_formatter_mindx = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-        file_handler_mindx.setFormatter(file_formatter_mindx)
-
-        # Log file for memory/truth
-        file_handler_memory = logging.FileHandler(f'{memory_log_dir}/logs.txt')
-        file_handler_memory.setLevel(logging.DEBUG)
-        file_formatter_memory = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-        file_handler_memory.setFormatter(file_formatter_memory)
-
-        self.logger.addHandler(file_handler_mindx)
-        self.logger.addHandler(file_handler_memory)
-
-        # Remove any other handlers (like StreamHandler) if they exist
-        self.logger.propagate = False
+        self.last_counterexample = None  # assignment that refuted the last tautology or equivalence check
+        self.table = None  # cached ColumnarTable, extended as variables and expressions are added
+        self.table_stats = {'hits': 0, 'misses': 0, 'extensions': 0}
+        self.node_limit = 1000000  # decision diagram size after which checks enumerate the table instead
+        self.workers = None  # processes for sharded evaluation; None uses every CPU
+        self.shard_row_limit = SHARD_ROW_LIMIT  # rows searched at most when a decision diagram is too large
+        self.executor = None  # process pool for sharded searches, started on first use
+        self.manager = None  # shares the progress of a sharded search with its workers
+        self.executor_lock = threading.Lock()  # checks may run in several threads at once
+        self.beliefs = open_belief_store()  # ./memory/truth/beliefs.db, in place of a file per belief
+        # Logs go to ./mindx/errors/log.txt and ./memory/truth/logs.txt through the shared log pipeline thread
+        self.logger = configure_logger('LogicTables', [
+            ('./mindx/errors/log.txt', None),
+            ('./memory/truth/logs.txt', None),
+        ], propagate=False)
 
     def log(self, message, level='info'):
         if level == 'info':
@@ -43,26 +46,6 @@ class LogicTables:
             self.logger.error(message)
         elif level == 'warning':
             self.logger.warning(message)
-        self.store_log_in_mindx(message, level)
-        self.store_log_in_memory(message, level)
-
-    def store_log_in_mindx(self, message, level):
-        general_log_path = './mindx/errors/log.txt'
-
-        # Ensure the directory exists
-        pathlib.Path(general_log_path).parent.mkdir(parents=True, exist_ok=True)
-
-        with open(general_log_path, 'a') as file:
-            file.write(f"{level.upper()}: {message}\n")
-
-    def store_log_in_memory(self, message, level):
-        memory_log_path = './memory/truth/logs.txt'
-
-        # Ensure the directory exists
-        pathlib.Path(memory_log_path).parent.mkdir(parents=True, exist_ok=True)
-
-        with open(memory_log_path, 'a') as file:
-            file.write(f"{level.upper()}: {message}\n")
 
     def add_variable(self, var):
         if var not in self.variables:
@@ -81,55 +64,120 @@ class LogicTables:
             self.log(f"Expression {expr} already exists.", level='warning')
 
     def output_belief(self, belief):
-        belief_path = './memory/truth'
-
-        # Ensure the directory exists
-        pathlib.Path(belief_path).mkdir(parents=True, exist_ok=True)
-
-        belief_file = f"{belief_path}/{datetime.datetime.now().isoformat()}_belief.txt"
-        with open(belief_file, 'w') as file:
-            file.write(belief)
+        # One row in the belief store; see belief_store.migrate for the old *_belief.txt files
+        return self.beliefs.add(belief, source='logic')
 
     def evaluate_expression(self, expr, values):
-        allowed_operators = {
-            'and': lambda x, y: x and y,
-            'or': lambda x, y: x or y,
-            'not': lambda x: not x,
-            'xor': lambda x, y: x ^ y,
-            'nand': lambda x, y: not (x and y),
-            'nor': lambda x, y: not (x or y),
-            'implication': lambda x, y: not x or y
-        }
-
+        # Expressions are parsed once and cached as closures; nothing is passed to eval
         try:
-            result = eval(expr, {"__builtins__": None}, {**allowed_operators, **values})
+            result = compile_expression(expr)(values)
             self.log(f"Evaluated expression '{expr}' with values {values}: {result}")
             return result
-        except Exception as e:
+        except (ExpressionError, KeyError) as e:
             self.log(f"Error evaluating expression '{expr}': {e}", level='error')
             return False
 
-    def generate_truth_table(self):
-        n = len(self.variables)
-        combinations = list(itertools.product([True, False], repeat=n))
-        truth_table = []
+    def log_table_errors(self, table):
+        for expr, error in table.errors.items():
+            self.log(f"Error evaluating expression '{expr}': {error}", level='error')
+
+    def cached_table(self):
+        """
+        Returns the columnar table of the current variables and expressions, or None when it
+        has more than TABLE_CACHE_ROWS rows.
+
+        The cached table is kept while self.variables and self.expressions extend what it was
+        built from: new variables double its rows and new expressions add a column, without
+        evaluating the other columns again. Any other change rebuilds it.
+        """
+        if table_rows(self.variables) > TABLE_CACHE_ROWS:
+            self.table = None
+            return None
+        table = self.table
+        if (table is None or self.variables[:len(table.variables)] != table.variables or
+                self.expressions[:len(table.expressions)] != table.expressions):
+            self.table_stats['misses'] += 1
+            table = build_table(self.variables, self.expressions)
+            self.log_table_errors(table)
+        elif len(table.variables) == len(self.variables) and len(table.expressions) == len(self.expressions):
+            self.table_stats['hits'] += 1
+            return table
+        else:
+            self.table_stats['extensions'] += 1
+            for variable in self.variables[len(table.variables):]:
+                table = extend_variable(table, variable)
+            for expr in self.expressions[len(table.expressions):]:
+                table = extend_expression(table, expr)
+                if expr in table.errors:
+                    self.log(f"Error evaluating expression '{expr}': {table.errors[expr]}", level='error')
+        self.table = table
+        return table
+
+    def get_table_stats(self):
+        stats = dict(self.table_stats)
+        stats['rows'] = self.table.rows if self.table is not None else 0
+        return stats
+
+    def _cached_for(self, expressions):
+        # The cached table if it holds every requested expression
+        table = self.cached_table()
+        if table is not None and (expressions is None or set(expressions) <= set(table.expressions)):
+            return table
+        return None
 
-        for combo in combinations:
-            values = {self.variables[i]: combo[i] for i in range(n)}
-            result = values.copy()
-            for expr in self.expressions:
-                result[expr] = self.evaluate_expression(expr, values)
-            truth_table.append(result)
+    def generate_columnar_table(self, expressions=None):
+        # Vectorized truth table: one boolean NumPy column per variable and expression
+        table = self._cached_for(expressions)
+        if table is not None:
+            return table if expressions is None else table.slice(0, table.rows, expressions)
+        table = build_table(self.variables, self.expressions if expressions is None else expressions)
+        self.log_table_errors(table)
+        return table
+
+    def iter_truth_table_chunks(self, chunk_rows=DEFAULT_CHUNK_ROWS, expressions=None):
+        """
+        Yields the truth table as ColumnarTables of chunk_rows rows: slices of the cached table,
+        or, past TABLE_CACHE_ROWS, chunks evaluated only when they are reached.
+        """
+        table = self._cached_for(expressions)
+        if table is not None:
+            for start in range(0, table.rows, chunk_rows):
+                yield table.slice(start, start + chunk_rows, expressions)
+            return
+        for chunk in iter_chunks(self.variables, self.expressions if expressions is None else expressions, chunk_rows):
+            if chunk.start == 0:  # every chunk has the same errors
+                self.log_table_errors(chunk)
+            yield chunk
+
+    def iter_truth_table(self, chunk_rows=DEFAULT_CHUNK_ROWS):
+        """
+        Yields the truth table one {name: bool} row at a time without building the whole table.
+        """
+        for chunk in self.iter_truth_table_chunks(chunk_rows):
+            yield from chunk.iter_rows()
+
+    def export_truth_table(self, path, format=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+        """
+        Streams the truth table to a CSV, JSON lines or binary file, chosen by format or by the
+        file suffix (.csv, .jsonl, .ttbl); see table_file.
+
+        Returns:
+            int: The number of rows written.
+        """
+        rows = export_table(path, self.iter_truth_table_chunks(chunk_rows), table_rows(self.variables), format)
+        self.log(f"Exported truth table with {rows} rows to {path}")
+        return rows
 
+    def generate_truth_table(self):
+        truth_table = self.generate_columnar_table().to_rows()
         self.log(f"Generated truth table with {len(truth_table)} rows")
         self.output_belief(f"Generated truth table with {len(truth_table)} rows")
         return truth_table
 
     def display_truth_table(self):
-        truth_table = self.generate_truth_table()
         headers = self.variables + self.expressions
         print("\t".join(headers))
-        for row in truth_table:
+        for row in self.iter_truth_table():
             print("\t".join(str(row[var]) for var in headers))
 
     def validate_truth(self, expression):
@@ -137,11 +185,12 @@ class LogicTables:
             self.log(f"Expression '{expression}' is not in the list of expressions.", level='warning')
             return False
 
-        truth_table = self.generate_truth_table()
-        for row in truth_table:
-            if not row[expression]:
-                self.log(f"Expression '{expression}' is not valid.")
-                return False
+        valid, self.last_counterexample = self.decide(check_tautology, [expression])
+        if valid is None:
+            return None
+        if not valid:
+            self.log(f"Expression '{expression}' is not valid.")
+            return False
 
         self.log(f"Expression '{expression}' is valid.")
         self.save_valid_truth(expression)
@@ -158,15 +207,102 @@ class LogicTables:
         self.log("Retrieving valid truths.")
         return self.valid_truths
 
+    def decide(self, check, expressions):
+        """
+        Runs a bdd check over the known variables, instead of enumerating all 2**n rows; if
+        the decision diagram grows too large, the table is searched by find_sharded instead,
+        up to shard_row_limit rows. Like the truth table, expressions that do not parse or use
+        unknown variables fail.
+
+        Returns:
+            tuple: (bool, assignment or None) as returned by the check, or (None, None) when
+            the table is too large to search.
+        """
+        try:
+            for expr in expressions:
+                unknown = [name for name in compile_expression(expr).variables if name not in self.variables]
+                if unknown:
+                    raise KeyError(", ".join(unknown))
+            return check(*expressions, self.variables, self.node_limit, self.find_sharded)
+        except (ExpressionError, KeyError) as e:
+            self.log(f"Error deciding {', '.join(repr(expr) for expr in expressions)}: {type(e).__name__}: {e}", level='error')
+            return False, None
+        except BDDTooLarge as e:
+            self.log(f"Undecided {', '.join(repr(expr) for expr in expressions)}: {e}", level='warning')
+            return None, None
+
+    def find_sharded(self, expression, want, variables):
+        """
+        Returns the first assignment under which expression equals want, or None, searching
+        index ranges of the truth table across worker processes.
+
+        Raises:
+            BDDTooLarge: If the table has more than shard_row_limit rows.
+        """
+        rows = table_rows(variables)
+        if rows > self.shard_row_limit:
+            raise BDDTooLarge(f"decision diagram exceeds {self.node_limit} nodes and the table's {rows} rows exceed {self.shard_row_limit}")
+        self.log(f"Decision diagram for '{expression}' exceeds {self.node_limit} nodes; searching {rows} rows", level='warning')
+        if (self.workers or os.cpu_count() or 1) == 1:
+            return find_sharded(variables, expression, want, 1)
+        with self.executor_lock:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(max_workers=self.workers)
+                self.manager = multiprocessing.Manager()
+        return find_sharded(variables, expression, want, self.workers, executor=self.executor, manager=self.manager)
+
+    def close(self):
+        """
+        Stops the worker processes of sharded searches, if any were started.
+        """
+        with self.executor_lock:
+            if self.executor is not None:
+                self.executor.shutdown(cancel_futures=True)
+                self.manager.shutdown()
+                self.executor = self.manager = None
+
+    def summarize_truth_table(self, expressions=None, workers=None):
+        """
+        Returns aggregates of the truth table, evaluated in shards across worker processes
+        without shipping rows back: per expression the count of True rows and the first False
+        and first True assignments; see sharded_table.summarize_sharded.
+        """
+        summary = summarize_sharded(self.variables, self.expressions if expressions is None else expressions,
+                                    workers or self.workers)
+        for expr, error in summary['errors'].items():
+            self.log(f"Error evaluating expression '{expr}': {error}", level='error')
+        self.log(f"Summarized truth table with {summary['rows']} rows")
+        return summary
+
     def tautology(self, expression):
-        truth_table = self.generate_truth_table()
-        for row in truth_table:
-            if not self.evaluate_expression(expression, row):
-                self.log(f"Expression '{expression}' is not a tautology.", level='info')
-                return False
+        holds, self.last_counterexample = self.decide(check_tautology, [expression])
+        if holds is None:
+            return None  # undecided, logged by decide
+        if not holds:
+            if self.last_counterexample is not None:
+                self.log(f"Expression '{expression}' is False for {self.last_counterexample}")
+            self.log(f"Expression '{expression}' is not a tautology.", level='info')
+            return False
         self.log(f"Expression '{expression}' is a tautology.", level='info')
         return True
 
+    def satisfiable(self, expression):
+        satisfiable, assignment = self.decide(check_satisfiable, [expression])
+        if satisfiable is None:
+            return None
+        self.log(f"Expression '{expression}' is {'satisfied by ' + str(assignment) if satisfiable else 'not satisfiable'}.")
+        return satisfiable
+
+    def equivalent(self, first, second):
+        equivalent, self.last_counterexample = self.decide(check_equivalent, [first, second])
+        if equivalent is None:
+            return None
+        if equivalent:
+            self.log(f"Expressions '{first}' and '{second}' are equivalent.")
+        else:
+            self.log(f"Expressions '{first}' and '{second}' are not equivalent: they differ for {self.last_counterexample}")
+        return equivalent
+
     def modus_ponens(self, fact1, fact2):
         if fact1['type'] == 'fact' and fact2['type'] == 'rule':
             if self.unify_variables(fact1, fact2):
@@ -5,16 +5,19 @@ import requests
 from typing import List, Tuple, Union
 
 class MachineDreamer:
-    def __init__(self, memory_bank: List[str], creativity_factor: float = 1.0, api_key: str = None):
+    def __init__(self, memory_bank: List[str], creativity_factor: float = 1.0, api_key: str = None,
+                 api_url: str = "https://api.example.com/language_model"):
         """
         Initialize the Machine Dreamer.
         :param memory_bank: A list of past experiences or data points.
         :param creativity_factor: A multiplier to adjust the randomness in idea generation.
         :param api_key: API key for the language model.
+        :param api_url: Endpoint of the language model, e.g. a local mock_llm_server for load tests.
         """
         self.memory_bank = self._validate_memory_bank(memory_bank)
         self.creativity_factor = self._validate_creativity_factor(creativity_factor)
         self.api_key = api_key or os.getenv('AI_MODEL_API_KEY')
+        self.api_url = api_url
         self.evaluation_metrics = {'relevance': 0.5, 'novelty': 0.5}
         self._setup_logging()
 
@@ -90,7 +93,7 @@ class MachineDreamer:
 
         try:
             response = requests.post(
-                "https://api.example.com/language_model",
+                self.api_url,
                 headers={"Authorization": f"Bearer {self.api_key}"},
                 json={"idea": idea},
                 timeout=10
@@ -15,6 +15,28 @@ def create_memory_folder():
     if not pathlib.Path(MEMORY_FOLDER).exists():
         pathlib.Path(MEMORY_FOLDER).mkdir(parents=True)
 
+def create_memory_folders():
+    # Create the memory folder and the sub folders used by reasoning and logic
+    for folder in ["stm", "logs", "truth"]:
+        pathlib.Path(MEMORY_FOLDER).joinpath(folder).mkdir(parents=True, exist_ok=True)
+
+def store_in_stm(dialog_entry):
+    # Save a dialog entry to short term memory as its own JSON file
+    create_memory_folders()
+    filename = f"{time.time_ns()}.json"
+    file_path = pathlib.Path(MEMORY_FOLDER).joinpath("stm", filename)
+    with open(file_path, "w", encoding="utf-8") as file:
+        ujson.dump({"instruction": dialog_entry.instruction, "response": dialog_entry.response}, file, ensure_ascii=False, indent=2)
+    return file_path
+
+def save_valid_truth(valid_truth):
+    # Append a validated truth to ./memory/truth/valid_truths.jsonl, one JSON object per line
+    create_memory_folders()
+    file_path = pathlib.Path(MEMORY_FOLDER).joinpath("truth", "valid_truths.jsonl")
+    with open(file_path, "a", encoding="utf-8") as file:
+        file.write(ujson.dumps(valid_truth, ensure_ascii=False) + "\n")
+    return file_path
+
 def save_conversation_memory(memory):
     # Create the folder if it doesn't exist
     create_memory_folder()
@@ -0,0 +1,189 @@
+# mock_llm_server.py
+import argparse
+import hashlib
+import logging
+import threading
+import time
+import uuid
+import ujson
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from fakechatter import FakeLLM, FakeLLMError, prompt_text
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    """
+    Serves the OpenAI chat completions API (plain and streaming) and the MachineDreamer
+    /language_model endpoint from the server's FakeLLM.
+    """
+    protocol_version = 'HTTP/1.1'  # keep-alive, like the real providers
+
+    def log_message(self, format, *args):
+        logging.debug("mock llm server: " + format % args)
+
+    def _send_json(self, status, payload, headers=None):
+        body = ujson.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return ujson.loads(self.rfile.read(length) or b'{}')
+
+    def do_GET(self):
+        if self.path.rstrip('/').endswith('/models'):
+            self._send_json(200, {"object": "list", "data": [{"id": self.server.model, "object": "model", "owned_by": "mock"}]})
+        else:
+            self._send_json(404, {"error": {"message": f"unknown path {self.path}", "type": "not_found"}})
+
+    def do_POST(self):
+        request = self._read_json()
+        if self.path.rstrip('/').endswith('/chat/completions'):
+            self._chat_completion(request)
+        elif self.path.rstrip('/').endswith('/language_model'):
+            self._language_model(request)
+        else:
+            self._send_json(404, {"error": {"message": f"unknown path {self.path}", "type": "not_found"}})
+
+    def _chat_completion(self, request):
+        llm = self.server.llm
+        time.sleep(llm.sample_latency())
+        try:
+            llm.check_error()
+        except FakeLLMError as e:
+            self._send_json(e.status_code, {"error": {"message": str(e), "type": "injected_error"}}, e.response.headers)
+            return
+
+        model = request.get("model") or self.server.model
+        reply = llm.reply(prompt_text(request.get("messages", [])))
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        if not request.get("stream"):
+            tokens = llm.tokens(reply)
+            self._send_json(200, {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": reply}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 0, "completion_tokens": len(tokens), "total_tokens": len(tokens)},
+            })
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+
+        def event(delta, finish_reason=None):
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            self.wfile.write(b"data: " + ujson.dumps(chunk).encode('utf-8') + b"\n\n")
+            self.wfile.flush()
+
+        delay = llm.token_delay()
+        event({"role": "assistant", "content": ""})
+        for token in llm.tokens(reply):
+            if delay:
+                time.sleep(delay)
+            event({"content": token})
+        event({}, "stop")
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+    def _language_model(self, request):
+        llm = self.server.llm
+        time.sleep(llm.sample_latency())
+        try:
+            llm.check_error()
+        except FakeLLMError as e:
+            self._send_json(e.status_code, {"error": str(e)}, e.response.headers)
+            return
+        digest = hashlib.sha256(str(request.get("idea", "")).encode('utf-8')).digest()
+        self._send_json(200, {"relevance_score": digest[0] / 255, "novelty_score": digest[1] / 255})
+
+class MockLLMServer(ThreadingHTTPServer):
+    """
+    Local OpenAI-compatible server for load testing without API keys.
+
+    Point GPT4o(api_key, base_url=server.base_url) or OllamaModel(base_url=server.base_url) at it,
+    or MachineDreamer(..., api_url=server.language_model_url).
+    """
+    daemon_threads = True
+
+    def __init__(self, host='127.0.0.1', port=0, llm=None, model='mock-model'):
+        super().__init__((host, port), MockLLMHandler)
+        self.llm = llm if llm is not None else FakeLLM()
+        self.model = model
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    @property
+    def language_model_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/language_model"
+
+    def start(self):
+        """
+        Serves requests from a background thread and returns the server.
+        """
+        self.thread = threading.Thread(target=self.serve_forever, name='mock-llm-server', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local OpenAI-compatible mock LLM server.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8008)
+    parser.add_argument('--latency', choices=['constant', 'uniform', 'lognormal'], default='lognormal')
+    parser.add_argument('--latency-params', type=float, nargs='+', default=[0.5, 0.5],
+                        help="constant: seconds; uniform: low high; lognormal: median sigma")
+    parser.add_argument('--tokens-per-second', type=float, default=50.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--error-status', type=int, default=500)
+    parser.add_argument('--retry-after', type=float, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    llm = FakeLLM(
+        latency=args.latency,
+        latency_params=tuple(args.latency_params),
+        tokens_per_second=args.tokens_per_second,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        retry_after=args.retry_after,
+        seed=args.seed,
+    )
+    server = MockLLMServer(args.host, args.port, llm)
+    print(f"Mock LLM server listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+# premise_store.py
+import re
+from collections.abc import MutableSequence
+
+ARTICLES = {'a', 'an', 'the'}
+
+def normalize(text):
+    """
+    Returns the text used to recognise a premise however it is cased, spaced or punctuated.
+    """
+    return " ".join(str(text).casefold().split()).rstrip('.!?;, ')
+
+def singular(word):
+    # Enough to line up "all humans are mortal" with "socrates is a human"
+    if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+        return word[:-1]
+    return word
+
+def _term(words, plural=True):
+    # Class names are singularized; names of individuals are kept as written
+    words = [word for word in words.split() if word not in ARTICLES]
+    return " ".join(singular(word) if plural else word for word in words)
+
+FACT_PATTERNS = [
+    # all humans are mortal / every human is mortal  ->  ('all', ('human', 'mortal'))
+    (re.compile(r'^(?:all|every|each) (.+?) (?:are|is) (.+)$'), lambda m: ('all', (_term(m[1]), _term(m[2])))),
+    # no humans are gods  ->  ('no', ('human', 'god'))
+    (re.compile(r'^no (.+?) (?:are|is) (.+)$'), lambda m: ('no', (_term(m[1]), _term(m[2])))),
+    # socrates is a human  ->  ('human', ('socrates',))
+    (re.compile(r'^(.+?) is (?:a|an) (.+)$'), lambda m: (_term(m[2]), (_term(m[1], False),))),
+    # socrates is mortal  ->  ('mortal', ('socrates',))
+    (re.compile(r'^(.+?) is (.+)$'), lambda m: (_term(m[2]), (_term(m[1], False),))),
+    # human(socrates) / likes(socrates, plato)
+    (re.compile(r'^(\w+)\s*\((.*)\)$'),
+     lambda m: (singular(m[1]), tuple(_term(arg, False) for arg in m[2].split(',') if arg.strip()))),
+]
+
+def parse_fact(premise):
+    """
+    Parses a premise into a (relation, arguments) fact, or returns None for free text.
+
+    Accepts simple sentences ("All humans are mortal.", "Socrates is a human."), call form
+    ("human(socrates)") and LogicTables fact dicts with 'relation' and 'arguments'. Different
+    phrasings of the same fact give the same result.
+
+    Args:
+        premise: The premise text or fact dict.
+
+    Returns:
+        tuple: (relation, arguments) or None.
+    """
+    if isinstance(premise, dict):
+        relation = premise.get('relation')
+        if isinstance(relation, (list, tuple)):
+            relation = " ".join(str(part) for part in relation)
+        return (normalize(relation), tuple(normalize(arg) for arg in premise.get('arguments', ())))
+    text = normalize(premise)
+    for pattern, build in FACT_PATTERNS:
+        match = pattern.match(text)
+        if match:
+            return build(match)
+    return None
+
+class PremiseStore(MutableSequence):
+    """
+    List of premises with hash indexes, so membership, removal and equivalence lookups do not
+    scan the whole list.
+
+    Every premise gets an ID that stays the same for as long as it is stored. Premises are indexed
+    by normalized text and, when they parse as a fact, by (relation, arguments), by relation and
+    by argument. The store behaves like a list of premise strings: it keeps insertion order and
+    duplicates, and compares equal to a list with the same premises.
+    """
+
+    def __init__(self, premises=()):
+        self._order = []  # IDs in insertion order, including removed ones until the next compaction
+        self._texts = {}  # ID -> premise
+        self._next_id = 0
+        self._by_text = {}  # normalized text -> IDs
+        self._by_fact = {}  # (relation, arguments) -> IDs
+        self._by_relation = {}  # relation -> IDs
+        self._by_argument = {}  # argument -> IDs
+        for premise in premises:
+            self.append(premise)
+
+    @staticmethod
+    def _index(index, key, premise_id):
+        index.setdefault(key, {})[premise_id] = None  # dict as an ordered set
+
+    @staticmethod
+    def _unindex(index, key, premise_id):
+        ids = index.get(key)
+        if ids is not None:
+            ids.pop(premise_id, None)
+            if not ids:
+                del index[key]
+
+    def _keys(self, premise):
+        fact = parse_fact(premise)
+        keys = [(self._by_text, normalize(premise))]
+        if fact is not None:
+            relation, arguments = fact
+            keys.append((self._by_fact, fact))
+            keys.append((self._by_relation, relation))
+            keys.extend((self._by_argument, argument) for argument in set(arguments))
+        return keys
+
+    def add(self, premise):
+        """
+        Appends a premise and returns its ID.
+        """
+        premise_id = self._next_id
+        self._next_id += 1
+        self._order.append(premise_id)
+        self._texts[premise_id] = premise
+        for index, key in self._keys(premise):
+            self._index(index, key, premise_id)
+        return premise_id
+
+    def append(self, premise):
+        self.add(premise)
+
+    def remove_id(self, premise_id):
+        """
+        Removes the premise with an ID and returns it.
+        """
+        premise = self._texts.pop(premise_id)
+        for index, key in self._keys(premise):
+            self._unindex(index, key, premise_id)
+        if len(self._order) > 2 * len(self._texts) + 32:
+            self._compact()
+        return premise
+
+    def _compact(self):
+        if len(self._order) != len(self._texts):
+            self._order = [premise_id for premise_id in self._order if premise_id in self._texts]
+
+    def get(self, premise_id):
+        return self._texts.get(premise_id)
+
+    def ids(self):
+        return [premise_id for premise_id in self._order if premise_id in self._texts]
+
+    def find(self, premise):
+        """
+        Returns the IDs of the premises with the same normalized text.
+        """
+        return list(self._by_text.get(normalize(premise), ()))
+
+    def id_of(self, premise):
+        """
+        Returns the ID of the first premise exactly equal to premise, or None.
+        """
+        for premise_id in self._by_text.get(normalize(premise), ()):
+            if self._texts[premise_id] == premise:
+                return premise_id
+        return None
+
+    def equivalents(self, premise):
+        """
+        Returns the IDs of the premises equivalent to premise: the same normalized text, or the
+        same parsed fact.
+        """
+        ids = dict(self._by_text.get(normalize(premise), {}))
+        fact = parse_fact(premise)
+        if fact is not None:
+            ids.update(self._by_fact.get(fact, {}))
+        return sorted(ids)
+
+    def with_relation(self, relation):
+        return [self._texts[premise_id] for premise_id in self._by_relation.get(relation, ())]
+
+    def with_argument(self, argument):
+        return [self._texts[premise_id] for premise_id in self._by_argument.get(argument, ())]
+
+    def facts(self):
+        """
+        Returns the (relation, arguments) facts of the premises that parse as one.
+        """
+        return list(self._by_fact)
+
+    # list interface
+
+    def __len__(self):
+        return len(self._texts)
+
+    def __iter__(self):
+        return (self._texts[premise_id] for premise_id in self._order if premise_id in self._texts)
+
+    def __contains__(self, premise):
+        return self.id_of(premise) is not None
+
+    def __getitem__(self, index):
+        self._compact()
+        if isinstance(index, slice):
+            return [self._texts[premise_id] for premise_id in self._order[index]]
+        return self._texts[self._order[index]]
+
+    def __setitem__(self, index, value):
+        premises = list(self)
+        premises[index] = value
+        self._rebuild(premises)
+
+    def __delitem__(self, index):
+        self._compact()
+        ids = self._order[index] if isinstance(index, slice) else [self._order[index]]
+        for premise_id in list(ids):
+            self.remove_id(premise_id)
+        self._compact()
+
+    def insert(self, index, premise):
+        premises = list(self)
+        premises.insert(index, premise)
+        self._rebuild(premises)
+
+    def remove(self, premise):
+        premise_id = self.id_of(premise)
+        if premise_id is None:
+            raise ValueError(f"{premise!r} is not in the premise store")
+        self.remove_id(premise_id)
+
+    def clear(self):
+        self.__init__()
+
+    def _rebuild(self, premises):
+        # Positional edits are rare; premises that stay keep their IDs
+        kept = {}
+        for premise_id in self.ids():
+            kept.setdefault(self._texts[premise_id], []).append(premise_id)
+        next_id = self._next_id
+        self.__init__()
+        self._next_id = next_id
+        for premise in premises:
+            reusable = kept.get(premise)
+            if not reusable:
+                self.add(premise)
+                continue
+            premise_id = reusable.pop(0)
+            self._order.append(premise_id)
+            self._texts[premise_id] = premise
+            for index, key in self._keys(premise):
+                self._index(index, key, premise_id)
+
+    def __eq__(self, other):
+        if isinstance(other, (PremiseStore, list)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return repr(list(self))
@@ -0,0 +1,125 @@
+# prompt_state.py
+
+# Per-message framing added by chat APIs on top of the content tokens
+MESSAGE_OVERHEAD = 4
+
+def estimate_tokens(text):
+    """
+    Estimates the number of tokens in a text, at roughly four characters per token.
+    """
+    return (len(str(text)) + 3) // 4
+
+def message_tokens(message):
+    return estimate_tokens(message["content"]) + MESSAGE_OVERHEAD
+
+class PromptState:
+    """
+    Keeps a reasoning conversation as a list of chat turns that only ever grows at the end.
+
+    Premises given by the user are user turns and premises generated by the model are assistant
+    turns, after a fixed system message. Successive requests therefore share a byte-identical
+    prefix and differ only by the turns appended since the last one, which lets providers with
+    prefix caching and Ollama reuse the work done for the earlier turns instead of reprocessing
+    one ever longer prompt string.
+
+    Every request is recorded with the total prompt tokens sent and the tokens that are new since
+    the previous request, per conclusion, so the saving can be measured.
+    """
+
+    def __init__(self, system_prompt=""):
+        """
+        Initializes an empty conversation.
+
+        Args:
+            system_prompt: Content of the system message that starts every request.
+        """
+        self.system_prompt = system_prompt
+        self.turns = []
+        self.sent = []  # messages of the previous request
+        self.stats = self._empty_stats()
+        self.history = []  # stats of every finished conclusion
+
+    @staticmethod
+    def _empty_stats():
+        return {'requests': 0, 'prompt_tokens': 0, 'new_tokens': 0}
+
+    def add_user(self, content):
+        self.turns.append({"role": "user", "content": f"{content}"})
+
+    def add_assistant(self, content):
+        self.turns.append({"role": "assistant", "content": f"{content}"})
+
+    def sync(self, premises):
+        """
+        Matches the turns to a list of premises. Turns that still agree with the premises keep
+        their role; the first mismatch drops the rest of the conversation, and premises past it
+        are appended as user turns.
+
+        Args:
+            premises: The premises in order.
+        """
+        keep = 0
+        for turn, premise in zip(self.turns, premises):
+            if turn["content"] != f"{premise}":
+                break
+            keep += 1
+        del self.turns[keep:]
+        for premise in premises[keep:]:
+            self.add_user(premise)
+
+    def messages(self, *extra_turns):
+        """
+        Returns the messages for the next request: the system message, every turn, then any
+        extra turns that belong to this request only.
+
+        Args:
+            extra_turns: (role, content) pairs appended after the conversation.
+
+        Returns:
+            list: Chat messages, accepted as knowledge by Chatter.generate_response.
+        """
+        messages = [{"role": "system", "content": self.system_prompt}] + [dict(turn) for turn in self.turns]
+        messages.extend({"role": role, "content": f"{content}"} for role, content in extra_turns)
+        return messages
+
+    def record(self, messages):
+        """
+        Counts a request: all of its prompt tokens, and the tokens after the prefix it shares
+        with the previous request.
+
+        Args:
+            messages: The messages being sent.
+        """
+        shared = 0
+        for previous, message in zip(self.sent, messages):
+            if previous != message:
+                break
+            shared += 1
+        self.sent = messages
+        self.stats['requests'] += 1
+        self.stats['prompt_tokens'] += sum(message_tokens(message) for message in messages)
+        self.stats['new_tokens'] += sum(message_tokens(message) for message in messages[shared:])
+
+    def end_conclusion(self):
+        """
+        Closes the token accounting for one conclusion and starts a fresh conversation.
+
+        Returns:
+            dict: Requests, total prompt tokens and new prompt tokens of the conclusion.
+        """
+        stats = self.stats
+        self.history.append(stats)
+        self.stats = self._empty_stats()
+        self.turns = []
+        self.sent = []
+        return stats
+
+    def get_stats(self):
+        """
+        Returns the counters of the conclusion in progress and the totals over finished ones.
+        """
+        totals = self._empty_stats()
+        for stats in self.history:
+            for name in totals:
+                totals[name] += stats[name]
+        return {'current': dict(self.stats), 'conclusions': len(self.history), 'totals': totals}
@@ -0,0 +1,290 @@
+# ratelimit.py
+import asyncio
+import logging
+import random
+import time
+from email.utils import parsedate_to_datetime
+from chatter import ChatterWrapper, iterate_on_loop, run_on_loop
+
+# Default request rates (requests per second) and burst sizes per provider
+DEFAULT_RATES = {'openai': (8.0, 16), 'groq': (4.0, 8), 'ollama': (50.0, 50)}
+FALLBACK_RATE = (4.0, 8)
+
+def retry_after(error):
+    """
+    Returns the delay in seconds requested by a Retry-After header on an API error, or None.
+    """
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if not headers:
+        return None
+    milliseconds = headers.get('retry-after-ms')
+    if milliseconds:
+        try:
+            return float(milliseconds) / 1000
+        except ValueError:
+            pass
+    value = headers.get('retry-after')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def classify_error(error):
+    """
+    Classifies a provider error as 'throttled' (429), 'retryable' (5xx, timeouts, connection
+    problems) or 'fatal' (anything else, such as bad requests or authentication errors).
+    """
+    status = getattr(error, 'status_code', None)
+    if status == 429:
+        return 'throttled'
+    if status is not None:
+        return 'retryable' if status >= 500 else 'fatal'
+    names = {cls.__name__ for cls in type(error).__mro__}
+    if names & {'APIConnectionError', 'APITimeoutError', 'TimeoutError', 'ConnectionError'}:
+        return 'retryable'
+    return 'fatal'
+
+class TokenBucket:
+    """
+    Token bucket limiting the request rate, with support for pausing after a Retry-After.
+    """
+
+    def __init__(self, rate, capacity):
+        """
+        Args:
+            rate: Tokens added per second.
+            capacity: Maximum number of tokens, i.e. the burst size.
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def pause(self, seconds):
+        """
+        Stops handing out tokens for the given number of seconds.
+        """
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0.0
+
+    async def acquire(self):
+        """
+        Waits until a token is available and takes it. Returns the number of seconds waited.
+        """
+        waited = 0.0
+        while True:
+            now = time.monotonic()
+            if now < self.paused_until:
+                delay = self.paused_until - now
+            else:
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            waited += delay
+            await asyncio.sleep(delay)
+
+class AIMDLimiter:
+    """
+    Concurrency limit that grows additively while requests succeed and halves when throttled.
+    """
+
+    def __init__(self, initial=4, minimum=1, maximum=64, increase=1.0, decrease=0.5):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease = decrease
+        self.inflight = 0
+        self.condition = None  # created on the chatter loop
+
+    async def acquire(self):
+        if self.condition is None:
+            self.condition = asyncio.Condition()
+        async with self.condition:
+            await self.condition.wait_for(lambda: self.inflight < int(self.limit))
+            self.inflight += 1
+
+    async def release(self, throttled=False):
+        async with self.condition:
+            self.inflight -= 1
+            if throttled:
+                self.limit = max(self.minimum, self.limit * self.decrease)
+            else:
+                # Roughly +increase per round of limit successful requests
+                self.limit = min(self.maximum, self.limit + self.increase / self.limit)
+            self.condition.notify_all()
+
+class RetryPolicy:
+    """
+    Jittered exponential backoff: attempt n waits a random time up to base * 2**n, capped.
+    """
+
+    def __init__(self, max_retries=4, base=0.5, cap=30.0):
+        self.max_retries = max_retries
+        self.base = base
+        self.cap = cap
+
+    def delay(self, attempt, error=None):
+        requested = retry_after(error) if error is not None else None
+        backoff = random.uniform(0, min(self.cap, self.base * 2 ** attempt))
+        if requested is not None:
+            return max(requested, backoff)
+        return backoff
+
+class ProviderLimits:
+    """
+    Rate and concurrency state for one provider and API key.
+    """
+
+    def __init__(self, name, rate, capacity, concurrency):
+        self.name = name
+        self.bucket = TokenBucket(rate, capacity)
+        self.concurrency = AIMDLimiter(initial=concurrency)
+        self.stats = {'requests': 0, 'throttled': 0, 'retries': 0, 'failures': 0, 'waited': 0.0}
+
+    def snapshot(self):
+        stats = dict(self.stats)
+        stats['waited'] = round(stats['waited'], 3)
+        stats.update({
+            'rate': self.bucket.rate,
+            'tokens': round(self.bucket.tokens, 2),
+            'paused_for': round(max(0.0, self.bucket.paused_until - time.monotonic()), 3),
+            'concurrency_limit': int(self.concurrency.limit),
+            'inflight': self.concurrency.inflight,
+        })
+        return stats
+
+class RateLimiter:
+    """
+    Registry of ProviderLimits shared by every RateLimitedChatter using the same provider and key.
+    """
+
+    def __init__(self, rates=None, concurrency=4):
+        self.rates = rates or DEFAULT_RATES
+        self.concurrency = concurrency
+        self.limits = {}
+
+    def get(self, name, provider):
+        if name not in self.limits:
+            rate, capacity = self.rates.get(provider, FALLBACK_RATE)
+            self.limits[name] = ProviderLimits(name, rate, capacity, self.concurrency)
+        return self.limits[name]
+
+    def get_stats(self):
+        """
+        Returns current limits and throttle counters for every provider and key.
+        """
+        return {name: limits.snapshot() for name, limits in self.limits.items()}
+
+default_limiter = RateLimiter()
+
+class RateLimitedChatter(ChatterWrapper):
+    """
+    Applies the shared rate limiter to a chatter and retries throttled or failed requests with
+    jittered exponential backoff, honoring Retry-After headers. Streams are limited the same way
+    and retried until their first chunk arrives.
+    """
+
+    def __init__(self, chatter, limiter=None, key=None, retry=None):
+        """
+        Args:
+            chatter: The chatter to protect.
+            limiter: The RateLimiter to use, shared by default.
+            key: Name of the bucket, e.g. to separate API keys; defaults to the provider.
+            retry: The RetryPolicy, or None for the default one.
+        """
+        super().__init__(chatter)
+        self.limiter = limiter or default_limiter
+        self.key = key or chatter.provider
+        self.retry = retry or RetryPolicy()
+
+    async def acomplete(self, knowledge, model=None, **options):
+        return await run_on_loop(self._acomplete(knowledge, model, **options))
+
+    def _backoff(self, limits, error, attempt):
+        # Returns the delay before retrying a failed request, or re-raises the error when it is
+        # fatal or the retries are used up
+        kind = classify_error(error)
+        if kind == 'fatal' or attempt >= self.retry.max_retries:
+            limits.stats['failures'] += 1
+            raise error
+        delay = self.retry.delay(attempt, error)
+        if kind == 'throttled':
+            limits.stats['throttled'] += 1
+            limits.bucket.pause(delay)
+        limits.stats['retries'] += 1
+        logging.warning(f"{self.key} request failed ({kind}: {error}); retrying in {delay:.2f}s")
+        return delay
+
+    async def _acomplete(self, knowledge, model=None, **options):
+        limits = self.limiter.get(self.key, self.chatter.provider)
+        attempt = 0
+        while True:
+            limits.stats['waited'] += await limits.bucket.acquire()
+            await limits.concurrency.acquire()
+            limits.stats['requests'] += 1
+            throttled = False
+            try:
+                return await self.chatter.acomplete(knowledge, model, **options)
+            except Exception as e:
+                throttled = classify_error(e) == 'throttled'
+                delay = self._backoff(limits, e, attempt)
+            finally:
+                await limits.concurrency.release(throttled)
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def astream(self, knowledge, model=None, **options):
+        async for chunk in iterate_on_loop(self._astream(knowledge, model, **options)):
+            yield chunk
+
+    async def _astream(self, knowledge, model=None, **options):
+        # A stream takes a token and holds a concurrency slot until it ends. It is retried only
+        # while nothing has been delivered to the caller, as RouterChatter fails over
+        limits = self.limiter.get(self.key, self.chatter.provider)
+        attempt = 0
+        while True:
+            limits.stats['waited'] += await limits.bucket.acquire()
+            await limits.concurrency.acquire()
+            limits.stats['requests'] += 1
+            throttled = False
+            stream = self.chatter.astream(knowledge, model, **options)
+            try:
+                try:
+                    first = await stream.__anext__()
+                except StopAsyncIteration:
+                    return
+                except Exception as e:
+                    throttled = classify_error(e) == 'throttled'
+                    delay = self._backoff(limits, e, attempt)
+                else:
+                    try:
+                        yield first
+                        async for chunk in stream:
+                            yield chunk
+                    except Exception:
+                        limits.stats['failures'] += 1
+                        raise
+                    return
+            finally:
+                await stream.aclose()
+                await limits.concurrency.release(throttled)
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    def get_stats(self):
+        return self.limiter.get(self.key, self.chatter.provider).snapshot()
@@ -1,10 +1,11 @@
 # reasoning.py
 import logging
 from chatter import GPT4o, GroqModel, OllamaModel
+from premise_store import PremiseStore
 
 class Reasoning:
     def __init__(self, chatter):
-        self.premises = []
+        self.premises = PremiseStore()
         self.logger = logging.getLogger('Reasoning')
         self.logger.setLevel(logging.INFO)
         self.max_tokens = 100
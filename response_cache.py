@@ -0,0 +1,262 @@
+# response_cache.py
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from chatter import ChatterWrapper
+
+# Disk hits are recorded in memory and written to the accessed_at column this many at a time
+TOUCH_BATCH = 64
+
+class ResponseCache:
+    """
+    Two-tier cache for chatter responses: an in-memory LRU in front of a SQLite file under ./memory/.
+    """
+
+    def __init__(self, path='./memory/cache/responses.db', max_entries=1024, max_disk_bytes=64 * 1024 * 1024, ttl=7 * 24 * 3600):
+        """
+        Initializes the response cache.
+
+        Args:
+            path: Location of the SQLite file, or None to keep the cache in memory only.
+            max_entries: Maximum number of responses held in the in-memory LRU tier.
+            max_disk_bytes: Maximum total size of responses kept in the SQLite tier.
+            ttl: Number of seconds a response stays valid, or None to never expire. With 0 or
+                less, responses expire at once and are not stored.
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl = ttl
+        self.memory = OrderedDict()  # key -> (response, expires_at)
+        self.touched = {}  # key -> accessed_at of disk hits not yet written
+        self.disk_bytes = 0  # total size of the responses in the SQLite tier
+        self.memory_lock = threading.Lock()  # guards the LRU tier only, so lookups on the event loop never wait for disk I/O
+        self.lock = threading.Lock()  # guards the SQLite tier; taken before memory_lock when both are held
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0, 'expired': 0}
+
+        self.db = None
+        if path:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            self.db = sqlite3.connect(path, check_same_thread=False)
+            # WAL with synchronous=NORMAL keeps a commit per response cheap
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("PRAGMA synchronous=NORMAL")
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, size INTEGER NOT NULL, "
+                "expires_at REAL, accessed_at REAL NOT NULL)"
+            )
+            self.db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+            self.db.commit()
+            self.disk_bytes = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def _get_memory(self, key, now):
+        with self.memory_lock:
+            entry = self.memory.get(key)
+            if entry is None:
+                return None
+            response, expires_at = entry
+            if expires_at is None or expires_at > now:
+                self.memory.move_to_end(key)
+                self.stats['memory_hits'] += 1
+                return response
+            del self.memory[key]
+            self.stats['expired'] += 1
+            return None
+
+    def peek(self, key):
+        """
+        Looks up a response in the memory tier only, which does no I/O and never waits for the
+        disk tier; a response not found there is not counted as a miss.
+
+        Args:
+            key: The request key.
+
+        Returns:
+            str: The cached response, or None.
+        """
+        return self._get_memory(key, time.time())
+
+    def get(self, key):
+        """
+        Looks up a response, checking the memory tier first and then the disk tier.
+
+        Args:
+            key: The request key.
+
+        Returns:
+            str: The cached response, or None on a miss.
+        """
+        now = time.time()
+        response = self._get_memory(key, now)
+        if response is not None:
+            return response
+        with self.lock:
+            if self.db is not None:
+                row = self.db.execute("SELECT response, size, expires_at FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    response, size, expires_at = row
+                    if expires_at is None or expires_at > now:
+                        self.touched[key] = now
+                        if len(self.touched) >= TOUCH_BATCH:
+                            self._flush_touches()
+                            self.db.commit()
+                        self._remember(key, response, expires_at)
+                        with self.memory_lock:
+                            self.stats['disk_hits'] += 1
+                        return response
+                    self.db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self.db.commit()
+                    self.touched.pop(key, None)
+                    self.disk_bytes -= size
+                    with self.memory_lock:
+                        self.stats['expired'] += 1
+
+        with self.memory_lock:
+            self.stats['misses'] += 1
+        return None
+
+    def set(self, key, response):
+        """
+        Stores a response in both tiers.
+
+        Args:
+            key: The request key.
+            response: The response text.
+        """
+        now = time.time()
+        expires_at = now + self.ttl if self.ttl is not None else None
+        if expires_at is not None and expires_at <= now:
+            return  # already expired
+        size = len(response.encode('utf-8'))
+        self._remember(key, response, expires_at)
+        with self.lock:
+            if self.db is not None:
+                replaced = self.db.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+                self.db.execute(
+                    "INSERT OR REPLACE INTO responses (key, response, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, response, size, expires_at, now)
+                )
+                self.touched.pop(key, None)
+                self.disk_bytes += size - (replaced[0] if replaced else 0)
+                self._evict_disk()
+                self.db.commit()
+
+    def _remember(self, key, response, expires_at):
+        with self.memory_lock:
+            self.memory[key] = (response, expires_at)
+            self.memory.move_to_end(key)
+            while len(self.memory) > self.max_entries:
+                self.memory.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def _flush_touches(self):
+        self.db.executemany("UPDATE responses SET accessed_at = ? WHERE key = ?",
+                            [(accessed_at, key) for key, accessed_at in self.touched.items()])
+        self.touched.clear()
+
+    def _evict_disk(self):
+        if self.disk_bytes <= self.max_disk_bytes:
+            return
+        self._flush_touches()  # eviction goes by accessed_at
+        self.db.execute("DELETE FROM responses WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),))
+        # Drop least recently used responses until the tier is back under 90% of its budget
+        target = int(self.max_disk_bytes * 0.9)
+        rows = self.db.execute("SELECT key, size FROM responses ORDER BY accessed_at DESC").fetchall()
+        kept = 0
+        stale = []
+        for key, size in rows:
+            if stale or kept + size > target:
+                stale.append((key,))
+            else:
+                kept += size
+        self.db.executemany("DELETE FROM responses WHERE key = ?", stale)
+        self.disk_bytes = kept
+        with self.memory_lock:
+            self.stats['evictions'] += len(stale)
+        logging.info(f"response cache evicted {len(stale)} entries from disk")
+
+    def clear(self):
+        """
+        Removes every response from both tiers.
+        """
+        with self.memory_lock:
+            self.memory.clear()
+        with self.lock:
+            self.touched.clear()
+            if self.db is not None:
+                self.db.execute("DELETE FROM responses")
+                self.db.commit()
+                self.disk_bytes = 0
+
+    def get_stats(self):
+        """
+        Returns hit/miss counters along with the current size of each tier.
+        """
+        with self.memory_lock:
+            stats = dict(self.stats)
+            stats['memory_entries'] = len(self.memory)
+        with self.lock:
+            stats['disk_entries'] = self.db.execute("SELECT COUNT(*) FROM responses").fetchone()[0] if self.db is not None else 0
+            stats['disk_bytes'] = self.disk_bytes
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['memory_hits'] + stats['disk_hits']) / lookups if lookups else 0.0
+        return stats
+
+    def close(self):
+        with self.lock:
+            if self.db is not None:
+                if self.touched:
+                    self._flush_touches()
+                    self.db.commit()
+                self.db.close()
+                self.db = None
+
+class CachedChatter(ChatterWrapper):
+    """
+    Serves repeated prompts from a ResponseCache instead of calling the wrapped chatter.
+    Pass use_cache=False to generate_response to bypass the cache for a single call.
+    """
+
+    def __init__(self, chatter, cache=None):
+        super().__init__(chatter)
+        self.cache = cache if cache is not None else ResponseCache()
+
+    async def _lookup(self, key):
+        # Memory hits are answered on the loop; the disk tier is read in a worker thread
+        response = self.cache.peek(key)
+        if response is None:
+            response = await asyncio.to_thread(self.cache.get, key)
+        return response
+
+    async def acomplete(self, knowledge, model=None, use_cache=True, **options):
+        if not use_cache:
+            return await self.chatter.acomplete(knowledge, model, **options)
+        key = self.request_key(knowledge, model)
+        response = await self._lookup(key)
+        if response is None:
+            response = await self.chatter.acomplete(knowledge, model, **options)
+            if response is not None:
+                await asyncio.to_thread(self.cache.set, key, response)
+        return response
+
+    async def astream(self, knowledge, model=None, use_cache=True, **options):
+        if not use_cache:
+            async for chunk in self.chatter.astream(knowledge, model, **options):
+                yield chunk
+            return
+        key = self.request_key(knowledge, model)
+        response = await self._lookup(key)
+        if response is not None:
+            yield response
+            return
+        chunks = []
+        async for chunk in self.chatter.astream(knowledge, model, **options):
+            chunks.append(chunk)
+            yield chunk
+        # Only a stream that ran to completion is worth caching
+        await asyncio.to_thread(self.cache.set, key, "".join(chunks))
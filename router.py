@@ -0,0 +1,231 @@
+# router.py
+import asyncio
+import logging
+import time
+from collections import deque
+from chatter import Chatter, iterate_on_loop, run_on_loop
+
+class RollingLatency:
+    """
+    Keeps the latencies and outcomes of the most recent requests to a backend.
+    """
+
+    def __init__(self, window=50):
+        """
+        Args:
+            window: Number of recent requests to remember.
+        """
+        self.latencies = deque(maxlen=window)  # latencies of successful requests
+        self.outcomes = deque(maxlen=window)  # True for success, False for failure
+
+    def record(self, latency, ok=True):
+        self.outcomes.append(ok)
+        if ok:
+            self.latencies.append(latency)
+
+    def percentile(self, q):
+        """
+        Returns the q-th percentile (0-100) of recent successful latencies, or None without data.
+        """
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def error_rate(self):
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    def __len__(self):
+        return len(self.outcomes)
+
+class Backend:
+    """
+    A chatter and model pair tracked by the router.
+    """
+
+    def __init__(self, chatter, model=None, window=50):
+        self.chatter = chatter
+        self.model = model or chatter.default_model
+        self.name = f"{chatter.provider}/{self.model}"
+        self.stats = RollingLatency(window)
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+        self.probing = False  # a request is testing whether the backend has recovered
+
+    def record(self, latency, ok, cooldown):
+        self.requests += 1
+        if self.probing:
+            self.probing = False
+            if ok:
+                self.stats.outcomes.clear()  # recovered: the errors before the probe no longer count
+        self.stats.record(latency, ok)
+        if ok:
+            self.consecutive_failures = 0
+        else:
+            self.failures += 1
+            self.consecutive_failures += 1
+            # Back off exponentially from a backend that keeps failing
+            self.cooldown_until = time.monotonic() + cooldown * 2 ** min(self.consecutive_failures - 1, 5)
+
+class RouterChatter(Chatter):
+    """
+    Routes each request to the fastest healthy backend and fails over to the next one on
+    errors or timeouts. Backends can be chatters or (chatter, model) pairs.
+
+    A backend whose recent error rate is too high is skipped until its cooldown ends and then
+    half-open: one request probes it, and if that succeeds its error window starts afresh.
+    Otherwise a backend would only be measured while it serves traffic, and stay demoted.
+    """
+    provider = 'router'
+
+    def __init__(self, backends, timeout=60.0, max_error_rate=0.5, cooldown=5.0, window=50, history=200):
+        """
+        Initializes the router.
+
+        Args:
+            backends: A list of chatters or (chatter, model) pairs, in order of preference.
+            timeout: Seconds to wait for a backend before failing over.
+            max_error_rate: Recent error rate above which a backend is considered unhealthy.
+            cooldown: Base number of seconds an erroring backend is skipped for.
+            window: Number of recent requests used for latency and error rates.
+            history: Number of routing decisions kept for inspection.
+        """
+        if not backends:
+            raise ValueError("RouterChatter needs at least one backend.")
+        self.backends = []
+        for backend in backends:
+            chatter, model = backend if isinstance(backend, tuple) else (backend, None)
+            self.backends.append(Backend(chatter, model, window))
+        self.timeout = timeout
+        self.max_error_rate = max_error_rate
+        self.cooldown = cooldown
+        self.decisions = deque(maxlen=history)
+
+    @property
+    def default_model(self):
+        return self.backends[0].model
+
+    def is_healthy(self, backend):
+        """
+        Returns True if the backend should get traffic: it is not cooling down and its recent
+        error rate is acceptable, or it is half-open and no probe is in flight.
+        """
+        if time.monotonic() < backend.cooldown_until:
+            return False
+        return backend.stats.error_rate() <= self.max_error_rate or not backend.probing
+
+    def _attempt(self, backend):
+        # Marks the request about to be sent to a half-open backend as its probe
+        if backend.stats.error_rate() > self.max_error_rate:
+            backend.probing = True
+
+    def rank(self, model=None):
+        """
+        Returns the backends in the order they should be tried: healthy before unhealthy,
+        then by median latency. Backends without measurements are tried first so they get measured.
+
+        Args:
+            model: Optional model name; backends serving it are preferred.
+        """
+        candidates = [b for b in self.backends if b.model == model] if model else []
+        candidates = candidates or self.backends
+
+        def score(item):
+            position, backend = item
+            median = backend.stats.percentile(50)
+            return (not self.is_healthy(backend), median if median is not None else 0.0, position)
+
+        return [backend for _, backend in sorted(enumerate(candidates), key=score)]
+
+    def _decide(self, backend, latency, ok, attempt, error=None):
+        backend.record(latency, ok, self.cooldown)
+        decision = {
+            "time": time.time(),
+            "backend": backend.name,
+            "attempt": attempt,
+            "latency": round(latency, 4),
+            "ok": ok,
+        }
+        if error is not None:
+            decision["error"] = f"{type(error).__name__}: {error}"
+            logging.warning(f"router: {backend.name} failed ({decision['error']}), failing over")
+        self.decisions.append(decision)
+
+    async def acomplete(self, knowledge, model=None, **options):
+        return await run_on_loop(self._acomplete(knowledge, model, **options))
+
+    async def _acomplete(self, knowledge, model=None, **options):
+        last_error = None
+        for attempt, backend in enumerate(self.rank(model)):
+            self._attempt(backend)
+            started = time.monotonic()
+            try:
+                response = await asyncio.wait_for(
+                    backend.chatter.acomplete(knowledge, backend.model, **options), self.timeout
+                )
+            except Exception as e:
+                self._decide(backend, time.monotonic() - started, False, attempt, e)
+                last_error = e
+                continue
+            self._decide(backend, time.monotonic() - started, True, attempt)
+            return response
+        raise last_error
+
+    async def astream(self, knowledge, model=None, **options):
+        last_error = None
+        for attempt, backend in enumerate(self.rank(model)):
+            self._attempt(backend)
+            started = time.monotonic()
+            stream = iterate_on_loop(backend.chatter.astream(knowledge, backend.model, **options))
+            try:
+                # Fail over only while nothing has been delivered to the caller
+                first = await asyncio.wait_for(stream.__anext__(), self.timeout)
+            except StopAsyncIteration:
+                self._decide(backend, time.monotonic() - started, True, attempt)
+                return
+            except Exception as e:
+                await stream.aclose()
+                self._decide(backend, time.monotonic() - started, False, attempt, e)
+                last_error = e
+                continue
+            self._decide(backend, time.monotonic() - started, True, attempt)
+            try:
+                yield first
+                async for chunk in stream:
+                    yield chunk
+            finally:
+                await stream.aclose()
+            return
+        raise last_error
+
+    def health(self):
+        """
+        Returns the current health of every backend, for dashboards.
+        """
+        now = time.monotonic()
+        report = []
+        for backend in self.backends:
+            report.append({
+                "backend": backend.name,
+                "provider": backend.chatter.provider,
+                "model": backend.model,
+                "healthy": self.is_healthy(backend),
+                "requests": backend.requests,
+                "failures": backend.failures,
+                "error_rate": round(backend.stats.error_rate(), 4),
+                "p50": backend.stats.percentile(50),
+                "p95": backend.stats.percentile(95),
+                "cooldown_remaining": round(max(0.0, backend.cooldown_until - now), 3),
+            })
+        return report
+
+    def get_stats(self):
+        """
+        Returns backend health together with the most recent routing decisions.
+        """
+        return {"backends": self.health(), "decisions": list(self.decisions)}
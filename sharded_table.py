@@ -0,0 +1,160 @@
+# sharded_table.py
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import numpy as np
+from truth_table import DEFAULT_CHUNK_ROWS, assignment_of, find_row, iter_chunks, table_rows
+
+def shard_ranges(rows, shards, align=8):
+    """
+    Splits rows 0..rows into at most shards contiguous (start, stop) ranges whose starts are
+    multiples of align.
+    """
+    size = max(align, -(-rows // max(1, shards)))
+    size = -(-size // align) * align
+    return [(start, min(start + size, rows)) for start in range(0, rows, size)]
+
+def summarize_shard(variables, expressions, start, stop, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Evaluates rows start..stop chunk by chunk and returns only their aggregates: per expression,
+    the number of True rows and the first False and first True row, plus evaluation errors.
+    Runs in a worker process.
+    """
+    summary = {'rows': stop - start, 'true': {}, 'first_false': {}, 'first_true': {}, 'errors': {}}
+    for expression in expressions:
+        summary['true'][expression] = 0
+        summary['first_false'][expression] = summary['first_true'][expression] = None
+    for chunk in iter_chunks(variables, expressions, chunk_rows, start, stop):
+        summary['errors'].update(chunk.errors)
+        for expression in expressions:
+            column = chunk.column(expression)
+            summary['true'][expression] += chunk.count_true(expression)
+            for key, rows in (('first_false', ~column), ('first_true', column)):
+                if summary[key][expression] is None:
+                    hits = np.flatnonzero(rows)
+                    if len(hits):
+                        summary[key][expression] = chunk.start + int(hits[0])
+    return summary
+
+def merge_summaries(summaries):
+    """
+    Merges shard summaries given in row order: counts are added and the first rows kept from
+    the earliest shard that has one.
+    """
+    merged = {'rows': 0, 'true': {}, 'first_false': {}, 'first_true': {}, 'errors': {}}
+    for summary in summaries:
+        merged['rows'] += summary['rows']
+        merged['errors'].update(summary['errors'])
+        for expression, count in summary['true'].items():
+            merged['true'][expression] = merged['true'].get(expression, 0) + count
+            for key in ('first_false', 'first_true'):
+                if merged[key].get(expression) is None:
+                    merged[key][expression] = summary[key][expression]
+    return merged
+
+def _workers(workers):
+    return workers or os.cpu_count() or 1
+
+def summarize_sharded(variables, expressions, workers=None, shards=None, chunk_rows=DEFAULT_CHUNK_ROWS, executor=None):
+    """
+    Summarizes the truth table of expressions over variables without building or returning it:
+    the assignment space is split into contiguous index ranges that are evaluated across a
+    process pool, and only each shard's aggregates come back.
+
+    Args:
+        variables: The variables.
+        expressions: The expressions.
+        workers: Worker processes; defaults to the number of CPUs.
+        shards: Number of index ranges; defaults to four per worker.
+        chunk_rows: Rows evaluated at a time inside a shard.
+        executor: An executor to use instead of a new process pool.
+
+    Returns:
+        dict: rows, and per expression 'true' (count of True rows), 'first_false' and
+        'first_true' (the assignment of the first such row, or None), plus 'errors'.
+    """
+    variables, expressions = list(variables), list(expressions)
+    rows = table_rows(variables)
+    workers = _workers(workers)
+    ranges = shard_ranges(rows, shards or workers * 4)
+    if len(ranges) == 1 or (workers == 1 and executor is None):
+        summaries = [summarize_shard(variables, expressions, start, stop, chunk_rows) for start, stop in ranges]
+    else:
+        pool = executor or ProcessPoolExecutor(max_workers=workers)
+        try:
+            futures = [pool.submit(summarize_shard, variables, expressions, start, stop, chunk_rows) for start, stop in ranges]
+            summaries = [future.result() for future in futures]
+        finally:
+            if executor is None:
+                pool.shutdown()
+    summary = merge_summaries(summaries)
+    for key in ('first_false', 'first_true'):
+        summary[key] = {expression: None if index is None else assignment_of(variables, index)
+                        for expression, index in summary[key].items()}
+    return summary
+
+def _find_in_shard(variables, expression, value, chunk_rows, start, stop, shard, found_shard):
+    # Runs in a worker process; gives up between chunks once an earlier shard has found a row
+    return find_row(variables, expression, value, chunk_rows, start, stop,
+                    cancelled=lambda: found_shard.value < shard)
+
+def find_sharded(variables, expression, value=False, workers=None, shards=None, chunk_rows=DEFAULT_CHUNK_ROWS,
+                 executor=None, manager=None):
+    """
+    Aggregates-only search for the first row where expression equals value, across a process
+    pool. The row found is the same as a sequential scan would find: the earlier shards always
+    finish.
+
+    Once a shard finds a row, the later shards that have not started are cancelled, and the
+    ones already running stop after the chunk they are evaluating, when they next read the
+    shared index of the earliest shard with a hit. A running shard cannot be interrupted within
+    a chunk, so the call returns up to one chunk per worker after the answer is known.
+
+    Args:
+        variables: The variables.
+        expression: The expression.
+        value: The value to find.
+        workers: Worker processes; defaults to the number of CPUs.
+        shards: Number of index ranges; defaults to four per worker.
+        chunk_rows: Rows evaluated at a time inside a shard.
+        executor: A process pool to use instead of a new one.
+        manager: A multiprocessing manager for the shared index instead of a new one.
+
+    Returns:
+        dict: The assignment of that row, or None if there is none.
+    """
+    variables = list(variables)
+    rows = table_rows(variables)
+    workers = _workers(workers)
+    ranges = shard_ranges(rows, shards or workers * 4)
+    if len(ranges) == 1 or (workers == 1 and executor is None):
+        index = find_row(variables, expression, value, chunk_rows)
+        return None if index is None else assignment_of(variables, index)
+    pool = executor or ProcessPoolExecutor(max_workers=workers)
+    sharing = manager or multiprocessing.Manager()
+    try:
+        found_shard = sharing.Value('q', len(ranges))
+        futures = {pool.submit(_find_in_shard, variables, expression, value, chunk_rows, start, stop, shard, found_shard): shard
+                   for shard, (start, stop) in enumerate(ranges)}
+        pending = set(futures)
+        found = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.cancelled():
+                    continue
+                index = future.result()
+                if index is not None and futures[future] < found_shard.value:
+                    found_shard.value, found = futures[future], index
+            if found is not None:
+                for future in list(pending):
+                    if futures[future] > found_shard.value:
+                        future.cancel()
+                        pending.discard(future)
+    finally:
+        # Running shards stop at their next chunk, so waiting for them is short
+        if executor is None:
+            pool.shutdown(cancel_futures=True)
+        if manager is None:
+            sharing.shutdown()
+    return None if found is None else assignment_of(variables, found)
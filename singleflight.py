@@ -0,0 +1,149 @@
+# singleflight.py
+import asyncio
+from chatter import ChatterWrapper, iterate_on_loop, run_on_loop
+
+class Broadcast:
+    """
+    Fans one upstream stream out to any number of subscribers. Subscribers that join
+    late first get the chunks produced so far, so every subscriber sees the whole stream.
+    """
+
+    def __init__(self):
+        self.chunks = []
+        self.done = False
+        self.error = None
+        self.changed = asyncio.Condition()
+
+    async def pump(self, agen):
+        """
+        Reads the upstream stream to the end, publishing each chunk to the subscribers.
+        """
+        try:
+            async for chunk in agen:
+                async with self.changed:
+                    self.chunks.append(chunk)
+                    self.changed.notify_all()
+        except BaseException as e:
+            self.error = e
+            raise
+        finally:
+            async with self.changed:
+                self.done = True
+                self.changed.notify_all()
+
+    async def follow(self):
+        """
+        Yields every chunk of the stream, then raises the upstream exception if there was one.
+        """
+        seen = 0
+        while True:
+            async with self.changed:
+                await self.changed.wait_for(lambda: seen < len(self.chunks) or self.done)
+                chunks = self.chunks[seen:]
+                done = self.done
+            for chunk in chunks:
+                yield chunk
+            seen += len(chunks)
+            if done and seen == len(self.chunks):
+                if self.error is not None:
+                    raise self.error
+                return
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key so that only one of them does the work.
+    Every caller receives the same result, or the same exception; streaming callers
+    receive the same chunks.
+    """
+
+    def __init__(self):
+        self.inflight = {}  # key -> asyncio.Task
+        self.broadcasts = {}  # key -> Broadcast of the stream in flight
+        self.stats = {'calls': 0, 'shared': 0}
+
+    async def do(self, key, factory):
+        """
+        Runs factory() unless a call with the same key is already in flight, in which case
+        the caller waits for that call instead.
+
+        Args:
+            key: The key identifying identical calls.
+            factory: A callable returning the coroutine that does the work.
+
+        Returns:
+            The result of the shared call.
+        """
+        self.stats['calls'] += 1
+        task = self.inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self.inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.stats['shared'] += 1
+        # Shield the shared task so one caller being cancelled does not cancel the others
+        return await asyncio.shield(task)
+
+    async def stream(self, key, factory):
+        """
+        Streams factory() unless a stream with the same key is already in flight, in which
+        case the caller follows that stream instead.
+
+        Args:
+            key: The key identifying identical calls.
+            factory: A callable returning the async generator that does the work.
+
+        Yields:
+            The chunks of the shared stream.
+        """
+        self.stats['calls'] += 1
+        key = ('stream', key)  # a stream never joins a completion, or vice versa
+        task = self.inflight.get(key)
+        if task is None:
+            broadcast = Broadcast()
+            # The pump outlives any one subscriber, so a caller going away does not end the stream for the others
+            task = asyncio.ensure_future(broadcast.pump(factory()))
+            self.inflight[key] = task
+            self.broadcasts[key] = broadcast
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            broadcast = self.broadcasts[key]
+            self.stats['shared'] += 1
+        async for chunk in broadcast.follow():
+            yield chunk
+
+    def _finish(self, key, task):
+        if self.inflight.get(key) is task:
+            del self.inflight[key]
+            self.broadcasts.pop(key, None)
+        if not task.cancelled():
+            task.exception()  # mark the exception as retrieved even if every waiter went away
+
+    def get_stats(self):
+        """
+        Returns the number of calls, how many were served by another caller's request,
+        and how many requests are in flight right now.
+        """
+        stats = dict(self.stats)
+        stats['upstream'] = stats['calls'] - stats['shared']
+        stats['inflight'] = len(self.inflight)
+        return stats
+
+class SingleFlightChatter(ChatterWrapper):
+    """
+    Shares one upstream request among concurrent identical requests to the wrapped chatter.
+    """
+
+    def __init__(self, chatter, flight=None):
+        super().__init__(chatter)
+        self.flight = flight if flight is not None else SingleFlight()
+
+    async def acomplete(self, knowledge, model=None, **options):
+        key = self.request_key(knowledge, model)
+        # All coalescing happens on the chatter loop, whichever loop the caller runs on
+        return await run_on_loop(self.flight.do(key, lambda: self.chatter.acomplete(knowledge, model, **options)))
+
+    async def astream(self, knowledge, model=None, **options):
+        key = self.request_key(knowledge, model)
+        async for chunk in iterate_on_loop(self.flight.stream(key, lambda: self.chatter.astream(knowledge, model, **options))):
+            yield chunk
@@ -0,0 +1,362 @@
+# table_file.py
+import csv
+import io
+import json
+import logging
+import mmap
+import os
+import pathlib
+import struct
+import numpy as np
+import ujson
+from truth_table import ColumnarTable, iter_chunks, table_rows
+
+# Binary truth table file:
+#   header  HEADER: magic, version, reserved, rows, names length
+#   names   UTF-8 JSON {"variables": [...], "expressions": [...]}, padded to 8 bytes
+#   columns one per variable then expression, each ceil(rows / 8) bytes padded to 8 bytes;
+#           row r is bit 7 - r % 8 of byte r // 8 (numpy.packbits order)
+MAGIC = b'TTBL'
+VERSION = 1
+HEADER = struct.Struct('<4sHHQI')
+ALIGNMENT = 8
+
+FORMATS = {'.csv': 'csv', '.jsonl': 'jsonl', '.ttbl': 'binary', '.bin': 'binary'}
+
+def _aligned(size):
+    return -(-size // ALIGNMENT) * ALIGNMENT
+
+def column_stride(rows):
+    return _aligned(-(-rows // 8))
+
+def _encode_rows(chunk, cell, empty_row):
+    """
+    Returns the text of a chunk's rows as bytes, built by NumPy instead of row by row.
+
+    Each column's two possible cells, cell(position, name, False) and cell(position, name, True),
+    are padded with NUL to one width, picked per row by the column's values and laid side by
+    side; the padding is then dropped.
+    """
+    if not chunk.headers:
+        return empty_row * len(chunk)
+    parts = []
+    for position, name in enumerate(chunk.headers):
+        cells = np.array([cell(position, name, value).encode('utf-8') for value in (False, True)])
+        picked = cells[chunk.column(name).view(np.uint8)]
+        parts.append(picked.view(np.uint8).reshape(len(chunk), cells.itemsize))
+    return np.concatenate(parts, axis=1).tobytes().replace(b'\0', b'')
+
+def write_csv(path, chunks):
+    """
+    Streams chunks of a truth table to a CSV file with a header row.
+
+    Returns:
+        int: The number of rows written.
+    """
+    rows = 0
+    with open(path, 'wb') as file:
+        for chunk in chunks:
+            if rows == 0:
+                header = io.StringIO()
+                csv.writer(header).writerow(chunk.headers)
+                file.write(header.getvalue().encode('utf-8'))
+                last = len(chunk.headers) - 1
+            file.write(_encode_rows(chunk, lambda position, name, value: str(value) + ("\r\n" if position == last else ","), b"\r\n"))
+            rows += len(chunk)
+    return rows
+
+def write_jsonl(path, chunks):
+    """
+    Streams chunks of a truth table to a JSON lines file, one {name: bool} object per row.
+
+    Returns:
+        int: The number of rows written.
+    """
+    rows = 0
+    with open(path, 'wb') as file:
+        for chunk in chunks:
+            last = len(chunk.headers) - 1
+
+            def cell(position, name, value):
+                return (("{" if position == 0 else "") + ujson.dumps(name, ensure_ascii=False) + ": " +
+                        ("true" if value else "false") + ("}\n" if position == last else ", "))
+
+            file.write(_encode_rows(chunk, cell, b"{}\n"))
+            rows += len(chunk)
+    return rows
+
+def write_binary(path, chunks, rows):
+    """
+    Streams chunks of a truth table to a binary table file. The file is sized up front and every
+    chunk's packed bits are written at their offset, so chunks may come in any order.
+
+    Args:
+        path: The file to write.
+        chunks: ColumnarTables starting at multiples of 8 rows.
+        rows: The number of rows of the whole table.
+
+    Returns:
+        int: The number of rows written.
+
+    Raises:
+        ValueError: If a chunk does not start on a byte boundary.
+    """
+    stride = column_stride(rows)
+    written = 0
+    with open(path, 'wb') as file:
+        data_offset = None
+        for chunk in chunks:
+            if data_offset is None:
+                names = ujson.dumps({'variables': chunk.variables, 'expressions': chunk.expressions}).encode('utf-8')
+                file.write(HEADER.pack(MAGIC, VERSION, 0, rows, len(names)))
+                file.write(names.ljust(_aligned(HEADER.size + len(names)) - HEADER.size, b'\0'))
+                data_offset = file.tell()
+                file.truncate(data_offset + stride * len(chunk.headers))
+            if chunk.start % 8:
+                raise ValueError(f"chunk at row {chunk.start} does not start on a byte boundary")
+            for position, name in enumerate(chunk.headers):
+                file.seek(data_offset + position * stride + chunk.start // 8)
+                file.write(np.packbits(chunk.column(name)).tobytes())
+            written += len(chunk)
+    return written
+
+def read_header(path):
+    """
+    Returns the header of a binary table file: version, rows, variables, expressions,
+    data_offset and stride.
+
+    Raises:
+        ValueError: If the file is not a binary table file.
+    """
+    with open(path, 'rb') as file:
+        fixed = file.read(HEADER.size)
+        if len(fixed) < HEADER.size:
+            raise ValueError(f"{path} is not a truth table file")
+        magic, version, _, rows, names_length = HEADER.unpack(fixed)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a truth table file")
+        names = ujson.loads(file.read(names_length).decode('utf-8'))
+    return {
+        'version': version,
+        'rows': rows,
+        'variables': names['variables'],
+        'expressions': names['expressions'],
+        'data_offset': _aligned(HEADER.size + names_length),
+        'stride': column_stride(rows),
+    }
+
+def read_binary(path):
+    """
+    Reads a whole binary table file back into a ColumnarTable.
+    """
+    header = read_header(path)
+    rows = header['rows']
+    columns = {}
+    with open(path, 'rb') as file:
+        for position, name in enumerate(header['variables'] + header['expressions']):
+            file.seek(header['data_offset'] + position * header['stride'])
+            packed = np.frombuffer(file.read(-(-rows // 8)), dtype=np.uint8)
+            columns[name] = np.unpackbits(packed, count=rows).astype(bool)
+    return ColumnarTable(header['variables'], header['expressions'], columns, rows)
+
+# Number of set bits in each byte value
+POPCOUNT = np.array([bin(value).count('1') for value in range(256)], dtype=np.uint8)
+
+class TableFile:
+    """
+    A binary table file mapped into memory: nothing is read until a column is used, and then
+    only the bytes of the rows asked for.
+
+    packed(name) is a zero-copy NumPy view of a column's packed bits; column(name, start, stop)
+    unpacks a row range to booleans. Counting and searching work on the packed bytes.
+
+    Use as a context manager, or call close().
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path: A file written by write_binary.
+
+        Raises:
+            ValueError: If the file is not a binary table file.
+        """
+        header = read_header(path)
+        self.path = path
+        self.variables = header['variables']
+        self.expressions = header['expressions']
+        self.rows = header['rows']
+        self.data_offset = header['data_offset']
+        self.stride = header['stride']
+        self.positions = {name: position for position, name in enumerate(self.headers)}
+        with open(path, 'rb') as file:
+            self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.buffer = np.frombuffer(self.map, dtype=np.uint8)
+
+    @property
+    def headers(self):
+        return self.variables + self.expressions
+
+    def __len__(self):
+        return self.rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def packed(self, name):
+        """
+        Returns the packed bits of a column as a read-only uint8 view of the mapped file.
+        """
+        start = self.data_offset + self.positions[name] * self.stride
+        return self.buffer[start:start + -(-self.rows // 8)]
+
+    def column(self, name, start=0, stop=None):
+        """
+        Returns rows start..stop of a column as a boolean array.
+        """
+        stop = self.rows if stop is None else min(stop, self.rows)
+        packed = self.packed(name)[start // 8:-(-stop // 8)]
+        bits = np.unpackbits(packed).astype(bool)
+        return bits[start % 8:start % 8 + stop - start]
+
+    def row(self, index):
+        byte, bit = divmod(index, 8)
+        return {name: bool(self.packed(name)[byte] >> (7 - bit) & 1) for name in self.headers}
+
+    def count_true(self, name):
+        # Padding bits are zero, so the whole packed column can be counted
+        return int(POPCOUNT[self.packed(name)].sum(dtype=np.int64))
+
+    def all_true(self, name):
+        return self.count_true(name) == self.rows
+
+    def first_false(self, name):
+        """
+        Returns the index of the first row where a column is False, or None.
+        """
+        packed = self.packed(name)
+        full = self.rows // 8
+        incomplete = np.flatnonzero(packed[:full] != 0xFF)
+        if len(incomplete):
+            byte = int(incomplete[0])
+            return byte * 8 + int(np.flatnonzero(np.unpackbits(packed[byte:byte + 1]) == 0)[0])
+        for index in range(full * 8, self.rows):
+            if not packed[index // 8] >> (7 - index % 8) & 1:
+                return index
+        return None
+
+    def to_table(self):
+        """
+        Returns the whole file as a ColumnarTable.
+        """
+        columns = {name: self.column(name) for name in self.headers}
+        return ColumnarTable(self.variables, self.expressions, columns, self.rows)
+
+    def close(self):
+        if self.map is not None:
+            self.buffer = None
+            try:
+                self.map.close()
+            except BufferError:
+                pass  # views handed out keep the mapping alive until they are freed
+            self.map = None
+
+def write_table(path, table):
+    """
+    Writes a whole ColumnarTable to a binary table file.
+    """
+    return export_table(path, [table], table.rows, 'binary')
+
+def read_json_values(text):
+    """
+    Returns the JSON values in a text, which may hold several concatenated ones as appended
+    indented dumps do. Decoding stops at the first value that is not valid JSON, such as one cut
+    short by an interrupted write.
+
+    Returns:
+        tuple: (the values decoded, the text from the first invalid value on, or '').
+    """
+    values = []
+    decoder = json.JSONDecoder()  # ujson has no raw_decode
+    position = 0
+    text = text.strip()
+    while position < len(text):
+        try:
+            value, position = decoder.raw_decode(text, position)
+        except json.JSONDecodeError:
+            return values, text[position:]
+        values.append(value)
+        while position < len(text) and text[position].isspace():
+            position += 1
+    return values, ''
+
+def convert_truth_tables_json(source, records_path, table_path=None, table_row_limit=None):
+    """
+    Converts a truth_tables.json of appended indented JSON objects into JSON lines, and the
+    last logic table in it, when there is one, into a binary table file.
+
+    A tail that is not valid JSON is logged and skipped. The JSON lines file is written last,
+    through a temporary file, so it only exists once the conversion has succeeded.
+
+    Args:
+        source: The old truth_tables.json.
+        records_path: The JSON lines file to write, one record per line.
+        table_path: The binary table file for the last {variables, expressions} record, or None.
+        table_row_limit: Largest table to write, or None for any size.
+
+    Returns:
+        int: The number of records converted.
+    """
+    with open(source, 'r', encoding='utf-8') as file:
+        records, tail = read_json_values(file.read())
+    if tail:
+        logging.warning(f"skipped {len(tail)} characters of invalid JSON at the end of {source} after {len(records)} records")
+    tables = [record for record in records if isinstance(record, dict) and 'variables' in record and 'expressions' in record]
+    if table_path and tables:
+        variables, expressions = tables[-1]['variables'], tables[-1]['expressions']
+        rows = table_rows(variables)
+        if table_row_limit is None or rows <= table_row_limit:
+            export_table(table_path, iter_chunks(variables, expressions), rows, 'binary')
+        else:
+            logging.warning(f"not writing the {rows} row truth table of {source} to {table_path}")
+    pathlib.Path(records_path).parent.mkdir(parents=True, exist_ok=True)
+    temporary = f"{records_path}.tmp"
+    with open(temporary, 'w', encoding='utf-8') as file:
+        for record in records:
+            file.write(ujson.dumps(record, ensure_ascii=False) + "\n")
+    os.replace(temporary, records_path)
+    return len(records)
+
+def export_table(path, chunks, rows, format=None):
+    """
+    Streams chunks of a truth table to a file without materializing the table.
+
+    Args:
+        path: The file to write; its directory is created.
+        chunks: ColumnarTables in row order, e.g. from truth_table.iter_chunks.
+        rows: The number of rows of the whole table.
+        format: 'csv', 'jsonl' or 'binary', or None to go by the file suffix.
+
+    Returns:
+        int: The number of rows written.
+
+    Raises:
+        ValueError: If the format is unknown.
+    """
+    format = format or FORMATS.get(pathlib.Path(path).suffix.lower())
+    writers = {'csv': write_csv, 'jsonl': write_jsonl, 'binary': lambda path, chunks: write_binary(path, chunks, rows)}
+    if format not in writers:
+        raise ValueError(f"unknown truth table format for {path}: {format}")
+    pathlib.Path(path).parent.mkdir(parents=True, exist_ok=True)
+    # Written beside the target and renamed over it, so a reader never maps a half-written file
+    temporary = f"{path}.tmp"
+    try:
+        written = writers[format](temporary, chunks)
+    except BaseException:
+        pathlib.Path(temporary).unlink(missing_ok=True)
+        raise
+    os.replace(temporary, path)
+    return written
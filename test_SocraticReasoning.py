@@ -0,0 +1,285 @@
+# test_SocraticReasoning.py
+import itertools
+import os
+import tempfile
+import time
+import unittest
+import ujson
+from fakechatter import FakeChatter
+from journal import close_journals
+from log_pipeline import flush_logs
+
+class SocraticTestCase(unittest.TestCase):
+    # SocraticReasoning keeps its state under ./memory, so every test runs in a scratch directory
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+        from SocraticReasoning import SocraticReasoning
+        self.SocraticReasoning = SocraticReasoning
+
+    def tearDown(self):
+        close_journals()
+        flush_logs()
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+def speculative_responder(prompt):
+    # Candidate 3 leads to a conclusion that validates; every other conclusion does not
+    if prompt.endswith("Alternative premise 3:"):
+        return "Socrates thinks."
+    if prompt.endswith("Alternative premise 2:"):
+        return "Socrates talks."
+    if prompt.endswith("socrates thinks."):  # premises come back lowercased
+        return "1"
+    if prompt.endswith("."):
+        return "Socrates walks."
+    return "Maybe"
+
+def tautology_responder(prompt):
+    # Asked for a premise, generates one; asked for a conclusion after it, answers a tautology
+    return "1" if prompt.endswith("socrates is wise.") else "Socrates is wise."
+
+class TestSpeculativeConclusion(SocraticTestCase):
+
+    def test_speculation_keeps_first_valid_candidate(self):
+        chatter = FakeChatter(responder=speculative_responder, latency_params=(0.05,))
+        reasoner = self.SocraticReasoning(chatter)
+        reasoner.add_premise("All humans are mortal.")
+        reasoner.add_premise("Socrates is a human.")
+
+        started = time.monotonic()
+        conclusion = reasoner.draw_conclusion(speculative=3)
+        elapsed = time.monotonic() - started
+
+        self.assertEqual(conclusion, "1")
+        # One round of premise plus conclusion calls, not a sequence of them
+        self.assertLess(elapsed, 0.5)
+
+    def test_sequential_mode_is_unchanged(self):
+        chatter = FakeChatter(responder=tautology_responder)
+        reasoner = self.SocraticReasoning(chatter)
+        reasoner.add_premise("All humans are mortal.")
+        self.assertEqual(reasoner.draw_conclusion(), "1")
+        self.assertEqual(chatter.get_stats()['requests'], 2)
+
+class TestLocalInference(SocraticTestCase):
+
+    def test_entailed_conclusion_validates_without_more_premises(self):
+        def responder(prompt):
+            # The premise request ends with the given premises, the conclusion request with the new premise
+            return "Plato is a philosopher." if prompt.lower().endswith("socrates is a human.") else "Socrates is mortal."
+
+        chatter = FakeChatter(responder=responder)
+        reasoner = self.SocraticReasoning(chatter)
+        reasoner.memo = None
+        reasoner.add_premise("All humans are mortal.")
+        reasoner.add_premise("Socrates is a human.")
+        self.assertEqual(reasoner.draw_conclusion().lower(), "socrates is mortal.")
+        self.assertEqual(chatter.get_stats()['requests'], 2)
+        self.assertFalse(reasoner.entails("Plato is mortal."))
+
+    def test_engine_follows_premise_changes(self):
+        reasoner = self.SocraticReasoning(FakeChatter(responder=tautology_responder))
+        reasoner.add_premise("All humans are mortal.")
+        reasoner.add_premise("Socrates is a human.")
+        self.assertTrue(reasoner.entails("Socrates is mortal."))
+        reasoner.challenge_premise("Socrates is a human.")
+        self.assertFalse(reasoner.entails("Socrates is mortal."))
+
+    def test_only_the_given_premises_validate(self):
+        reasoner = self.SocraticReasoning(FakeChatter(responder=tautology_responder))
+        reasoner.add_premise("All humans are mortal.")
+        reasoner.add_premise("Socrates is a human.")
+        self.assertTrue(reasoner.validate_conclusion("Socrates is mortal."))
+        self.assertFalse(reasoner.validate_conclusion("socrates is a human"))  # restates a premise
+        self.assertFalse(reasoner.validate_conclusion("Plato is a human.", ["Plato is a human."]))
+        reasoner.add_generated_premise("Plato is a human.")
+        self.assertFalse(reasoner.validate_conclusion("Plato is mortal."))
+
+    def test_echoed_premise_is_not_a_valid_conclusion(self):
+        for speculative in (1, 3):
+            reasoner = self.SocraticReasoning(FakeChatter(responder=lambda prompt: "Plato is a fish."))
+            reasoner.add_premise("The sky is blue.")
+            reasoner.draw_conclusion(speculative=speculative)
+            self.assertFalse(reasoner.conclusion_valid)
+        self.assertEqual(reasoner.memo.get_stats()['entries'], 0)
+        results = list(reasoner.draw_conclusions_batch([["x"]], results_file='batch.jsonl'))
+        self.assertFalse(results[0].get("valid"))
+
+class TestTruthTables(SocraticTestCase):
+
+    def test_truths_and_tables_are_written_compactly(self):
+        from journal import open_journal
+        from table_file import TableFile
+        reasoner = self.SocraticReasoning(FakeChatter(responder=tautology_responder))
+        reasoner.save_truth("1")
+        reasoner.update_logic_tables(['A', 'B'], ['A or B'], [])
+        reasoner.save_truth("A or not A")
+        records = open_journal(reasoner.truth_tables_file).load()
+        self.assertEqual([record.get('truth') for record in records], ["1", None, "A or not A"])
+        with TableFile(reasoner.truth_table_file) as table:
+            self.assertEqual((table.rows, table.count_true('A or B')), (4, 3))
+        self.assertEqual(reasoner.logic_tables.beliefs.query(source='socratic')[0]['content']['expressions'], ['A or B'])
+
+    def test_table_is_written_only_when_it_changes(self):
+        reasoner = self.SocraticReasoning(FakeChatter(responder=tautology_responder))
+        reasoner.update_logic_tables(['A', 'B'], ['A or B'], [])
+        os.utime(reasoner.truth_table_file, ns=(0, 0))
+        reasoner.update_logic_tables(['A', 'B'], ['A or B'], ['A or B'])
+        self.assertEqual(os.stat(reasoner.truth_table_file).st_mtime_ns, 0)
+        reasoner.truth_table_row_limit = 4
+        reasoner.update_logic_tables(['A', 'B', 'C'], ['A or B'], [])
+        self.assertFalse(os.path.exists(reasoner.truth_table_file))
+
+class TestBatchConclusions(SocraticTestCase):
+
+    def test_batch_runs_sets_concurrently_and_in_isolation(self):
+        chatter = FakeChatter(responder=tautology_responder, latency_params=(0.05,))
+        reasoner = self.SocraticReasoning(chatter)
+        reasoner.add_premise("Unrelated premise.")
+        premise_sets = [[f"Person{index} is a human.", "All humans are mortal."] for index in range(20)]
+
+        started = time.monotonic()
+        results = list(reasoner.draw_conclusions_batch(premise_sets, concurrency=10, results_file='batch.jsonl'))
+        elapsed = time.monotonic() - started
+
+        # 20 sets of two 50 ms calls, ten at a time
+        self.assertLess(elapsed, 1.0)
+        self.assertEqual(sorted(result["index"] for result in results), list(range(20)))
+        for result in results:
+            self.assertEqual(result["conclusion"], "1")
+            self.assertTrue(result["valid"])
+            self.assertEqual(result["premises"], premise_sets[result["index"]] + ["socrates is wise."])
+        self.assertEqual(reasoner.premises, ["Unrelated premise."])
+        with open('batch.jsonl') as file:
+            self.assertEqual(len(file.readlines()), 20)
+        self.assertFalse(os.path.exists(reasoner.conclusions_file))
+
+    def test_batch_times_out_per_item(self):
+        chatter = FakeChatter(responder=tautology_responder, latency_params=(0.5,))
+        reasoner = self.SocraticReasoning(chatter)
+        results = list(reasoner.draw_conclusions_batch([["A premise."], []], timeout=0.05, results_file='batch.jsonl'))
+        errors = sorted(result["error"] for result in results)
+        self.assertEqual(errors, ["ValueError: No premises available for logic as conclusion.", "timed out after 0.05 seconds"])
+
+class TestConclusionMemo(SocraticTestCase):
+
+    def ask(self, chatter, premises):
+        reasoner = self.SocraticReasoning(chatter)
+        for premise in premises:
+            reasoner.add_premise(premise)
+        return reasoner, reasoner.draw_conclusion()
+
+    def test_repeat_question_skips_model_calls(self):
+        chatter = FakeChatter(responder=tautology_responder)
+        self.ask(chatter, ["All humans are mortal.", "Socrates is a human."])
+        self.assertEqual(chatter.get_stats()['requests'], 2)
+
+        # Same set in another order, case and spacing, after a restart
+        close_journals()
+        reasoner, conclusion = self.ask(chatter, ["socrates is  a human", "ALL HUMANS ARE MORTAL."])
+        self.assertEqual(conclusion, "1")
+        self.assertEqual(chatter.get_stats()['requests'], 2)
+        stats = reasoner.memo.get_stats()
+        self.assertEqual((stats['hits'], stats['hit_rate']), (1, 1.0))
+
+    def test_only_valid_conclusions_of_the_same_model_are_reused(self):
+        premises = ["All humans are mortal.", "Socrates is a human."]
+        answers = itertools.cycle(["Plato is a philosopher.", "Plato is a god."])  # premise, then conclusion
+        unsure = FakeChatter(responder=lambda prompt: next(answers))
+        reasoner, _ = self.ask(unsure, premises)
+        self.assertFalse(reasoner.conclusion_valid)
+        self.assertEqual(reasoner.memo.get_stats()['entries'], 0)
+
+        self.ask(FakeChatter(responder=tautology_responder), premises)
+        other = FakeChatter(responder=tautology_responder, provider='other')
+        self.ask(other, premises)
+        self.assertEqual(other.get_stats()['requests'], 2)
+        self.assertEqual(reasoner.memo.get_stats()['entries'], 2)
+
+    def test_chatter_without_provider_is_scoped_by_class(self):
+        class Plain:
+            def generate_response(self, knowledge):
+                return "1"
+
+        reasoner, conclusion = self.ask(Plain(), ["All humans are mortal."])
+        self.assertEqual(conclusion, "1")
+        self.assertEqual(reasoner.memo_scope(), "Plain/None")
+
+    def test_challenge_invalidates(self):
+        chatter = FakeChatter(responder=tautology_responder)
+        reasoner, _ = self.ask(chatter, ["All humans are mortal.", "Socrates is a human."])
+        reasoner.add_premise("Socrates is a human.")
+        reasoner.challenge_premise("Socrates is a human.")
+        self.assertEqual(reasoner.memo.get_stats()['entries'], 0)
+        self.ask(chatter, ["All humans are mortal.", "Socrates is a human."])
+        self.assertEqual(chatter.get_stats()['requests'], 4)
+
+class TestJournaling(SocraticTestCase):
+
+    def test_premises_and_conclusions_are_journaled(self):
+        reasoner = self.SocraticReasoning(FakeChatter(responder=tautology_responder))
+        reasoner.add_premise("All humans are mortal.")
+        reasoner.add_premise("")
+        self.assertEqual(self.SocraticReasoning(reasoner.chatter).load_premises(), ["All humans are mortal."])
+
+        reasoner.draw_conclusion()
+        close_journals()
+        self.assertFalse(os.path.exists('./memory/logs/premises.json'))
+        with open(reasoner.conclusions_journal_file) as file:
+            entry = ujson.loads(file.readline())
+        self.assertEqual(entry["premises"], ["All humans are mortal.", "socrates is wise."])
+        self.assertEqual(entry["conclusion"], "1")
+        self.assertEqual(self.SocraticReasoning(reasoner.chatter).load_premises(), [])
+        with open(reasoner.not_premises_file) as file:
+            self.assertEqual(ujson.loads(file.readline())["message"], "Invalid premise: ")
+
+    def test_challenge_removes_equivalent_premises(self):
+        reasoner = self.SocraticReasoning(FakeChatter())
+        for premise in ["Socrates is a human.", "All humans are mortal.", "human(socrates)", "socrates is a human"]:
+            reasoner.add_premise(premise)
+        reasoner.challenge_premise("Socrates is a human.")
+        self.assertEqual(reasoner.premises, ["All humans are mortal."])
+        self.assertEqual(self.SocraticReasoning(reasoner.chatter).load_premises(), ["All humans are mortal."])
+
+class TestPromptState(SocraticTestCase):
+
+    def test_conversation_grows_by_turns(self):
+        prompts = []
+
+        def responder(prompt):
+            prompts.append(prompt)
+            return "Socrates is mortal." if len(prompts) % 2 else "Maybe"
+
+        chatter = FakeChatter(responder=responder)
+        reasoner = self.SocraticReasoning(chatter)
+        reasoner.add_premise("All humans are mortal.")
+        reasoner.add_premise("Socrates is a human.")
+        reasoner.draw_conclusion()
+
+        # Every request extends the previous one instead of rebuilding a joined premise string
+        self.assertEqual(len(prompts), 10)
+        for previous, current in zip(prompts, prompts[1:]):
+            self.assertTrue(current.startswith(previous))
+        self.assertEqual(prompts[0], "All humans are mortal.\nSocrates is a human.")
+        self.assertEqual(prompts[1], prompts[0] + "\nsocrates is mortal.")
+
+        stats = reasoner.prompt_stats
+        self.assertEqual(stats['requests'], 10)
+        self.assertLess(stats['new_tokens'] * 3, stats['prompt_tokens'])
+        self.assertEqual(reasoner.prompt_state.turns, [])
+
+    def test_sync_keeps_roles_of_matching_turns(self):
+        from prompt_state import PromptState
+        state = PromptState()
+        state.sync(["a", "b"])
+        state.add_assistant("c")
+        state.sync(["a", "b", "c", "d"])
+        self.assertEqual([turn["role"] for turn in state.turns], ["user", "user", "assistant", "user"])
+        state.sync(["a", "x"])
+        self.assertEqual(state.turns, [{"role": "user", "content": "a"}, {"role": "user", "content": "x"}])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+# test_belief_store.py
+import datetime
+import os
+import tempfile
+import unittest
+import ujson
+from belief_store import BeliefStore
+
+class TestBeliefStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = BeliefStore(os.path.join(self.tmp.name, 'beliefs.db'))
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def test_time_range_and_keyword_queries(self):
+        day = datetime.datetime(2024, 5, 1)
+        self.store.add("Added variable: A", timestamp=day)
+        self.store.add("Added expression: A and B", timestamp=day + datetime.timedelta(hours=1))
+        self.store.add({'variables': ['A'], 'expressions': ['A and B']}, source='socratic', timestamp=day + datetime.timedelta(days=1))
+
+        self.assertEqual(self.store.count(), 3)
+        self.assertEqual([b['content'] for b in self.store.query(until=day + datetime.timedelta(hours=2))],
+                         ["Added variable: A", "Added expression: A and B"])
+        self.assertEqual([b['content'] for b in self.store.query(keywords=['expression'])], ["Added expression: A and B"])
+        socratic = self.store.query(since='2024-05-01T12:00:00', source='socratic')
+        self.assertEqual(socratic[0]['content'], {'variables': ['A'], 'expressions': ['A and B']})
+        self.assertEqual(len(self.store.query(keywords='Added', limit=1)), 1)
+
+    def test_migrates_belief_files_once(self):
+        truth = os.path.join(self.tmp.name, 'truth')
+        os.makedirs(truth)
+        with open(os.path.join(truth, '2024-05-01T10:00:00.123456_belief.txt'), 'w') as file:
+            file.write("Added variable: A")
+        with open(os.path.join(truth, 'belief_20240502090000.json'), 'w') as file:
+            ujson.dump({'variables': ['A']}, file)
+        with open(os.path.join(truth, 'valid_truths.jsonl'), 'w') as file:
+            file.write("{}\n")
+
+        self.assertEqual(self.store.migrate(truth, remove=False), 2)
+        self.assertEqual(self.store.migrate(truth), 2)  # already stored: nothing added, files removed
+        self.assertEqual(sorted(os.listdir(truth)), ['valid_truths.jsonl'])
+        beliefs = self.store.query()
+        self.assertEqual([(b['source'], b['content']) for b in beliefs],
+                         [('logic', "Added variable: A"), ('socratic', {'variables': ['A']})])
+        self.assertEqual(beliefs[0]['timestamp'], '2024-05-01T10:00:00.123456')
+
+if __name__ == '__main__':
+    unittest.main()
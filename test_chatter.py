@@ -0,0 +1,438 @@
+# test_chatter.py
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+from chatter import Chatter, GPT4o, IncrementalLower
+from response_cache import ResponseCache, CachedChatter
+from singleflight import SingleFlightChatter
+from router import RouterChatter
+from hedging import HedgedChatter
+from cassette import CassetteChatter
+from fakechatter import FakeChatter, FakeLLM
+from mock_llm_server import MockLLMServer
+from ratelimit import RateLimitedChatter, RateLimiter, RetryPolicy, retry_after
+
+class CountingChatter(Chatter):
+    provider = 'stub'
+    default_model = 'stub-model'
+
+    def __init__(self):
+        self.calls = 0
+
+    async def acomplete(self, knowledge, model=None, **options):
+        self.calls += 1
+        return f"Echo: {knowledge}"
+
+class SlowChatter(CountingChatter):
+
+    def __init__(self, delay=0.05, error=None):
+        super().__init__()
+        self.delay = delay
+        self.error = error
+
+    async def acomplete(self, knowledge, model=None, **options):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return f"Echo: {knowledge}"
+
+class NamedChatter(SlowChatter):
+
+    def __init__(self, provider, delay=0.0, error=None):
+        super().__init__(delay, error)
+        self.provider = provider
+
+    async def acomplete(self, knowledge, model=None, **options):
+        return (await super().acomplete(knowledge, model, **options)) + f" from {self.provider}"
+
+class FakeStatusError(Exception):
+
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+        self.response = type('Response', (), {'headers': headers or {}})()
+
+class FlakyChatter(CountingChatter):
+
+    def __init__(self, errors):
+        super().__init__()
+        self.errors = list(errors)
+
+    async def acomplete(self, knowledge, model=None, **options):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return f"Echo: {knowledge}"
+
+class StreamingChatter(CountingChatter):
+
+    async def astream(self, knowledge, model=None, **options):
+        self.calls += 1
+        for chunk in ["ΟΔΟΣ ", "IS A ", "ROAD Σ", "ΟΦΟΣ"]:
+            yield chunk
+
+class SlowStreamingChatter(StreamingChatter):
+
+    def __init__(self, error=None):
+        super().__init__()
+        self.error = error
+
+    async def astream(self, knowledge, model=None, **options):
+        async for chunk in super().astream(knowledge, model, **options):
+            yield chunk
+            await asyncio.sleep(0.01)
+        if self.error is not None:
+            raise self.error
+
+class TestStreaming(unittest.TestCase):
+
+    def test_incremental_lower_matches_full_lower(self):
+        text = "ΟΔΟΣ IS A ROAD ΣΟΦΟΣ"
+        for cut in range(len(text) + 1):
+            lower = IncrementalLower()
+            streamed = lower.feed(text[:cut]) + lower.feed(text[cut:]) + lower.flush()
+            self.assertEqual(streamed, text.lower())
+
+    def test_stream_response_yields_lowercased_chunks(self):
+        chunks = list(StreamingChatter().stream_response("premise"))
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual("".join(chunks), "ΟΔΟΣ IS A ROAD ΣΟΦΟΣ".lower())
+
+    def test_default_stream_falls_back_to_complete(self):
+        self.assertEqual(list(CountingChatter().stream_response("Hi")), ["echo: hi"])
+
+    def test_backends_must_implement_acomplete(self):
+        class Incomplete(Chatter):
+            provider = 'incomplete'
+
+        with self.assertRaises(TypeError):
+            Incomplete()
+
+class TestResponseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'responses.db')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_repeated_prompt_is_served_from_cache(self):
+        stub = CountingChatter()
+        chatter = CachedChatter(stub, ResponseCache(self.path))
+        self.assertEqual(chatter.generate_response("All humans are mortal."), "echo: all humans are mortal.")
+        self.assertEqual(chatter.generate_response("All  humans are mortal. "), "echo: all humans are mortal.")
+        self.assertEqual(stub.calls, 1)
+        self.assertEqual(chatter.cache.get_stats()['memory_hits'], 1)
+
+    def test_use_cache_false_bypasses_cache(self):
+        stub = CountingChatter()
+        chatter = CachedChatter(stub, ResponseCache(self.path))
+        chatter.generate_response("premise")
+        chatter.generate_response("premise", use_cache=False)
+        self.assertEqual(stub.calls, 2)
+
+    def test_completed_stream_is_cached(self):
+        stub = StreamingChatter()
+        chatter = CachedChatter(stub, ResponseCache(self.path))
+        first = "".join(chatter.stream_response("premise"))
+        second = "".join(chatter.stream_response("premise"))
+        self.assertEqual(first, second)
+        self.assertEqual(stub.calls, 1)
+
+    def test_disk_tier_survives_restart(self):
+        cache = ResponseCache(self.path)
+        cache.set('key', 'response')
+        cache.close()
+        reopened = ResponseCache(self.path)
+        self.assertEqual(reopened.get('key'), 'response')
+        self.assertEqual(reopened.get_stats()['disk_hits'], 1)
+
+    def test_expired_entries_are_misses(self):
+        cache = ResponseCache(self.path, ttl=-1)
+        cache.set('key', 'response')
+        self.assertIsNone(cache.get('key'))
+
+    def test_memory_lookup_does_not_wait_for_the_disk_tier(self):
+        cache = ResponseCache(self.path)
+        cache.set('key', 'response')
+        with cache.lock:  # as a worker thread does during SQLite I/O
+            self.assertEqual(cache.peek('key'), 'response')
+
+    def test_zero_ttl_stores_nothing(self):
+        cache = ResponseCache(self.path, ttl=0)
+        cache.set('key', 'response')
+        self.assertIsNone(cache.get('key'))
+        self.assertEqual(cache.get_stats()['disk_entries'], 0)
+
+    def test_disk_hits_are_recorded_in_batches(self):
+        cache = ResponseCache(self.path, max_entries=1)
+        for key in ('old', 'new'):
+            cache.set(key, 'x' * 8)
+        self.assertEqual(cache.get('old'), 'x' * 8)  # from disk
+        self.assertEqual(list(cache.touched), ['old'])
+        cache.close()
+        reopened = ResponseCache(self.path, max_disk_bytes=20)
+        self.assertEqual(reopened.get_stats()['disk_bytes'], 16)
+        reopened.set('newest', 'x' * 8)  # evicts the least recently used: 'new'
+        self.assertIsNone(reopened.get('new'))
+        self.assertEqual(reopened.get('old'), 'x' * 8)
+        self.assertEqual(reopened.get_stats()['disk_bytes'], 16)
+
+    def test_lru_and_disk_eviction(self):
+        cache = ResponseCache(self.path, max_entries=2, max_disk_bytes=20)
+        for i in range(5):
+            cache.set(f'key{i}', 'x' * 8)
+        stats = cache.get_stats()
+        self.assertEqual(stats['memory_entries'], 2)
+        self.assertLessEqual(stats['disk_entries'], 2)
+        self.assertEqual(cache.get('key4'), 'x' * 8)
+
+class TestSingleFlight(unittest.TestCase):
+
+    def test_concurrent_identical_prompts_share_one_call(self):
+        stub = SlowChatter()
+        chatter = SingleFlightChatter(stub)
+
+        async def burst():
+            return await asyncio.gather(*(chatter.agenerate_response("same prompt") for _ in range(5)))
+
+        self.assertEqual(asyncio.run(burst()), ["echo: same prompt"] * 5)
+        self.assertEqual(stub.calls, 1)
+        stats = chatter.flight.get_stats()
+        self.assertEqual((stats['calls'], stats['shared'], stats['inflight']), (5, 4, 0))
+
+    def test_distinct_prompts_are_not_coalesced(self):
+        stub = SlowChatter()
+        chatter = SingleFlightChatter(stub)
+
+        async def burst():
+            return await asyncio.gather(chatter.agenerate_response("a"), chatter.agenerate_response("b"))
+
+        asyncio.run(burst())
+        self.assertEqual(stub.calls, 2)
+
+    def test_errors_reach_every_waiter(self):
+        stub = SlowChatter(error=RuntimeError("upstream failed"))
+        chatter = SingleFlightChatter(stub)
+
+        async def burst():
+            return await asyncio.gather(*(chatter.agenerate_response("x") for _ in range(3)))
+
+        results = asyncio.run(burst())
+        self.assertTrue(all(r.startswith("error:") for r in results))
+        self.assertEqual(stub.calls, 1)
+
+    def test_concurrent_identical_streams_share_one_call(self):
+        stub = SlowStreamingChatter()
+        chatter = SingleFlightChatter(stub)
+
+        async def read(delay):
+            await asyncio.sleep(delay)
+            return "".join([chunk async for chunk in chatter.astream_response("same prompt")])
+
+        async def burst():
+            # The later readers join a stream that has already produced chunks
+            return await asyncio.gather(*(read(delay) for delay in (0.0, 0.0, 0.015, 0.03)))
+
+        self.assertEqual(asyncio.run(burst()), ["οδος is a road σοφος"] * 4)
+        self.assertEqual(stub.calls, 1)
+        stats = chatter.flight.get_stats()
+        self.assertEqual((stats['calls'], stats['shared'], stats['inflight']), (4, 3, 0))
+
+    def test_stream_errors_reach_every_subscriber(self):
+        stub = SlowStreamingChatter(error=RuntimeError("upstream failed"))
+        chatter = SingleFlightChatter(stub)
+
+        async def read():
+            chunks = []
+            try:
+                async for chunk in chatter.astream("x"):
+                    chunks.append(chunk)
+            except RuntimeError as e:
+                return chunks, str(e)
+
+        async def burst():
+            return await asyncio.wait_for(asyncio.gather(read(), read()), 5)
+
+        self.assertEqual(asyncio.run(burst()), [(["ΟΔΟΣ ", "IS A ", "ROAD Σ", "ΟΦΟΣ"], "upstream failed")] * 2)
+        self.assertEqual(stub.calls, 1)
+
+class TestRouter(unittest.TestCase):
+
+    def test_fails_over_to_next_backend(self):
+        broken = NamedChatter('broken', error=RuntimeError("down"))
+        working = NamedChatter('working')
+        router = RouterChatter([broken, working])
+        self.assertEqual(router.generate_response("Hi"), "echo: hi from working")
+        health = {b['provider']: b for b in router.health()}
+        self.assertEqual(health['broken']['failures'], 1)
+        self.assertFalse(health['broken']['healthy'])
+        self.assertEqual([d['ok'] for d in router.get_stats()['decisions']], [False, True])
+
+    def test_timeout_triggers_failover(self):
+        stuck = NamedChatter('stuck', delay=1.0)
+        fast = NamedChatter('fast')
+        router = RouterChatter([stuck, fast], timeout=0.05)
+        self.assertEqual(router.generate_response("Hi"), "echo: hi from fast")
+
+    def test_prefers_lowest_latency(self):
+        slow = NamedChatter('slow', delay=0.05)
+        fast = NamedChatter('fast', delay=0.0)
+        router = RouterChatter([slow, fast])
+        router.generate_response("warm up slow")
+        router.generate_response("warm up fast")
+        self.assertEqual(router.generate_response("Hi"), "echo: hi from fast")
+
+    def test_recovered_backend_gets_traffic_back_after_cooldown(self):
+        fast = NamedChatter('fast', error=RuntimeError("down"))
+        slow = NamedChatter('slow', delay=0.02)
+        router = RouterChatter([fast, slow], cooldown=0.05)
+        for _ in range(3):
+            self.assertEqual(router.generate_response("Hi"), "echo: hi from slow")
+        fast.error = None
+        time.sleep(0.1)
+        self.assertEqual([router.generate_response("Hi") for _ in range(5)], ["echo: hi from fast"] * 5)
+        health = {b['provider']: b for b in router.health()}
+        self.assertTrue(health['fast']['healthy'])
+        self.assertEqual(health['fast']['error_rate'], 0.0)
+
+    def test_failed_probe_cools_the_backend_down_again(self):
+        fast = NamedChatter('fast', error=RuntimeError("down"))
+        slow = NamedChatter('slow')
+        router = RouterChatter([fast, slow], cooldown=0.05)
+        router.generate_response("Hi")
+        time.sleep(0.1)
+        self.assertEqual(router.generate_response("Hi"), "echo: hi from slow")
+        health = {b['provider']: b for b in router.health()}
+        self.assertFalse(health['fast']['healthy'])
+        self.assertEqual(health['fast']['failures'], 2)
+
+    def test_all_backends_failing_returns_error(self):
+        router = RouterChatter([NamedChatter('a', error=RuntimeError("down")), NamedChatter('b', error=RuntimeError("down"))])
+        self.assertTrue(router.generate_response("Hi").startswith("error:"))
+
+class TestHedging(unittest.TestCase):
+
+    def test_slow_request_is_hedged_to_alternate(self):
+        primary = NamedChatter('primary', delay=0.01)
+        alternate = NamedChatter('alternate')
+        chatter = HedgedChatter(primary, alternate, min_samples=5, min_delay=0.02, budget=0.5)
+        for _ in range(5):
+            self.assertEqual(chatter.generate_response("Hi"), "echo: hi from primary")
+        primary.delay = 1.0
+        self.assertEqual(chatter.generate_response("Hi"), "echo: hi from alternate")
+        stats = chatter.get_stats()
+        self.assertEqual((stats['hedged'], stats['hedge_wins']), (1, 1))
+        time.sleep(0.05)  # the cancelled primary records its time once the cancellation lands
+        # Only the primary's attempts are timed, the last one for as long as it ran
+        self.assertEqual(len(chatter.latency.latencies), 6)
+        self.assertGreaterEqual(chatter.latency.latencies[-1], 0.02)
+
+    def test_budget_caps_hedges(self):
+        primary = NamedChatter('primary', delay=0.01)
+        chatter = HedgedChatter(primary, NamedChatter('alternate'), min_samples=5, min_delay=0.02, budget=0.05)
+        for _ in range(5):
+            chatter.generate_response("Hi")
+        primary.delay = 0.1
+        self.assertEqual(chatter.generate_response("Hi"), "echo: hi from primary")
+        self.assertEqual(chatter.get_stats()['over_budget'], 1)
+
+class TestRateLimiting(unittest.TestCase):
+
+    def make_chatter(self, errors, max_retries=3):
+        return RateLimitedChatter(FlakyChatter(errors), limiter=RateLimiter(), retry=RetryPolicy(max_retries, base=0.001, cap=0.01))
+
+    def test_retries_throttled_and_server_errors(self):
+        chatter = self.make_chatter([FakeStatusError(429, {'retry-after-ms': '5'}), FakeStatusError(503)])
+        self.assertEqual(chatter.generate_response("Hi"), "echo: hi")
+        stats = chatter.get_stats()
+        self.assertEqual((stats['requests'], stats['retries'], stats['throttled']), (3, 2, 1))
+        self.assertLess(stats['concurrency_limit'], 4)
+
+    def test_streams_are_limited_and_retried_before_the_first_chunk(self):
+        chatter = self.make_chatter([FakeStatusError(429, {'retry-after-ms': '5'}), FakeStatusError(503)])
+        self.assertEqual("".join(chatter.stream_response("Hi")), "echo: hi")
+        stats = chatter.get_stats()
+        self.assertEqual((stats['requests'], stats['retries'], stats['throttled'], stats['inflight']), (3, 2, 1, 0))
+
+    def test_streams_are_not_retried_after_the_first_chunk(self):
+        class BrokenStream(CountingChatter):
+            async def astream(self, knowledge, model=None, **options):
+                self.calls += 1
+                yield "Partial "
+                raise FakeStatusError(503)
+
+        chatter = RateLimitedChatter(BrokenStream(), limiter=RateLimiter(), retry=RetryPolicy(3, base=0.001, cap=0.01))
+        chunks = list(chatter.stream_response("Hi"))
+        self.assertEqual(chunks[0], "partial ")
+        self.assertTrue(chunks[-1].startswith("error:"))
+        self.assertEqual((chatter.chatter.calls, chatter.get_stats()['failures']), (1, 1))
+
+    def test_fatal_errors_are_not_retried(self):
+        chatter = self.make_chatter([FakeStatusError(400)])
+        self.assertTrue(chatter.generate_response("Hi").startswith("error:"))
+        self.assertEqual(chatter.chatter.calls, 1)
+
+    def test_gives_up_after_max_retries(self):
+        chatter = self.make_chatter([FakeStatusError(500)] * 5, max_retries=2)
+        self.assertTrue(chatter.generate_response("Hi").startswith("error:"))
+        self.assertEqual(chatter.get_stats()['failures'], 1)
+
+    def test_retry_after_header(self):
+        self.assertEqual(retry_after(FakeStatusError(429, {'retry-after': '2'})), 2.0)
+        self.assertIsNone(retry_after(FakeStatusError(429)))
+
+class TestFakeLLM(unittest.TestCase):
+
+    def test_fake_chatter_is_deterministic(self):
+        first = FakeChatter(seed=1).generate_response("All humans are mortal.")
+        second = FakeChatter(seed=2).generate_response("All humans are mortal.")
+        self.assertEqual(first, second)
+        self.assertEqual(FakeChatter(responses={"mortal": "Socrates is mortal."}).generate_response("All humans are mortal."),
+                         "socrates is mortal.")
+
+    def test_fake_chatter_injects_errors(self):
+        chatter = FakeChatter(error_rate=1.0)
+        self.assertTrue(chatter.generate_response("Hi").startswith("error:"))
+        self.assertEqual(chatter.get_stats()['errors'], 1)
+
+    def test_mock_server_speaks_openai_protocol(self):
+        llm = FakeLLM(responses={"Socrates": "Socrates is mortal."})
+        with MockLLMServer(llm=llm) as server:
+            chatter = GPT4o('mock', base_url=server.base_url, max_retries=0)
+            self.assertEqual(chatter.generate_response("Socrates is a human."), "socrates is mortal.")
+            self.assertEqual(list(chatter.stream_response("Socrates is a human.")), ["socrates ", "is ", "mortal."])
+            llm.error_rate, llm.error_status = 1.0, 429
+            self.assertTrue(chatter.generate_response("Socrates is a human.").startswith("error:"))
+
+class TestCassette(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'session.jsonl')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_replay_serves_recorded_responses_in_order(self):
+        recorder = CassetteChatter(FakeChatter(), self.path, mode='record')
+        recorded = [recorder.generate_response("Socrates is a human."), "".join(recorder.stream_response("All humans are mortal."))]
+        recorder.close()
+
+        player = CassetteChatter(None, self.path, mode='replay')
+        self.assertEqual(player.generate_response("Socrates is a human."), recorded[0])
+        self.assertEqual("".join(player.stream_response("All humans are mortal.")), recorded[1])
+        self.assertEqual(player.get_stats()['replayed'], 2)
+
+    def test_unrecorded_request_is_a_miss(self):
+        CassetteChatter(FakeChatter(), self.path, mode='record').close()
+        player = CassetteChatter(None, self.path, mode='replay')
+        self.assertTrue(player.generate_response("never recorded").startswith("error:"))
+        self.assertEqual(player.get_stats()['misses'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+# test_inference.py
+import time
+import unittest
+from inference import InferenceEngine, Rule, unify
+
+ANCESTOR_RULES = [
+    Rule(('ancestor', ('?x', '?y')), [('parent', ('?x', '?y'))]),
+    Rule(('ancestor', ('?x', '?z')), [('parent', ('?x', '?y')), ('ancestor', ('?y', '?z'))]),
+]
+
+class TestInferenceEngine(unittest.TestCase):
+
+    def test_syllogisms_from_premises(self):
+        engine = InferenceEngine()
+        for premise in ("All humans are mortal.", "Socrates is a human.", "All mortals are finite.",
+                        "No gods are mortal.", "Zeus is a god."):
+            self.assertTrue(engine.add_premise(premise))
+        self.assertFalse(engine.add_premise("Hello there"))
+        self.assertTrue(engine.entails("Socrates is finite."))
+        self.assertTrue(engine.entails("finite(socrates)"))
+        self.assertTrue(engine.entails("All humans are finite."))
+        self.assertTrue(engine.entails("Zeus is not mortal."))
+        self.assertFalse(engine.entails("Zeus is finite."))
+        self.assertTrue(engine.entails("No mortals are gods."))
+        self.assertFalse(engine.entails("All finites are humans."))
+        self.assertEqual(engine.explain('finite', 'socrates'),
+                         (('finite', ('socrates',)), 'finite(?x) :- mortal(?x)',
+                          [(('mortal', ('socrates',)), 'mortal(?x) :- human(?x)', [(('human', ('socrates',)), None, [])])]))
+        engine.add_premise("Zeus is mortal.")
+        self.assertEqual(engine.contradictions(), [('mortal', ('zeus',))])
+
+    def test_universal_needs_a_rule_not_examples(self):
+        engine = InferenceEngine()
+        engine.add_premise("Socrates is a human.")
+        engine.add_premise("Socrates is mortal.")
+        self.assertFalse(engine.entails("All humans are mortal."))
+        self.assertFalse(engine.entails("No humans are gods."))
+
+    def test_derived_excludes_what_was_given(self):
+        engine = InferenceEngine()
+        for premise in ("All humans are mortal.", "All mortals are finite.", "Socrates is a human."):
+            engine.add_premise(premise)
+        self.assertTrue(engine.entails("Socrates is mortal.", derived=True))
+        self.assertFalse(engine.entails("Socrates is a human.", derived=True))
+        self.assertTrue(engine.entails("All humans are finite.", derived=True))
+        self.assertFalse(engine.entails("All humans are mortal.", derived=True))
+        self.assertTrue(engine.entails("All humans are mortal."))
+
+    def test_fork_leaves_the_original_alone(self):
+        engine = InferenceEngine()
+        engine.add_premise("All humans are mortal.")
+        fork = engine.fork()
+        fork.add_premise("Plato is a human.")
+        self.assertTrue(fork.entails("Plato is mortal."))
+        self.assertFalse(engine.entails("Plato is mortal."))
+
+    def test_incremental_agenda(self):
+        engine = InferenceEngine(ANCESTOR_RULES, [('parent', ('a', 'b'))])
+        self.assertEqual(engine.query('ancestor', 'a', '?who'), [{'?who': 'b'}])
+        engine.add_fact('parent', ('b', 'c'))
+        self.assertEqual(len(engine.agenda), 1)  # only the new fact is processed
+        self.assertEqual(sorted(b['?who'] for b in engine.query('ancestor', 'a', '?who')), ['b', 'c'])
+        self.assertTrue(engine.holds('ancestor', 'a', 'c'))
+        self.assertEqual(engine.query('ancestor', 'c', 'a'), [])
+        # A rule added later sees the facts already known
+        engine.add_rule(Rule(('related', ('?y', '?x')), [('ancestor', ('?x', '?y'))]))
+        self.assertTrue(engine.holds('related', 'c', 'a'))
+
+    def test_unify(self):
+        self.assertEqual(unify(('?x', '?x'), ('a', 'a'), {}), {'?x': 'a'})
+        self.assertIsNone(unify(('?x', '?x'), ('a', 'b'), {}))
+        self.assertIsNone(unify(('?x', 'b'), ('a', 'c'), {}))
+        with self.assertRaises(ValueError):
+            Rule(('p', ('?x', '?z')), [('q', ('?x',))])
+
+    def test_closure_of_tens_of_thousands_of_facts(self):
+        engine = InferenceEngine(ANCESTOR_RULES)
+        for child in range(1, 20000):
+            engine.add_fact('parent', (f"n{(child - 1) // 3}", f"n{child}"))  # a ternary tree
+        started = time.monotonic()
+        engine.run()
+        self.assertLess(time.monotonic() - started, 30)
+        self.assertEqual(len(engine.query('ancestor', 'n0', '?descendant')), 19999)
+        self.assertEqual(len(engine.query('ancestor', '?ancestor', 'n19999')), 9)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+# test_journal.py
+import os
+import tempfile
+import threading
+import time
+import unittest
+import ujson
+from journal import Journal, apply_list_record
+
+class TestJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'premises.jsonl')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def open(self, **options):
+        return Journal(self.path, apply=apply_list_record, **options)
+
+    def test_state_survives_reopen(self):
+        journal = self.open()
+        journal.append({"op": "add", "item": "a"})
+        journal.append({"op": "add", "item": "b"})
+        journal.append({"op": "remove", "item": "a"})
+        journal.close()
+        self.assertEqual(self.open().load(), ["b"])
+
+    def test_append_does_not_wait_for_fsync(self):
+        import journal as journal_module
+        journal = self.open(sync_interval=60)
+        journal.append({"op": "add", "item": "a"})
+        syncing, release = threading.Event(), threading.Event()
+        fsync = journal_module.os.fsync
+
+        def slow_fsync(descriptor):
+            syncing.set()
+            release.wait(5)
+            fsync(descriptor)
+
+        journal_module.os.fsync = slow_fsync
+        try:
+            flusher = threading.Thread(target=journal.flush)
+            flusher.start()
+            self.assertTrue(syncing.wait(5))
+            started = time.monotonic()
+            journal.append({"op": "add", "item": "b"})
+            self.assertLess(time.monotonic() - started, 1.0)  # not held up behind the fsync
+            release.set()
+            flusher.join()
+        finally:
+            journal_module.os.fsync = fsync
+        journal.close()
+        self.assertEqual(self.open().load(), ["a", "b"])
+
+    def test_compaction_keeps_state_and_truncates(self):
+        journal = self.open(compact_every=10)
+        for index in range(25):
+            journal.append({"op": "add", "item": index})
+        journal.compact()
+        journal.append({"op": "add", "item": 25})
+        journal.close()
+
+        with open(self.path) as file:
+            self.assertEqual(len(file.readlines()), 1)
+        self.assertEqual(self.open().load(), list(range(26)))
+
+    def test_interrupted_compaction_does_not_replay_snapshot_records(self):
+        journal = self.open()
+        journal.append({"op": "add", "item": "a"})
+        journal.flush()
+        journal.compact()
+        journal.close()
+        # The journal rewrite never happened: its old line is still there
+        with open(self.path, 'a') as file:
+            file.write(ujson.dumps({"seq": 1, "data": {"op": "add", "item": "a"}}) + "\n")
+        self.assertEqual(self.open().load(), ["a"])
+
+    def test_torn_last_line_is_skipped(self):
+        journal = self.open()
+        journal.append({"op": "add", "item": "a"})
+        journal.close()
+        with open(self.path, 'a') as file:
+            file.write('{"seq": 2, "da')
+        self.assertEqual(self.open().load(), ["a"])
+
+    def test_legacy_file_is_the_starting_state(self):
+        legacy = os.path.join(self.tmp.name, 'premises.json')
+        with open(legacy, 'w') as file:
+            ujson.dump({"premises": ["old"], "conclusion": "x"}, file)
+        journal = self.open(legacy_path=legacy)
+        journal.append({"op": "add", "item": "new"})
+        self.assertEqual(journal.load(), ["old", "new"])
+        journal.close()
+
+    def test_plain_log(self):
+        legacy = os.path.join(self.tmp.name, 'notpremise.json')
+        with open(legacy, 'w') as file:
+            ujson.dump([{"level": "ERROR", "message": "old"}], file)
+        journal = Journal(self.path, legacy_path=legacy)
+        journal.append({"level": "INFO", "message": "new"})
+        self.assertEqual([entry["message"] for entry in journal.load()], ["old", "new"])
+        journal.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+# test_log_pipeline.py
+import os
+import tempfile
+import unittest
+from log_pipeline import LogPipeline, PipelineHandler, configure_logger, flush_logs
+
+class TestLogPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+
+    def tearDown(self):
+        flush_logs()
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def test_instances_do_not_add_handlers(self):
+        from logic import LogicTables
+        tables = [LogicTables() for _ in range(5)]
+        handlers = [handler for handler in tables[0].logger.handlers if isinstance(handler, PipelineHandler)]
+        self.assertEqual(len(handlers), 1)
+
+        tables[0].add_variable('A')
+        flush_logs()
+        for path in ('./mindx/errors/log.txt', './memory/truth/logs.txt'):
+            with open(path) as file:
+                lines = file.readlines()
+            self.assertEqual(len(lines), 1)
+            self.assertTrue(lines[0].rstrip().endswith("LogicTables - INFO - Added variable: A"))
+
+    def test_reconfiguring_follows_new_paths(self):
+        logger = configure_logger('test.pipeline', [('./first/log.txt', '%(message)s')])
+        logger.info("one")
+        flush_logs()
+        logger = configure_logger('test.pipeline', [('./second/log.txt', '%(message)s')])
+        logger.info("two")
+        flush_logs()
+        with open('./first/log.txt') as file:
+            self.assertEqual(file.read(), "one\n")
+        with open('./second/log.txt') as file:
+            self.assertEqual(file.read(), "two\n")
+
+    def test_rotation_by_size(self):
+        pipeline = LogPipeline()
+        logger = pipeline.configure('test.rotation', [('./rotating.txt', '%(message)s')], max_bytes=100, backup_count=2)
+        for index in range(30):
+            logger.info(f"line {index:02d}" + "." * 20)
+            pipeline.flush()
+        pipeline.stop()
+        logger.handlers.clear()
+
+        self.assertTrue(os.path.exists('./rotating.txt.1'))
+        self.assertTrue(os.path.exists('./rotating.txt.2'))
+        self.assertFalse(os.path.exists('./rotating.txt.3'))
+        for path in ('./rotating.txt', './rotating.txt.1'):
+            self.assertLessEqual(os.path.getsize(path), 100)
+        with open('./rotating.txt') as file:
+            self.assertTrue(file.read().splitlines()[-1].startswith("line 29"))
+
+if __name__ == '__main__':
+    unittest.main()
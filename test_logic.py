@@ -0,0 +1,338 @@
+# test_logic.py
+import itertools
+import os
+import tempfile
+import unittest
+from expression import ExpressionError, compile_expression, parse
+from log_pipeline import flush_logs
+
+class TestExpression(unittest.TestCase):
+
+    def truth(self, text, **values):
+        return compile_expression(text)(values)
+
+    def test_operators_match_their_definitions(self):
+        definitions = {
+            'and': lambda x, y: x and y,
+            'or': lambda x, y: x or y,
+            'xor': lambda x, y: x != y,
+            'nand': lambda x, y: not (x and y),
+            'nor': lambda x, y: not (x or y),
+            'implication': lambda x, y: not x or y,
+        }
+        for name, definition in definitions.items():
+            for a, b in itertools.product([True, False], repeat=2):
+                self.assertEqual(self.truth(f"A {name} B", A=a, B=b), definition(a, b), name)
+                self.assertEqual(self.truth(f"{name}(A, B)", A=a, B=b), definition(a, b), name)
+        self.assertFalse(self.truth("not A", A=True))
+
+    def test_precedence_and_associativity(self):
+        self.assertEqual(parse("not A and B or C"), ('or', ('and', ('not', ('var', 'A')), ('var', 'B')), ('var', 'C')))
+        self.assertEqual(parse("A implication B implication C"),
+                         ('implication', ('var', 'A'), ('implication', ('var', 'B'), ('var', 'C'))))
+        self.assertEqual(parse("A -> B & !C"), ('implication', ('var', 'A'), ('and', ('var', 'B'), ('not', ('var', 'C')))))
+        self.assertEqual(parse("and(A, B, C)"), ('and', ('and', ('var', 'A'), ('var', 'B')), ('var', 'C')))
+
+    def test_literals(self):
+        for text in ("1", "true", "True", "TRUE", "A or not A", "false implication A"):
+            self.assertTrue(self.truth(text, A=False), text)
+        for text in ("0", "false", "False and A"):
+            self.assertFalse(self.truth(text, A=True), text)
+
+    def test_rejects_everything_else(self):
+        for text in ("", "A and", "(A", "A B", "2", "__import__('os').system('true')", "all humans are mortal.", "xor(A)"):
+            with self.assertRaises(ExpressionError, msg=text):
+                parse(text)
+
+    def test_compiled_once(self):
+        self.assertIs(compile_expression("A and B"), compile_expression("A and B"))
+        self.assertEqual(compile_expression("B or A and C").variables, ['B', 'A', 'C'])
+
+class TestColumnarTable(unittest.TestCase):
+
+    def test_matches_row_wise_evaluation(self):
+        from truth_table import build_table
+        variables = ['A', 'B', 'C']
+        expressions = ['A and B', 'not C', 'A xor B nor C', 'implication(A, nand(B, C))', 'true', 'D or A']
+        table = build_table(variables, expressions)
+        combos = list(itertools.product([True, False], repeat=3))
+        self.assertEqual(len(table), 8)
+        for index, combo in enumerate(combos):
+            values = dict(zip(variables, combo))
+            expected = dict(values)
+            for expression in expressions[:-1]:
+                expected[expression] = compile_expression(expression)(values)
+            expected['D or A'] = False  # unknown variable, as with eval
+            self.assertEqual(table.row(index), expected)
+        self.assertEqual(table.first_false('A and B'), 2)
+        self.assertEqual(table.count_true('true'), 8)
+
+    def test_extend_matches_rebuild(self):
+        from truth_table import build_table, extend_expression, extend_variable
+        table = build_table([], ['1', 'A and C'])
+        for variable in ('A', 'B', 'C'):
+            table = extend_variable(table, variable)
+        table = extend_expression(table, 'B xor C')
+        expected = build_table(['A', 'B', 'C'], ['1', 'A and C', 'B xor C'])
+        self.assertEqual(table.to_rows(), expected.to_rows())
+        self.assertEqual(table.errors, {})
+
+    def test_no_variables_has_one_row(self):
+        from truth_table import build_table
+        self.assertEqual(build_table([], ['1']).to_rows(), [{'1': True}])
+
+class TestStreaming(unittest.TestCase):
+
+    variables = ['A', 'B', 'C', 'D', 'E']
+    expressions = ['A and B', 'C xor not E', 'D implication A']
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_chunks_match_whole_table(self):
+        from truth_table import build_table, find_row, iter_chunks, iter_rows
+        whole = build_table(self.variables, self.expressions)
+        chunks = list(iter_chunks(self.variables, self.expressions, chunk_rows=8))
+        self.assertEqual([chunk.start for chunk in chunks], [0, 8, 16, 24])
+        self.assertEqual(list(iter_rows(self.variables, self.expressions, chunk_rows=8)), whole.to_rows())
+        self.assertEqual(find_row(self.variables, 'A and B', value=True), 0)
+        self.assertEqual(find_row(self.variables, 'D implication A'), whole.first_false('D implication A'))
+        self.assertIsNone(find_row(self.variables, 'A or not A'))
+        self.assertIsNone(find_row(self.variables, 'A and B', value=True, chunk_rows=1, cancelled=lambda: True))
+
+    def test_stops_early(self):
+        from truth_table import iter_chunks
+        variables = [f"V{index}" for index in range(40)]  # 2**40 rows: never materialized
+        first = next(iter(iter_chunks(variables, ['V0 and V39'], chunk_rows=16)))
+        self.assertEqual((first.start, len(first)), (0, 16))
+
+    def test_export_formats(self):
+        import csv
+        import ujson
+        from table_file import export_table, read_binary, read_header
+        from truth_table import build_table, iter_chunks
+        for variables in (self.variables, ['A', 'B']):  # 32 rows, and 4 rows in a partial byte
+            whole = build_table(variables, self.expressions)
+            path = os.path.join(self.tmp.name, 'table')
+            self.assertEqual(export_table(path + '.csv', iter_chunks(variables, self.expressions, 8), len(whole)), len(whole))
+            with open(path + '.csv', newline='') as file:
+                rows = list(csv.reader(file))
+            self.assertEqual(rows[0], whole.headers)
+            self.assertEqual(rows[1:], [[str(value) for value in row.values()] for row in whole.iter_rows()])
+            export_table(path + '.jsonl', iter_chunks(variables, self.expressions, 8), len(whole))
+            with open(path + '.jsonl') as file:
+                self.assertEqual([ujson.loads(line) for line in file], whole.to_rows())
+            export_table(path + '.ttbl', iter_chunks(variables, self.expressions, 8), len(whole))
+            self.assertEqual(read_header(path + '.ttbl')['rows'], len(whole))
+            self.assertEqual(read_binary(path + '.ttbl').to_rows(), whole.to_rows())
+        with self.assertRaises(ValueError):
+            export_table(path + '.txt', iter_chunks(variables, self.expressions), len(whole))
+
+class TestTableFile(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'table.ttbl')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_mapped_queries_match_table(self):
+        from table_file import TableFile, write_table
+        from truth_table import build_table
+        variables = [f"V{index}" for index in range(11)]
+        table = build_table(variables, ['V0 and V10', 'V1 or not V1', 'V2 xor V3'])
+        write_table(self.path, table)
+        with TableFile(self.path) as mapped:
+            self.assertEqual(mapped.headers, table.headers)
+            for name in mapped.headers:
+                self.assertEqual(mapped.count_true(name), table.count_true(name))
+                self.assertEqual(mapped.first_false(name), table.first_false(name))
+                self.assertEqual(mapped.column(name, 5, 300).tolist(), table.column(name)[5:300].tolist())
+            self.assertEqual(mapped.row(1234), table.row(1234))
+            self.assertEqual(len(mapped.packed('V0')), 2 ** 11 // 8)  # 1 bit per row
+            self.assertEqual(mapped.to_table().to_rows(), table.to_rows())
+
+    def test_converts_appended_json(self):
+        import ujson
+        from table_file import TableFile, convert_truth_tables_json
+        source = os.path.join(self.tmp.name, 'truth_tables.json')
+        with open(source, 'w') as file:
+            ujson.dump({'variables': ['A', 'B'], 'expressions': ['A and B'], 'valid_truths': []}, file, indent=2)
+            for truth in ("1", "A or not A"):
+                ujson.dump({'truth': truth, 'timestamp': '2024-05-01 10:00:00'}, file, indent=2)
+                file.write("\n")
+        records = os.path.join(self.tmp.name, 'truth_tables.jsonl')
+        self.assertEqual(convert_truth_tables_json(source, records, self.path), 3)
+        with open(records) as file:
+            self.assertEqual([ujson.loads(line).get('truth') for line in file], [None, "1", "A or not A"])
+        with TableFile(self.path) as mapped:
+            self.assertEqual(mapped.count_true('A and B'), 1)
+
+    def test_conversion_keeps_the_valid_prefix(self):
+        from table_file import convert_truth_tables_json
+        source = os.path.join(self.tmp.name, 'truth_tables.json')
+        with open(source, 'w') as file:
+            file.write('{"truth": "1"}\n{"truth": "A or not A"}\n{"truth": "A an')
+        records = os.path.join(self.tmp.name, 'truth_tables.jsonl')
+        self.assertEqual(convert_truth_tables_json(source, records, self.path), 2)
+        self.assertFalse(os.path.exists(self.path))  # no logic table in the records
+        self.assertFalse(os.path.exists(records + '.tmp'))
+
+class TestSharded(unittest.TestCase):
+
+    variables = [f"V{index}" for index in range(13)]
+    expressions = ['V0 and V12', 'V1 or not V1', 'V2 xor V11', 'V4 or']
+
+    def test_summary_matches_table(self):
+        from sharded_table import summarize_sharded
+        from truth_table import assignment_of, build_table
+        table = build_table(self.variables, self.expressions)
+        summary = summarize_sharded(self.variables, self.expressions, workers=2, chunk_rows=256)
+        self.assertEqual(summary['rows'], 2 ** 13)
+        self.assertEqual(set(summary['errors']), {'V4 or'})
+        for expression in self.expressions:
+            self.assertEqual(summary['true'][expression], table.count_true(expression))
+            first_false = table.first_false(expression)
+            self.assertEqual(summary['first_false'][expression],
+                             None if first_false is None else assignment_of(self.variables, first_false))
+
+    def test_find_matches_sequential_scan(self):
+        from sharded_table import find_sharded, shard_ranges
+        from truth_table import assignment_of, find_row
+        self.assertEqual(shard_ranges(100, 3), [(0, 40), (40, 80), (80, 100)])
+        for expression, value in (('V3 and V12', True), ('V0 or V1', False), ('V1 or not V1', False)):
+            index = find_row(self.variables, expression, value)
+            self.assertEqual(find_sharded(self.variables, expression, value, workers=2, chunk_rows=256),
+                             None if index is None else assignment_of(self.variables, index))
+
+class TestBDD(unittest.TestCase):
+
+    def test_agrees_with_enumeration(self):
+        from bdd import BDD
+        from truth_table import build_table
+        variables = ['A', 'B', 'C']
+        expressions = ['A and B', 'A xor B nor C', 'implication(A, nand(B, C))', 'A or not A', 'A and not A', '1']
+        for expression in expressions:
+            bdd = BDD(variables)
+            node = bdd.build(compile_expression(expression).tree)
+            self.assertEqual(bdd.count(node), build_table(variables, [expression]).count_true(expression), expression)
+
+    def test_decides_beyond_enumeration(self):
+        from bdd import check_equivalent, check_satisfiable, check_tautology
+        names = [f"x{i}" for i in range(40)]
+        chain = " and ".join(f"(x{i} implication x{i + 1})" for i in range(39))
+        self.assertEqual(check_tautology(f"({chain}) implication (x0 implication x39)"), (True, None))
+        holds, counterexample = check_tautology(chain)
+        self.assertFalse(holds)
+        self.assertFalse(compile_expression(chain)(counterexample))
+        self.assertEqual(sorted(counterexample), sorted(names))
+        self.assertEqual(check_satisfiable(f"({chain}) and x0 and not x39"), (False, None))
+        self.assertEqual(check_equivalent(" or ".join(names), f"not ({' and '.join('not ' + name for name in names)})"),
+                         (True, None))
+
+    def test_counterexamples(self):
+        from bdd import check_equivalent, check_tautology
+        self.assertEqual(check_tautology('A or B'), (False, {'A': False, 'B': False}))
+        equivalent, assignment = check_equivalent('A implication B', 'B implication A')
+        self.assertFalse(equivalent)
+        self.assertNotEqual(compile_expression('A implication B')(assignment),
+                            compile_expression('B implication A')(assignment))
+
+class TestLogicTables(unittest.TestCase):
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+        from logic import LogicTables
+        self.tables = LogicTables()
+        for variable in ('A', 'B'):
+            self.tables.add_variable(variable)
+
+    def tearDown(self):
+        flush_logs()  # the log pipeline writes under ./memory and ./mindx
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def test_truth_table(self):
+        self.tables.add_expression('A xor B')
+        self.tables.add_expression('A and C')
+        table = self.tables.generate_truth_table()
+        self.assertEqual([row['A xor B'] for row in table], [False, True, True, False])
+        self.assertEqual([row['A and C'] for row in table], [False] * 4)  # C is unknown
+
+    def test_tautology_and_validation(self):
+        self.assertTrue(self.tables.tautology('A implication (B implication A)'))
+        self.assertTrue(self.tables.tautology('true'))
+        self.assertFalse(self.tables.tautology('A or B'))
+        self.assertFalse(self.tables.tautology('socrates is mortal.'))
+        self.tables.add_expression('A or not A')
+        self.assertTrue(self.tables.validate_truth('A or not A'))
+
+    def test_beliefs_go_to_the_store(self):
+        self.tables.add_expression('A xor B')
+        self.tables.generate_truth_table()
+        contents = [belief['content'] for belief in self.tables.beliefs.query(source='logic')]
+        self.assertEqual(contents, ["Added variable: A", "Added variable: B", "Added expression: A xor B",
+                                    "Generated truth table with 4 rows"])
+        self.assertFalse([name for name in os.listdir('memory/truth') if name.endswith('_belief.txt')])
+
+    def test_iterate_and_export(self):
+        self.tables.add_expression('A xor B')
+        self.assertEqual(list(self.tables.iter_truth_table(chunk_rows=8)), self.tables.generate_truth_table())
+        self.assertEqual(self.tables.export_truth_table('tables/truth.jsonl'), 4)
+        self.assertTrue(os.path.exists('tables/truth.jsonl'))
+
+    def test_table_cache(self):
+        from truth_table import build_table
+        self.tables.add_expression('A and C')
+        self.tables.generate_truth_table()
+        self.tables.generate_truth_table()
+        self.assertEqual(self.tables.get_table_stats(), {'hits': 1, 'misses': 1, 'extensions': 0, 'rows': 4})
+        self.tables.add_variable('C')
+        self.tables.add_expression('B or C')
+        table = self.tables.generate_columnar_table()
+        self.assertEqual(table.to_rows(), build_table(['A', 'B', 'C'], ['A and C', 'B or C']).to_rows())
+        self.assertEqual(self.tables.get_table_stats()['extensions'], 1)
+        self.assertEqual(self.tables.generate_columnar_table(['B or C']).headers, ['A', 'B', 'C', 'B or C'])
+        self.tables.expressions.remove('A and C')  # not an extension: rebuilt
+        self.assertEqual(self.tables.generate_columnar_table().expressions, ['B or C'])
+        self.assertEqual(self.tables.get_table_stats()['misses'], 2)
+
+    def test_large_diagram_falls_back_to_sharded_search(self):
+        for index in range(13):
+            self.tables.add_variable(f"V{index}")
+        self.tables.node_limit = 4
+        self.tables.workers = 2
+        chain = " and ".join(f"(V{index} implication V{index + 1})" for index in range(12))
+        self.assertFalse(self.tables.tautology(chain))
+        self.assertFalse(compile_expression(chain)(self.tables.last_counterexample))
+        self.assertTrue(self.tables.tautology(f"({chain}) implication (V0 implication V12)"))
+        self.assertEqual(self.tables.summarize_truth_table(['A or B'], workers=1)['true'], {'A or B': 3 * 2 ** 13})
+        self.tables.close()
+
+    def test_too_large_to_search_is_undecided(self):
+        for index in range(13):
+            self.tables.add_variable(f"V{index}")
+        self.tables.node_limit = 4
+        self.tables.shard_row_limit = 2 ** 14
+        chain = " and ".join(f"(V{index} implication V{index + 1})" for index in range(12))
+        self.assertIsNone(self.tables.tautology(chain))
+        self.assertIsNone(self.tables.last_counterexample)
+        self.assertIsNone(self.tables.equivalent(chain, 'V0'))
+
+    def test_satisfiable_and_equivalent(self):
+        self.assertFalse(self.tables.tautology('A implication B'))
+        self.assertEqual(self.tables.last_counterexample, {'A': True, 'B': False})
+        self.assertTrue(self.tables.satisfiable('A and not B'))
+        self.assertFalse(self.tables.satisfiable('A and not A'))
+        self.assertTrue(self.tables.equivalent('A implication B', 'not A or B'))
+        self.assertFalse(self.tables.equivalent('A nand B', 'A nor B'))
+        self.assertFalse(self.tables.equivalent('A', 'C'))  # C is unknown
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+# test_premise_store.py
+import time
+import unittest
+from premise_store import PremiseStore, parse_fact
+
+class TestParseFact(unittest.TestCase):
+
+    def test_phrasings_of_one_fact_agree(self):
+        fact = ('human', ('socrates',))
+        self.assertEqual(parse_fact("Socrates is a human."), fact)
+        self.assertEqual(parse_fact("human(Socrates)"), fact)
+        self.assertEqual(parse_fact({'type': 'fact', 'relation': 'human', 'arguments': ['Socrates']}), fact)
+        self.assertEqual(parse_fact("All humans are mortal."), parse_fact("every human is mortal"))
+        self.assertIsNone(parse_fact("Hello there"))
+
+class TestPremiseStore(unittest.TestCase):
+
+    def test_behaves_like_a_list(self):
+        store = PremiseStore(["a", "b", "a", "c"])
+        store.remove("a")
+        self.assertEqual(store, ["b", "a", "c"])
+        self.assertEqual(store[1:], ["a", "c"])
+        self.assertIn("c", store)
+        self.assertNotIn("d", store)
+        self.assertEqual(str(store), "['b', 'a', 'c']")
+        with self.assertRaises(ValueError):
+            store.remove("d")
+
+    def test_ids_are_stable(self):
+        store = PremiseStore()
+        first = store.add("Socrates is a human.")
+        second = store.add("All humans are mortal.")
+        store.insert(0, "Plato is a human.")
+        store.remove("Socrates is a human.")
+        self.assertEqual(store.id_of("All humans are mortal."), second)
+        self.assertIsNone(store.get(first))
+
+    def test_equivalents_and_indexes(self):
+        store = PremiseStore(["Socrates is a human.", "human(socrates)", "socrates is a HUMAN", "Plato is a human."])
+        self.assertEqual(store.equivalents("Socrates is a human."), [0, 1, 2])
+        self.assertEqual(store.with_relation('human'), list(store))
+        self.assertEqual(store.with_argument('plato'), ["Plato is a human."])
+
+    def test_removal_scales(self):
+        store = PremiseStore(f"Person{index} is a human." for index in range(20000))
+        started = time.perf_counter()
+        for index in range(0, 20000, 2):
+            store.remove(f"Person{index} is a human.")
+        self.assertLess(time.perf_counter() - started, 1.0)
+        self.assertEqual(len(store), 10000)
+        self.assertEqual(store[0], "Person1 is a human.")
+
+if __name__ == '__main__':
+    unittest.main()
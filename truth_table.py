@@ -0,0 +1,246 @@
+# truth_table.py
+import numpy as np
+from expression import ExpressionError, compile_expression
+
+def assignment_columns(n, start=0, stop=None):
+    """
+    Returns the variable columns of rows start..stop of the truth table over n variables.
+
+    Rows follow itertools.product([True, False], repeat=n): the first variable is the most
+    significant, and in row i variable j is True when bit n-1-j of i is 0.
+
+    Args:
+        n: The number of variables.
+        start: The first row.
+        stop: The row after the last, or None for 2**n.
+
+    Returns:
+        list: One boolean array per variable.
+    """
+    stop = 2 ** n if stop is None else stop
+    index = np.arange(start, stop, dtype=np.int64)
+    return [((index >> (n - 1 - j)) & 1) == 0 for j in range(n)]
+
+def evaluate_tree(tree, columns, rows):
+    """
+    Evaluates an expression tree over whole columns at once.
+
+    Args:
+        tree: A tree from expression.parse.
+        columns: Dict of variable name to boolean array.
+        rows: The number of rows, for constants.
+
+    Returns:
+        numpy.ndarray: The boolean result column.
+
+    Raises:
+        KeyError: If a variable has no column.
+    """
+    kind = tree[0]
+    if kind == 'var':
+        return columns[tree[1]]
+    if kind == 'const':
+        return np.full(rows, tree[1], dtype=bool)
+    if kind == 'not':
+        return ~evaluate_tree(tree[1], columns, rows)
+    left = evaluate_tree(tree[1], columns, rows)
+    right = evaluate_tree(tree[2], columns, rows)
+    if kind == 'and':
+        return left & right
+    if kind == 'or':
+        return left | right
+    if kind == 'xor':
+        return left ^ right
+    if kind == 'nand':
+        return ~(left & right)
+    if kind == 'nor':
+        return ~(left | right)
+    return ~left | right  # implication
+
+def evaluate_column(expression, columns, rows):
+    """
+    Evaluates an expression text over columns. Expressions that do not parse, or that use a
+    variable without a column, are False on every row, as they were with eval.
+
+    Returns:
+        tuple: (boolean array, error message or None).
+    """
+    try:
+        return evaluate_tree(compile_expression(expression).tree, columns, rows), None
+    except (ExpressionError, KeyError) as e:
+        return np.zeros(rows, dtype=bool), f"{type(e).__name__}: {e}"
+
+class ColumnarTable:
+    """
+    Truth table stored as one boolean NumPy array per variable and expression.
+
+    Rows are in itertools.product([True, False]) order. row(i) and iter_rows() give the classic
+    {name: bool} dicts when they are needed.
+    """
+
+    def __init__(self, variables, expressions, columns, rows, start=0, errors=None):
+        self.variables = list(variables)
+        self.expressions = list(expressions)
+        self.columns = columns
+        self.rows = rows
+        self.start = start  # index of the first row, for tables that hold a slice
+        self.errors = errors or {}  # expression -> why it could not be evaluated
+
+    @property
+    def headers(self):
+        return self.variables + self.expressions
+
+    def __len__(self):
+        return self.rows
+
+    def column(self, name):
+        return self.columns[name]
+
+    def row(self, index):
+        return {name: bool(self.columns[name][index]) for name in self.headers}
+
+    def iter_rows(self):
+        headers = self.headers
+        if not headers:
+            yield from ({} for _ in range(self.rows))
+            return
+        for values in zip(*(self.columns[name].tolist() for name in headers)):
+            yield dict(zip(headers, values))
+
+    def to_rows(self):
+        return list(self.iter_rows())
+
+    def all_true(self, name):
+        return bool(self.columns[name].all())
+
+    def first_false(self, name):
+        """
+        Returns the index of the first row where a column is False, or None.
+        """
+        false_rows = np.flatnonzero(~self.columns[name])
+        return int(false_rows[0]) + self.start if len(false_rows) else None
+
+    def count_true(self, name):
+        return int(np.count_nonzero(self.columns[name]))
+
+    def slice(self, start, stop, expressions=None):
+        """
+        Returns rows start..stop of the table as a table of views, with all or some expressions.
+        """
+        expressions = self.expressions if expressions is None else expressions
+        stop = min(stop, self.rows)
+        columns = {name: self.columns[name][start:stop] for name in self.variables + list(expressions)}
+        errors = {expression: self.errors[expression] for expression in expressions if expression in self.errors}
+        return ColumnarTable(self.variables, expressions, columns, stop - start, self.start + start, errors)
+
+def build_table(variables, expressions, start=0, stop=None):
+    """
+    Builds the columnar truth table of expressions over variables, or of rows start..stop of it.
+
+    Returns:
+        ColumnarTable: The table.
+    """
+    variables = list(variables)
+    variable_columns = assignment_columns(len(variables), start, stop)
+    rows = len(variable_columns[0]) if variable_columns else (1 if stop is None else stop - start)
+    assignments = dict(zip(variables, variable_columns))
+    columns = dict(assignments)
+    errors = {}
+    for expression in expressions:
+        # Expressions see the variables only, as evaluate_expression does
+        columns[expression], error = evaluate_column(expression, assignments, rows)
+        if error:
+            errors[expression] = error
+    return ColumnarTable(variables, expressions, columns, rows, start, errors)
+
+def _references(expression, variable):
+    try:
+        return variable in compile_expression(expression).variables
+    except ExpressionError:
+        return False
+
+def extend_variable(table, variable):
+    """
+    Returns a whole table extended by one variable, without re-evaluating unchanged columns.
+
+    The new variable is the last, least significant one, so every old row becomes two: the old
+    columns are repeated and the new one alternates True, False. Only expressions that reference
+    the new variable, which were False for want of it, are evaluated again.
+    """
+    rows = table.rows * 2
+    columns = {name: np.repeat(table.columns[name], 2) for name in table.variables}
+    columns[variable] = np.tile(np.array([True, False]), table.rows)
+    assignments = dict(columns)
+    errors = {}
+    for expression in table.expressions:
+        if _references(expression, variable):
+            columns[expression], error = evaluate_column(expression, assignments, rows)
+        else:
+            columns[expression], error = np.repeat(table.columns[expression], 2), table.errors.get(expression)
+        if error:
+            errors[expression] = error
+    return ColumnarTable(table.variables + [variable], table.expressions, columns, rows, errors=errors)
+
+def extend_expression(table, expression):
+    """
+    Returns a whole table extended by one expression; only the new column is evaluated.
+    """
+    assignments = {name: table.columns[name] for name in table.variables}
+    columns = dict(table.columns)
+    errors = dict(table.errors)
+    columns[expression], error = evaluate_column(expression, assignments, table.rows)
+    if error:
+        errors[expression] = error
+    return ColumnarTable(table.variables, table.expressions + [expression], columns, table.rows, errors=errors)
+
+# Rows per chunk when streaming; a multiple of 8 so chunks pack into whole bytes
+DEFAULT_CHUNK_ROWS = 1 << 16
+
+def table_rows(variables):
+    return 2 ** len(variables)
+
+def assignment_of(variables, index):
+    """
+    Returns the {variable: bool} values of row index of the truth table over variables.
+    """
+    n = len(variables)
+    return {name: not (index >> (n - 1 - j)) & 1 for j, name in enumerate(variables)}
+
+def iter_chunks(variables, expressions, chunk_rows=DEFAULT_CHUNK_ROWS, start=0, stop=None):
+    """
+    Yields the truth table as ColumnarTables of at most chunk_rows consecutive rows, so only
+    one chunk is in memory at a time. Stopping the iteration early skips the remaining rows.
+
+    Args:
+        variables: The variables.
+        expressions: The expressions to evaluate.
+        chunk_rows: Rows per chunk.
+        start: The first row.
+        stop: The row after the last, or None for all rows.
+    """
+    variables = list(variables)
+    stop = table_rows(variables) if stop is None else stop
+    for chunk_start in range(start, stop, chunk_rows):
+        yield build_table(variables, expressions, chunk_start, min(chunk_start + chunk_rows, stop))
+
+def iter_rows(variables, expressions, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Yields the truth table one {name: bool} row at a time, evaluated a chunk at a time.
+    """
+    for chunk in iter_chunks(variables, expressions, chunk_rows):
+        yield from chunk.iter_rows()
+
+def find_row(variables, expression, value=False, chunk_rows=DEFAULT_CHUNK_ROWS, start=0, stop=None, cancelled=None):
+    """
+    Returns the index of the first row, from start to stop, where expression equals value, or
+    None. Evaluation stops at the chunk holding that row, or with None as soon as cancelled, if
+    given, returns True when checked after a chunk.
+    """
+    for chunk in iter_chunks(variables, [expression], chunk_rows, start, stop):
+        if cancelled is not None and cancelled():
+            return None
+        column = chunk.column(expression)
+        hits = np.flatnonzero(column if value else ~column)
+        if len(hits):
+            return chunk.start + int(hits[0])
+    return None